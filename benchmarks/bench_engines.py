@@ -0,0 +1,50 @@
+# bench_engines.py
+"""
+Compare the regex and token decomposition engines.
+
+    python benchmarks/bench_engines.py [script] [--long N]
+
+Short inputs replay the benchmark corpus through get_response. Long
+inputs time a single rule against N words that almost match, which is
+where the backtracking regex degrades and the token matcher does not.
+"""
+import time
+import argparse
+
+from eliza.core import Eliza
+from eliza.model import ElizaRule
+from eliza.matcher import tokenize, match_tokens
+from corpus import UTTERANCES
+
+def per_call(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("script", nargs="?", default="scripts/original.eliza")
+    parser.add_argument("--long", type=int, nargs="*", default=[100, 400, 1600])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print("short inputs, get_response (us/response)")
+    for engine in Eliza.ENGINES:
+        eliza = Eliza(script_path=args.script, engine=engine)
+        seconds = per_call(lambda: [eliza.get_response(u) for u in UTTERANCES], args.repeat)
+        print(f"  {engine:>6}: {seconds / len(UTTERANCES) * 1e6:10.1f}")
+
+    print("long inputs, one rule '0 YOU 0 I 0 ME' without a match (ms/match)")
+    context = Eliza(script_path=args.script).context
+    rule = ElizaRule(pattern="0 YOU 0 I 0 ME", context=context)
+    elements = rule.elements
+    for n_words in args.long:
+        text = " ".join(["YOU", "SAID", "I", "KNOW"] * (n_words // 4))
+        repeat = max(1, args.repeat // 10)
+        regex_s = per_call(lambda: rule.regex.fullmatch(text), repeat)
+        token_s = per_call(lambda: match_tokens(elements, tokenize(text, context.vocabulary)), repeat)
+        print(f"  {n_words:>6} words: regex {regex_s * 1e3:10.2f}   token {token_s * 1e3:10.2f}")
+
+if __name__ == "__main__":
+    main()
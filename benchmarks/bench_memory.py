@@ -0,0 +1,84 @@
+# bench_memory.py
+"""
+Memory held by a loaded script and by each live conversation.
+
+    python benchmarks/bench_memory.py [scripts...] [--sessions N] [--turns N]
+
+Uses tracemalloc: "script" is what an Eliza keeps after loading the
+script, "compiled" what precompile() adds on top, and "session" the
+average a conversation holds after --turns responses (its memory queue
+and reassembly cycles). Responses are produced with a compiled script
+so only the per-session growth is measured.
+"""
+import gc
+import argparse
+import tracemalloc
+from typing import Any, Callable
+
+from eliza.core import Eliza
+from corpus import make_conversations
+
+SCRIPTS = [
+    "scripts/minimal.eliza",
+    "scripts/nano.eliza",
+    "scripts/original.eliza",
+]
+
+def allocated(build: Callable[[], Any]) -> tuple[Any, int]:
+    """Result of build() and the bytes still allocated for it afterwards."""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    return result, tracemalloc.get_traced_memory()[0] - before
+
+def bench_script(path: str, n_sessions: int, n_turns: int) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as file:
+        data = file.read()
+    conversations = make_conversations(n_sessions, n_turns)
+    # Warm up imports and the regex module's caches outside the measurement
+    warm = Eliza(script_data=data)
+    warm.precompile()
+    warm.get_responses([(warm.new_session(), text) for _, text in conversations[:100]])
+    del warm
+
+    eliza, script_bytes = allocated(lambda: Eliza(script_data=data))
+    _, compiled_bytes = allocated(eliza.precompile)
+    eliza.get_responses([(eliza.new_session(), text) for _, text in conversations[:100]])
+
+    def converse() -> dict[str, Any]:
+        sessions: dict[str, Any] = {}
+        for session_id, text in conversations:
+            session = sessions.get(session_id)
+            if session is None:
+                session = sessions[session_id] = eliza.new_session()
+            eliza.get_response(text, session)
+        return sessions
+    sessions, sessions_bytes = allocated(converse)
+    memory_items = sum(len(s.memory_queue) for s in sessions.values())
+    return {
+        "script": path,
+        "entries": len(eliza.dictionary),
+        "script_kb": script_bytes / 1024,
+        "compiled_kb": compiled_bytes / 1024,
+        "session_bytes": sessions_bytes / len(sessions),
+        "memory_items": memory_items / len(sessions),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scripts", nargs="*", default=SCRIPTS)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    print(f"{'script':<26} {'entries':>7} {'script KiB':>10} {'compiled KiB':>12} "
+          f"{'B/session':>9} {'memories':>8}")
+    for path in args.scripts:
+        r = bench_script(path, args.sessions, args.turns)
+        print(f"{r['script']:<26} {r['entries']:>7} {r['script_kb']:>10.1f} "
+              f"{r['compiled_kb']:>12.1f} {r['session_bytes']:>9.0f} {r['memory_items']:>8.1f}")
+
+if __name__ == "__main__":
+    main()
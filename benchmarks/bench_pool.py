@@ -0,0 +1,47 @@
+# bench_pool.py
+"""
+Throughput of ElizaPool versus worker count.
+
+    python benchmarks/bench_pool.py [script] [--sessions N] [--turns N] [--batch N]
+
+Scaling is near linear as long as there are at least as many free
+cores as workers; on fewer cores the extra workers just time-share.
+"""
+import os
+import time
+import argparse
+
+from eliza.core import Eliza
+from eliza.pool import ElizaPool
+from corpus import make_conversations
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("script", nargs="?", default="scripts/original.eliza")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=512)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    requests = make_conversations(args.sessions, args.turns)
+    print(f"{len(requests)} requests, {args.sessions} sessions, "
+          f"{os.cpu_count()} cpus")
+    print(f"{'workers':>7} {'req/s':>10} {'speedup':>8}")
+
+    base = None
+    workers = 1
+    while workers <= args.max_workers:
+        eliza = Eliza(script_path=args.script)
+        with ElizaPool(eliza, workers) as pool:
+            start = time.perf_counter()
+            for i in range(0, len(requests), args.batch):
+                pool.get_responses(requests[i:i + args.batch])
+            elapsed = time.perf_counter() - start
+        rate = len(requests) / elapsed
+        base = base or rate
+        print(f"{workers:>7} {rate:>10.0f} {rate / base:>8.2f}")
+        workers *= 2
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# bench_scripts.py
+"""
+Parse, compile and response latency of the bundled scripts.
+
+    python benchmarks/bench_scripts.py [scripts...] [--output run.json]
+    python benchmarks/bench_scripts.py --compare before.json after.json
+
+For every script this measures the time to parse it into an Eliza
+(best of --repeat), the time to compile all regexes and templates
+(best of --repeat, on fresh objects) and the latency of each
+get_response over a seeded conversation corpus (mean, p50, p99).
+Results are written as JSON, together with the commit they ran on,
+so runs can be compared across commits. A script that fails to load
+is reported with its error instead of numbers.
+"""
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+from typing import Any, Optional
+
+from eliza import __version__
+from eliza.core import Eliza
+from corpus import make_conversations
+
+SCRIPTS = [
+    "scripts/minimal.eliza",
+    "scripts/nano.eliza",
+    "scripts/simplified.eliza",
+    "scripts/original.eliza",
+]
+METRICS = ["parse_ms", "compile_ms", "mean_us", "p50_us", "p99_us"]
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def bench_script(path: str, conversations: list[tuple[str, str]],
+                 repeat: int) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as file:
+        data = file.read()
+
+    result: dict[str, Any] = {"script": path}
+    try:
+        parse_s = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            Eliza(script_data=data)
+            parse_s.append(time.perf_counter() - start)
+
+        compile_s = []
+        for _ in range(repeat):
+            eliza = Eliza(script_data=data)
+            start = time.perf_counter()
+            n_regexes, n_templates = eliza.precompile()
+            compile_s.append(time.perf_counter() - start)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    # Latency on the compiled script, one session per conversation
+    sessions: dict[str, Any] = {}
+    latencies = []
+    for session_id, text in conversations:
+        session = sessions.get(session_id)
+        if session is None:
+            session = sessions[session_id] = eliza.new_session()
+        start = time.perf_counter()
+        eliza.get_response(text, session)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    result.update({
+        "entries": len(eliza.dictionary),
+        "regexes": n_regexes,
+        "templates": n_templates,
+        "responses": len(latencies),
+        "parse_ms": round(min(parse_s) * 1e3, 3),
+        "compile_ms": round(min(compile_s) * 1e3, 3),
+        "mean_us": round(sum(latencies) / len(latencies) * 1e6, 1),
+        "p50_us": round(percentile(latencies, 0.50) * 1e6, 1),
+        "p99_us": round(percentile(latencies, 0.99) * 1e6, 1),
+    })
+    return result
+
+def compare(before_path: str, after_path: str) -> None:
+    """Print the relative change of every metric between two runs."""
+    with open(before_path) as file:
+        before = {r["script"]: r for r in json.load(file)["results"]}
+    with open(after_path) as file:
+        after = json.load(file)["results"]
+    for result in after:
+        old = before.get(result["script"])
+        print(result["script"])
+        if old is None or "error" in old or "error" in result:
+            print(f"  {result.get('error') or (old or {}).get('error') or 'not in before'}")
+            continue
+        for metric in METRICS:
+            change = (result[metric] - old[metric]) / old[metric] * 100 if old[metric] else 0.0
+            print(f"  {metric:>10}: {old[metric]:10.1f} -> {result[metric]:10.1f}  ({change:+.1f}%)")
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scripts", nargs="*", default=SCRIPTS)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=str, default=None,
+                        help="write JSON results here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="compare two JSON result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    conversations = make_conversations(args.sessions, args.turns, args.seed)
+    report = {
+        "commit": git_commit(),
+        "version": __version__,
+        "python": platform.python_version(),
+        "corpus": {"sessions": args.sessions, "turns": args.turns, "seed": args.seed},
+        "results": [bench_script(path, conversations, args.repeat) for path in args.scripts],
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+        for result in report["results"]:
+            summary = result.get("error") or ", ".join(f"{m} {result[m]}" for m in METRICS)
+            print(f"{result['script']}: {summary}", file=sys.stderr)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# corpus.py
+"""Reproducible conversation corpus shared by the benchmarks."""
+import random
+
+UTTERANCES = [
+    "Hello",
+    "Men are all alike.",
+    "They're always bugging us about something or other.",
+    "Well, my boyfriend made me come here.",
+    "He says I'm depressed much of the time.",
+    "It's true. I am unhappy.",
+    "I need some help, that much seems certain.",
+    "Perhaps I could learn to get along with my mother.",
+    "My mother takes care of me.",
+    "My father.",
+    "You are like my father in some ways.",
+    "You are not very aggressive but I think you don't want me to notice that.",
+    "You don't argue with me.",
+    "You are afraid of me.",
+    "My father is afraid of everybody.",
+    "Bullies.",
+    "I remember my sister. She was kind.",
+    "Do you remember my brother?",
+    "I dreamt about my family",
+    "Perhaps I am not sure",
+    "Certainly!",
+    "I don't know.",
+    "No",
+    "Yes, I think so.",
+    "Sorry",
+    "Can you help me?",
+    "I want a new car",
+    "I can't sleep",
+    "I feel that you believe I am sad",
+    "Why do you never answer me?",
+    "Computers frighten me",
+    "What is your name",
+    "Everybody hates me",
+    "Nobody loves me",
+    "Because I said so",
+    "I wish I could fly",
+    "Are you alive?",
+    "xyz abc",
+    "Hmm.",
+]
+
+def make_conversations(n_sessions: int, n_turns: int, seed: int = 0) -> list[tuple[str, str]]:
+    """Return n_sessions * n_turns (session id, utterance) pairs, interleaved."""
+    rnd = random.Random(seed)
+    requests = [(f"s{s}", rnd.choice(UTTERANCES))
+                for _ in range(n_turns) for s in range(n_sessions)]
+    rnd.shuffle(requests)
+    return requests
@@ -0,0 +1,6 @@
+from importlib.metadata import PackageNotFoundError, version
+
+try:
+    __version__ = version("eliza")
+except PackageNotFoundError:  # running from a source checkout
+    __version__ = "0.0.0"
@@ -0,0 +1,76 @@
+# budget.py
+import time
+import argparse
+from typing import Optional
+
+from .exceptions import ElizaBudgetExceeded
+from .utils import autogen_repr
+
+@autogen_repr
+class ElizaBudget:
+    """
+    Limits on the work done for a single request, None means unlimited.
+
+    - max_input_length: user input is truncated to this many characters
+    - timeout: seconds for keyword processing, enforced through the
+      regex timeout and checked between rules
+    - max_redirections: rule- and reassembly-level redirections followed
+
+    A request running out of budget falls back to the memory queue or
+    the NONE entry instead of finishing its keyword processing.
+    """
+    def __init__(self,
+                 max_input_length: Optional[int] = None,
+                 timeout: Optional[float] = None,
+                 max_redirections: Optional[int] = None):
+        self.max_input_length = max_input_length
+        self.timeout = timeout
+        self.max_redirections = max_redirections
+
+    def start(self) -> "BudgetTracker":
+        """Begin spending the budget for one request."""
+        return BudgetTracker(self)
+
+
+class BudgetTracker:
+    """The part of an ElizaBudget a running request has left."""
+    __slots__ = ("deadline", "redirections_left")
+
+    def __init__(self, budget: ElizaBudget):
+        self.deadline = (None if budget.timeout is None
+                         else time.monotonic() + budget.timeout)
+        self.redirections_left = budget.max_redirections
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, None if unlimited. Raise when none are left."""
+        if self.deadline is None:
+            return None
+        left = self.deadline - time.monotonic()
+        if left <= 0:
+            raise ElizaBudgetExceeded("time budget exhausted")
+        return left
+
+    def redirect(self, count: int = 1) -> None:
+        """Account for `count` redirections."""
+        if self.redirections_left is not None:
+            if self.redirections_left < count:
+                raise ElizaBudgetExceeded("redirection budget exhausted")
+            self.redirections_left -= count
+
+
+def add_budget_arguments(parser: argparse.ArgumentParser) -> None:
+    """Command line options for an ElizaBudget."""
+    parser.add_argument("--max-input-length", type=int, default=None,
+                        help="truncate user input to this many characters")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="seconds of keyword processing per request")
+    parser.add_argument("--max-redirections", type=int, default=None,
+                        help="redirections followed per request")
+
+
+def budget_from_args(args: argparse.Namespace) -> Optional[ElizaBudget]:
+    """The ElizaBudget set by add_budget_arguments options, None if unset."""
+    limits = (args.max_input_length, args.timeout, args.max_redirections)
+    if all(limit is None for limit in limits):
+        return None
+    return ElizaBudget(*limits)
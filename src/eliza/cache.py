@@ -0,0 +1,109 @@
+# cache.py
+import os
+import pickle
+import hashlib
+import tempfile
+from typing import Any
+
+from . import __version__
+from .exceptions import ElizaScriptError
+from .logger import logger
+from .model import ElizaDictionary
+from .parser import parse_eliza_data
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .core import Eliza
+
+# Bump when the pickled layout of the model classes changes
+CACHE_FORMAT = 6
+
+
+def script_digest(data: str) -> str:
+    """Hash of the script text, salted with package version and cache format."""
+    digest = hashlib.sha256(f"eliza {__version__} {CACHE_FORMAT}\0".encode())
+    digest.update(data.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def cache_file(cache_dir: str, digest: str) -> str:
+    return os.path.join(cache_dir, f"{digest}.pickle")
+
+
+def prepare_for_cache(dictionary: ElizaDictionary) -> None:
+    """Build every regex source string and reassembly renderer in place."""
+    for entry in dictionary.values():
+        for ruleset in (entry.response_rules, entry.memory_rules):
+            for rule in ruleset:
+                n_groups = None
+                if rule.pattern:
+                    try:
+                        rule.regex_source
+                    except (ValueError, ElizaScriptError):
+                        # Keep the lazy behaviour: fail when the rule is used
+                        continue
+                    n_groups = len(rule.items)
+                for reassembly in rule.reassembly_list:
+                    if reassembly.pattern and n_groups is not None:
+                        try:
+                            reassembly.pieces(n_groups)
+                        except ElizaScriptError:
+                            continue
+
+
+def load_cached_script(self: "Eliza", file_path: str, cache_dir: str) -> None:
+    """
+    Load an ELIZA script through the compiled-script cache in `cache_dir`.
+
+    The cache entry is keyed by the script content hash and the package
+    version, so an edited script or an upgraded package simply misses.
+    On a miss (or an unreadable entry) the script is parsed as usual and
+    a fresh entry is written.
+
+    Cache files are pickles: only point `cache_dir` at a trusted location.
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        data = file.read()
+
+    # The cache holds a whole script, it can't be merged into another one
+    if self.dictionary or self.categories:
+        parse_eliza_data(self, data)
+        return
+
+    digest = script_digest(data)
+    path = cache_file(cache_dir, digest)
+
+    try:
+        with open(path, 'rb') as file:
+            state: dict[str, Any] = pickle.load(file)
+        if state.get("digest") != digest:
+            raise ValueError("digest mismatch")
+    except FileNotFoundError:
+        logger.info(f"Script cache miss: {path}", v=2)
+    except Exception as e:
+        logger.info(f"Ignoring stale script cache {path}: {e}", v=2)
+    else:
+        logger.info(f"Script cache hit: {path}", v=2)
+        self.dictionary = state["dictionary"]
+        self.categories = state["categories"]
+        self.context = state["context"]
+        return
+
+    parse_eliza_data(self, data)
+    prepare_for_cache(self.dictionary)
+    state = {
+        "digest": digest,
+        "dictionary": self.dictionary,
+        "categories": self.categories,
+        "context": self.context,
+    }
+
+    # Write atomically so concurrent workers never see a partial file
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.info(f"Could not write script cache {path}: {e}", v=2)
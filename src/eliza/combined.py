@@ -0,0 +1,124 @@
+# combined.py
+"""
+One regex per lookup, for the regex engine.
+
+Without it, a lookup tries the decomposition rules of an entry one by
+one, up to one fullmatch per rule over the same input. With
+Eliza(combined_match=True) the rules scanned for a (key, use_memory)
+lookup are matched in one pass instead: the literal prefilter (see
+ElizaRule.literals) picks the candidate rules as before, and those are
+joined into one alternation, each rule's regex wrapped in a capturing
+group:
+
+    (rule 2 regex)|(rule 5 regex)|...
+
+Alternatives are tried in order and a fullmatch backtracks into the
+next one only when an earlier one cannot match the whole input, so the
+match is the first rule in script order, with the same groups as its
+own fullmatch. The wrapping group closes last, so match.lastindex tells
+which rule matched and its groups follow it.
+
+Joining all rules regardless of the prefilter would be slower than
+trying them one by one: a single regex fails fast on an input missing
+one of its literals, an alternation cannot. So there is one combined
+regex per set of candidates, compiled on first use; inputs fall into a
+handful of sets per lookup. A lone candidate uses its own regex.
+
+This saves the per-rule calls, not the matching itself, which is most
+of the time: on original.eliza it is about break-even, slightly slower
+when an early rule matches. It pays off for entries with many rules
+that all pass the prefilter. Hence it is off by default.
+
+The per-rule path is kept while the tracer is enabled, so traces still
+show every rule tried. Matchers are built on first use and dropped
+whenever the script changes.
+"""
+from typing import Optional, Sequence
+
+import regex as re
+
+from .exceptions import ElizaScriptError
+from .model import ElizaRule
+
+# A decomposition match: the rule and its capture groups
+RuleMatch = tuple[ElizaRule, tuple[Optional[str], ...]]
+
+# Wrapping group index -> (rule index, slice of match.groups() with its groups)
+Spans = dict[int, tuple[int, int, int]]
+
+
+class ElizaCombinedMatcher:
+    """The rules of one lookup, matched with one regex per set of candidates."""
+    __slots__ = ("rules", "_literals", "_regexes")
+
+    # Combined regexes kept per lookup, the oldest is dropped beyond that
+    MAX_REGEXES = 64
+
+    def __init__(self, rules: Sequence[ElizaRule]):
+        self.rules = tuple(rules)
+        for rule in self.rules:
+            rule.regex  # Raises on a bad pattern
+        self._literals = tuple(enumerate(rule.literals for rule in self.rules))
+        self._regexes: dict[tuple[int, ...], tuple[re.Pattern, Spans]] = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(rules={len(self.rules)}, regexes={len(self._regexes)})"
+
+    def compile(self, candidates: tuple[int, ...]) -> tuple[re.Pattern, Spans]:
+        """The alternation of the rules at indices `candidates`, and its spans."""
+        if len(candidates) == 1:
+            # Nothing to combine, the rule's own regex fails faster
+            rule = self.rules[candidates[0]]
+            return rule.regex, {}
+        parts = []
+        spans: Spans = {}
+        group = 0
+        for index in candidates:
+            rule = self.rules[index]
+            group += 1
+            parts.append(f"({rule.regex_source})")
+            spans[group] = (index, group, group + rule.regex.groups)
+            group += rule.regex.groups
+        return re.compile("|".join(parts), re.IGNORECASE), spans
+
+    def match(self, text: str, words: frozenset[str],
+              timeout: Optional[float] = None) -> tuple[Optional[RuleMatch], int]:
+        """
+        The first rule fully matching `text` and its groups (None if none
+        does), and the number of rules before it the prefilter skipped.
+        `words` are the casefolded words of `text` (logic.input_words).
+        """
+        candidates = tuple([index for index, literals in self._literals if literals <= words])
+        compiled = self._regexes.get(candidates)
+        if compiled is None:
+            if not candidates:
+                return None, len(self.rules)
+            if len(self._regexes) >= self.MAX_REGEXES:
+                self._regexes.pop(next(iter(self._regexes)), None)
+            compiled = self._regexes[candidates] = self.compile(candidates)
+        regex, spans = compiled
+        if timeout is None:  # Passing timeout=None costs as much again as a short match
+            match = regex.fullmatch(text)
+        else:
+            match = regex.fullmatch(text, timeout=timeout)
+        if match is None:
+            return None, len(self.rules) - len(candidates)
+        if not spans:
+            return (self.rules[candidates[0]], match.groups()), candidates[0]
+        index, start, end = spans[match.lastindex]
+        return (self.rules[index], match.groups()[start:end]), index - candidates.index(index)
+
+
+def build_combined_matcher(rules: Sequence[ElizaRule]) -> Optional[ElizaCombinedMatcher]:
+    """
+    A matcher for `rules` (patterns only, as the hops of dispatch.py),
+    None if there is nothing to combine (a single rule) or one of the
+    rules does not compile: the per-rule path then raises when it gets to
+    that rule, as usual.
+    """
+    if len(rules) < 2:
+        return None
+    try:
+        return ElizaCombinedMatcher(rules)
+    except (ValueError, ElizaScriptError, re.error):
+        return None
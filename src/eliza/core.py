@@ -2,49 +2,195 @@
 # TODO: understand and handle the PRE symbol
 # TODO: handle the (* ored lists) in rules
 from __future__ import annotations
+import time
+import threading
 import regex as re
 from typing import Optional, List, Union
 from textwrap import indent
-from collections import deque
-from . import parser, logic
+from collections import deque, Counter
+from . import parser, logic, cache, helpers, scanner, snapshot, hotreload, edit, dispatch, combined, memory
 from .utils import INDENT, autogen_repr, fmt
+from .logger import logger
+from .matchcache import ElizaMatchCache
 from .model import (
-    ElizaKeystack,
     ElizaCategories,
     ElizaContext,
     ElizaDictionary,
-    ElizaEntry
+    ElizaEntry,
+    ElizaSession
 )
 # from .parser import parse_eliza_data, parse_eliza_script
 # from .logic import get_response_logic
 
 @autogen_repr
 class Eliza():
-    def __init__(self, script_data=None, script_path=None):
-        self.keystack = ElizaKeystack()
+    # Decomposition matching engines, see matcher.py for "token"
+    ENGINES = ("regex", "token")
+    # Values of the precompile argument
+    PRECOMPILE_MODES = (False, True, "background")
+
+    def __init__(self, script_data=None, script_path=None, cache_dir=None,
+                 engine="regex", budget=None, precompile=False, match_cache_size=0,
+                 combined_match=False, memory_policy=None):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}, expected one of {self.ENGINES}")
+        if precompile not in self.PRECOMPILE_MODES:
+            raise ValueError(f"Unknown precompile mode {precompile!r}, "
+                             f"expected one of {self.PRECOMPILE_MODES}")
+        self.engine = engine
+        self.budget = budget  # ElizaBudget bounding each request, None: unbounded
+        self.memory_policy = memory_policy  # ElizaMemoryPolicy, None: unbounded memory queues
+        self._keyword_table = None
+        self._fingerprint = None
+        self._category_index = None
+        self._dispatch_table = None
+        # Optional LRU cache of decomposition matches, see matchcache.py
+        self.match_cache = ElizaMatchCache(match_cache_size) if match_cache_size else None
+        # One regex per rule list for the regex engine, see combined.py
+        self.combined_match = combined_match and engine == "regex"
+        self._combined_matchers = {}
+        self.stats = Counter()  # Cheap event counters, e.g. prefilter_skips
+        self.compile_seconds = None  # Set by precompile()
+        self._precompile_thread = None
+        self._precompile_error = None
+        self.script_path = script_path  # Reloaded by reload() and watch()
+        self.reload_error = None  # Why the last reload failed, None if it did not
+        self._pending_reload = None  # Prepared by reload(), applied before a request
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        # Shared script: read-only once parsing is done
         self.categories = ElizaCategories()
         self.context = ElizaContext(self.categories)
         self.dictionary = ElizaDictionary()
         if script_data:
             self.parse_data(script_data)
         if script_path:
-            self.parse_script(script_path)
+            if cache_dir:
+                self.load_cached_script(script_path, cache_dir)
+            else:
+                self.parse_script(script_path)
+        # Input scanner lookup table, rebuilt whenever entries change
+        self._keyword_table = scanner.build_keyword_table(self.dictionary)
+        self.check_redirections()
+        # Default conversation used when get_response gets no session
+        self.session = self.new_session()
+        if precompile == "background":
+            # Lazy compilation stays correct meanwhile, just slower
+            self._precompile_thread = threading.Thread(
+                target=self._precompile_in_background, name="eliza-precompile", daemon=True)
+            self._precompile_thread.start()
+        elif precompile:
+            self.precompile()
             
     def __str__(self):
         dict_str = fmt(self.dictionary)
         cate_str = fmt(self.categories)
-        keyst_str = fmt(self.keystack)
         return (f"ELIZA Dictionary:\n{indent(dict_str, INDENT)}\n"
-                f"ELIZA Categories:\n{indent(cate_str, INDENT)}\n"
-                f"ELIZA Keystack:\n{indent(keyst_str, INDENT)}")
+                f"ELIZA Categories:\n{indent(cate_str, INDENT)}")
+
+    def precompile(self):
+        """
+        Compile all regexes and templates (and the token engine elements
+        when it is used), return (n_regexes, n_templates).
+        Raise ElizaScriptError on the first bad pattern.
+        """
+        start = time.perf_counter()
+        counts = helpers.precompile_dictionary(self.dictionary,
+                                               elements=self.engine == "token")
+        self.compile_seconds = time.perf_counter() - start
+        logger.info(f"Precompiled {counts[0]} regexes, {counts[1]} templates "
+                    f"in {self.compile_seconds * 1e3:.1f} ms", v=2)
+        return counts
+
+    def _precompile_in_background(self):
+        try:
+            self.precompile()
+        except Exception as e:
+            self._precompile_error = e
+            logger.info(f"Background precompile failed: {e}")
+
+    def wait_precompiled(self, timeout=None):
+        """
+        Wait for a background precompile, re-raising its error.
+        Return False if it is still running after `timeout` seconds.
+        """
+        if self._precompile_thread is not None:
+            self._precompile_thread.join(timeout)
+            if self._precompile_thread.is_alive():
+                return False
+        if self._precompile_error is not None:
+            raise self._precompile_error
+        return True
+
+    def new_session(self):
+        """Create the state for one more conversation on this script."""
+        return ElizaSession(self.context.n_cycles)
     
+    @property
+    def keyword_table(self):
+        if self._keyword_table is None:
+            self._keyword_table = scanner.build_keyword_table(self.dictionary)
+        return self._keyword_table
+
+    @property
+    def fingerprint(self):
+        """Identity of the script's session state layout, see snapshot.py."""
+        if self._fingerprint is None:
+            self._fingerprint = snapshot.script_fingerprint(self.dictionary)
+        return self._fingerprint
+
+    @property
+    def category_index(self):
+        """Keys of the entries whose patterns refer to each category tag."""
+        if self._category_index is None:
+            self._category_index = helpers.build_category_index(self.dictionary)
+        return self._category_index
+
+    @property
+    def dispatch_table(self):
+        """Resolved rule-level redirections, see dispatch.py."""
+        if self._dispatch_table is None:
+            self._dispatch_table = dispatch.build_dispatch_table(self.dictionary)
+        return self._dispatch_table
+
+    def check_redirections(self):
+        """
+        Raise ElizaScriptError on circular rule-level redirections,
+        log the ones to missing entries.
+        """
+        dispatch.check_redirections(self.dispatch_table)
+
+    def script_changed(self):
+        """Drop everything derived from the dictionary as a whole."""
+        self._keyword_table = None
+        self._fingerprint = None
+        self._dispatch_table = None
+        self._combined_matchers = {}
+        if self.match_cache is not None:
+            self.match_cache.clear()
+
+    def combined_matcher(self, key, use_memory, rules):
+        """
+        The ElizaCombinedMatcher for the `rules` scanned by a lookup of
+        (key, use_memory), built on first use. None if it can't be built.
+        """
+        lookup = (key, use_memory)
+        try:
+            return self._combined_matchers[lookup]
+        except KeyError:
+            matcher = self._combined_matchers[lookup] = combined.build_combined_matcher(rules)
+            return matcher
+
     def update_entry(self, key, **kwargs):
+        self.script_changed()
         # If key is not present
         if key not in self.dictionary:
             if any(value is not None for value in kwargs.values()):
                 self.dictionary[key] = ElizaEntry(**kwargs)
         else:
             self.dictionary[key].update(**kwargs)
+        if self._category_index is not None and key in self.dictionary:
+            helpers.index_entry_categories(self._category_index, key, self.dictionary[key])
 
     def update_category(self, key, item):
         # If key is not present
@@ -52,8 +198,31 @@ class Eliza():
             self.categories[key] = [item]
         else:
             self.categories[key].append(item)
+        self.invalidate_category(key)
+
+    def invalidate_category(self, key):
+        """
+        Recompile the rules referring to category `key` after it changed,
+        return their number.
+        """
+        self._combined_matchers = {}
+        if self.match_cache is not None:
+            self.match_cache.clear()
+        return helpers.invalidate_category(self.dictionary, self.category_index, key)
 
     parse_script = parser.parse_eliza_script
     parse_data = parser.parse_eliza_data
+    load_cached_script = cache.load_cached_script
     get_response = logic.get_response_logic  # Attach as method
+    get_responses = logic.get_responses_logic
+    memory_stats = memory.memory_stats_logic
+    set_entries = edit.set_entries_logic
+    remove_entry = edit.remove_entry_logic
+    set_category = edit.set_category_logic
+    remove_category = edit.remove_category_logic
+    reload = hotreload.reload_logic
+    apply_reload = hotreload.apply_reload
+    watch = hotreload.watch_logic
+    save_session = snapshot.save_session_logic
+    restore_session = snapshot.restore_session_logic
 
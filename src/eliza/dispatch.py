@@ -0,0 +1,80 @@
+# dispatch.py
+"""
+Rule-level redirections resolved ahead of time.
+
+A rule-level redirection "(=KEY)" ends the rules of an entry: when none
+of the rules before it matches, matching goes on with the rules of KEY,
+which may redirect again. Instead of following these links per request,
+every (key, use_memory) lookup with a redirection gets its chain of hops
+once: the (key, rules) lists to scan in order, and the target of a final
+redirection that cannot be followed (missing entry or back into the
+chain) if any. Lookups without redirections, most of them, are not in
+the table and scan the entry's rules directly. match_keyword_entry walks the hops in a loop and raises
+the error of an unresolved target only when it gets there, as it did
+when following redirections one by one.
+"""
+from typing import Optional, Sequence
+
+from .exceptions import ElizaScriptError
+from .logger import logger
+from .model import ElizaDictionary, ElizaRule
+
+# The rule lists to scan for one lookup and its unresolved final target
+Hop = tuple[str, Sequence[ElizaRule]]
+Dispatch = tuple[tuple[Hop, ...], Optional[str]]
+
+
+def resolve_chain(dictionary: ElizaDictionary, key: str, use_memory: bool) -> Dispatch:
+    """The hops of a lookup of `key`, which must be in `dictionary`."""
+    hops: list[Hop] = []
+    path = [key]
+    while True:
+        entry = dictionary[key]
+        rules = entry.memory_rules if use_memory else entry.response_rules
+        for index, rule in enumerate(rules):
+            if rule.redirection:
+                break
+        else:
+            hops.append((key, rules))
+            return tuple(hops), None
+        hops.append((key, rules[:index]))
+        key = rule.redirection
+        if key in path or key not in dictionary:
+            return tuple(hops), key
+        path.append(key)
+
+
+def has_redirection(rules: Sequence[ElizaRule]) -> bool:
+    for rule in rules:
+        if rule.redirection:
+            return True
+    return False
+
+
+def build_dispatch_table(dictionary: ElizaDictionary) -> dict[tuple[str, bool], Dispatch]:
+    """Resolve the lookups with redirections, for response and memory rules."""
+    table = {}
+    for key, entry in dictionary.items():
+        if has_redirection(entry.response_rules):
+            table[(key, False)] = resolve_chain(dictionary, key, False)
+        if has_redirection(entry.memory_rules):
+            table[(key, True)] = resolve_chain(dictionary, key, True)
+    return table
+
+
+def check_redirections(dispatch_table: dict[tuple[str, bool], Dispatch]) -> None:
+    """
+    Raise ElizaScriptError on the first cycle of rule-level redirections,
+    log redirections to missing entries (they fail when a request gets there).
+    """
+    dangling = set()
+    for (key, use_memory), (hops, target) in dispatch_table.items():
+        if target is None:
+            continue
+        keys = [hop_key for hop_key, _ in hops]
+        if target in keys:
+            path = " -> ".join(keys[keys.index(target):] + [target])
+            raise ElizaScriptError(f"Circular rule-level redirection detected: {path}")
+        dangling.add((keys[-1], target))
+    for key, target in sorted(dangling):
+        logger.info(f"Warning: {key} redirects to {target}, which has no dictionary entry")
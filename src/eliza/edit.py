@@ -0,0 +1,82 @@
+# edit.py
+"""
+Incremental changes to a loaded script, e.g. from an admin tool.
+
+Entries are replaced as a whole, validated before anything changes;
+category changes recompile exactly the rules whose patterns refer to
+the category (see Eliza.category_index). Sessions stay valid: replaced
+rules get new reassembly cycle slots, the others keep theirs.
+"""
+from typing import Iterable
+
+from .model import ElizaDictionary, ElizaEntry
+from . import dispatch, helpers
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .core import Eliza
+
+
+def set_entries_logic(self: "Eliza", data: str) -> list[str]:
+    """
+    Method for Eliza:
+    Add or replace the entries defined in script text `data`, which may
+    also hold DLIST entries adding words to categories. An entry with the
+    key of an existing one replaces it, memory rules included.
+    Raise ElizaScriptError, leaving the script unchanged, if the text
+    does not parse or compile or would make redirections circular. Return the keys of the entries set.
+    """
+    scratch = type(self)(engine=self.engine)
+    # Rules compile against the running categories and get fresh cycle slots
+    scratch.context = self.context
+    scratch.parse_data(data)
+    helpers.precompile_dictionary(scratch.dictionary, elements=self.engine == "token")
+    merged = ElizaDictionary(self.dictionary)
+    merged.update(scratch.dictionary)
+    dispatch.check_redirections(dispatch.build_dispatch_table(merged))
+
+    for key, entry in scratch.dictionary.items():
+        self.dictionary[key] = entry
+        if self._category_index is not None:
+            helpers.index_entry_categories(self._category_index, key, entry)
+    self.script_changed()
+    for tag, words in scratch.categories.items():
+        for word in words:
+            self.update_category(tag, word)
+    return list(scratch.dictionary)
+
+
+def remove_entry_logic(self: "Eliza", key: str) -> ElizaEntry:
+    """
+    Method for Eliza:
+    Remove entry `key` and return it, raise KeyError if there is none.
+    Redirections to it fail from now on, as they would at load time.
+    """
+    entry: ElizaEntry = self.dictionary.pop(key)
+    self.script_changed()
+    return entry
+
+
+def set_category_logic(self: "Eliza", tag: str, words: Iterable[str]) -> int:
+    """
+    Method for Eliza:
+    Replace the words of category `tag` (DLIST "(/TAG)"), return the
+    number of rules recompiled.
+    """
+    tag = tag.upper()
+    self.categories[tag] = list(words)
+    n_rules: int = self.invalidate_category(tag)
+    return n_rules
+
+
+def remove_category_logic(self: "Eliza", tag: str) -> int:
+    """
+    Method for Eliza:
+    Remove category `tag`, raise KeyError if there is none. Patterns
+    referring to it then match as with an unknown category at load
+    time. Return the number of rules recompiled.
+    """
+    tag = tag.upper()
+    del self.categories[tag]
+    n_rules: int = self.invalidate_category(tag)
+    return n_rules
@@ -3,3 +3,11 @@
 class ElizaScriptError(Exception):
     """Raised when there is a syntax or structure issue in the ELIZA script."""
     pass
+
+class ElizaBudgetExceeded(Exception):
+    """Raised when a request runs out of its ElizaBudget."""
+    pass
+
+class ElizaSnapshotError(Exception):
+    """Raised when a session snapshot is malformed or for another script."""
+    pass
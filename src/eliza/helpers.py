@@ -1,5 +1,16 @@
 # helpers.py
-def get_dictionary_statistics(dictionary) -> tuple[int, int]:
+import regex as re
+
+from .exceptions import ElizaScriptError
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .model import ElizaDictionary, ElizaEntry
+
+# Category tag -> keys of the entries whose patterns refer to it
+CategoryIndex = dict[str, set[str]]
+
+def get_dictionary_statistics(dictionary: "ElizaDictionary") -> tuple[int, int]:
     """Return a tuple (n_rules, n_reassemblies) from an ElizaDictionary."""
     n_rules = 0
     n_reassemblies = 0
@@ -11,3 +22,70 @@ def get_dictionary_statistics(dictionary) -> tuple[int, int]:
                 n_reassemblies += len(rule.reassembly_list)
 
     return n_rules, n_reassemblies
+
+def precompile_dictionary(dictionary: "ElizaDictionary", elements: bool = False) -> tuple[int, int]:
+    """
+    Compile every decomposition regex and reassembly renderer of an
+    ElizaDictionary now instead of on first use, and the token engine
+    elements too if `elements` is set.
+    Return a tuple (n_regexes, n_templates).
+    Raise ElizaScriptError on the first pattern that would fail at run time.
+    """
+    n_regexes = 0
+    n_templates = 0
+
+    for key, entry in dictionary.items():
+        for ruleset in (entry.response_rules, entry.memory_rules):
+            for rule in ruleset:
+                n_groups = None
+                if rule.pattern:
+                    try:
+                        n_groups = rule.regex.groups
+                        if elements:
+                            rule.elements
+                    except (ValueError, ElizaScriptError, re.error) as e:
+                        raise ElizaScriptError(
+                            f"Bad decomposition pattern ({rule.pattern}) in {key}: {e}") from e
+                    n_regexes += 1
+                for reassembly in rule.reassembly_list:
+                    if reassembly.pattern:
+                        if n_groups is not None:
+                            try:
+                                reassembly.pieces(n_groups)
+                            except ElizaScriptError as e:
+                                raise ElizaScriptError(f"{e} ({rule.pattern}) in {key}") from e
+                        n_templates += 1
+
+    return n_regexes, n_templates
+
+def index_entry_categories(index: CategoryIndex, key: str, entry: "ElizaEntry") -> None:
+    """Add the category tags the rules of `entry` refer to to `index`."""
+    for ruleset in (entry.response_rules, entry.memory_rules):
+        for rule in ruleset:
+            for tag in rule.to_categories():
+                index.setdefault(tag, set()).add(key)
+
+def build_category_index(dictionary: "ElizaDictionary") -> CategoryIndex:
+    """Map every category tag to the keys of the entries referring to it."""
+    index: CategoryIndex = {}
+    for key, entry in dictionary.items():
+        index_entry_categories(index, key, entry)
+    return index
+
+def invalidate_category(dictionary: "ElizaDictionary", index: CategoryIndex, tag: str) -> int:
+    """
+    Invalidate the rules of an ElizaDictionary that refer to category
+    `tag`, using an index from build_category_index (stale keys are
+    fine). Return the number of rules invalidated.
+    """
+    n_rules = 0
+    for key in index.get(tag, ()):
+        entry = dictionary.get(key)
+        if entry is None:
+            continue
+        for ruleset in (entry.response_rules, entry.memory_rules):
+            for rule in ruleset:
+                if tag in rule.to_categories():
+                    rule.invalidate()
+                    n_rules += 1
+    return n_rules
@@ -0,0 +1,224 @@
+# hotreload.py
+"""
+Hot reload of the script while conversations go on.
+
+The new script is parsed and compiled next to the running one, then
+swapped in between two requests: get_response and get_responses apply a
+prepared reload before they start, so no request sees half of each
+script. Sessions stay valid because reassembly cycle slots are stable:
+a rule that still exists (same keyword, same decomposition pattern)
+keeps its old slot, new rules get fresh slots past the old ones.
+Entries that did not change, including the categories their patterns
+refer to, are taken over from the old script with everything already
+compiled; only the others are compiled. A script that fails to parse or
+compile is logged and the old one stays.
+"""
+import os
+import threading
+from typing import Any, Iterator, Optional
+
+from .exceptions import ElizaScriptError
+from .logger import logger
+from .model import ElizaCategories, ElizaContext, ElizaDictionary, ElizaEntry, ElizaRule
+from . import helpers, scanner
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .core import Eliza
+
+# A rule with reassemblies across script versions:
+# (keyword, memory rule?, pattern, occurrence of that pattern in the entry)
+RuleId = tuple[str, bool, Optional[str], int]
+
+
+class ElizaReload:
+    """A parsed and compiled script, ready to replace the running one."""
+    __slots__ = ("dictionary", "categories", "context", "keyword_table",
+                 "source", "n_changed", "kept")
+
+    def __init__(self, dictionary: ElizaDictionary, categories: ElizaCategories,
+                 context: ElizaContext, keyword_table: Any,
+                 source: Optional[str], n_changed: int,
+                 kept: Optional[list[ElizaEntry]] = None):
+        self.dictionary = dictionary
+        self.categories = categories
+        self.context = context
+        self.keyword_table = keyword_table
+        self.source = source
+        self.n_changed = n_changed
+        # Entries taken over from the running script, still bound to its context
+        self.kept = kept or []
+
+    def bind_kept(self) -> None:
+        """Point the rules of the entries taken over at the new context."""
+        for entry in self.kept:
+            for ruleset in (entry.response_rules, entry.memory_rules):
+                for rule in ruleset:
+                    rule.context = self.context
+
+
+def rule_ids(key: str, entry: ElizaEntry) -> Iterator[tuple[RuleId, ElizaRule]]:
+    """Yield (RuleId, rule) for every rule of `entry` that has reassemblies."""
+    for memory, ruleset in ((False, entry.response_rules), (True, entry.memory_rules)):
+        seen: dict[Optional[str], int] = {}
+        for rule in ruleset:
+            if rule.pattern is None:
+                continue  # Redirections hold no cycle
+            occurrence = seen[rule.pattern] = seen.get(rule.pattern, -1) + 1
+            yield (key, memory, rule.pattern, occurrence), rule
+
+
+def entry_signature(entry: ElizaEntry, categories: ElizaCategories) -> tuple[Any, ...]:
+    """Everything the compiled form of `entry` depends on."""
+    rules = []
+    tags: set[str] = set()
+    for memory, ruleset in ((False, entry.response_rules), (True, entry.memory_rules)):
+        for rule in ruleset:
+            rules.append((memory, rule.pattern, rule.redirection,
+                          tuple((r.pattern, r.redirection) for r in rule.reassembly_list)))
+            tags |= rule.to_categories()
+    return (entry.alias, entry.rank, tuple(rules),
+            tuple((tag, tuple(categories.get(tag) or ())) for tag in sorted(tags)))
+
+
+def prepare_reload(self: "Eliza", data: str, source: Optional[str] = None) -> ElizaReload:
+    """
+    Parse and compile script `data` against the running script.
+    Raise ElizaScriptError (or the parser's errors) if it is broken.
+    The running script is left alone: entries taken over are rebound to
+    the new context by apply_reload.
+    """
+    new = type(self)(script_data=data, engine=self.engine)
+    old_dictionary = self.dictionary
+    old_categories = self.categories
+    context = new.context
+    # Word ids of already compiled token elements stay valid
+    context.vocabulary = self.context.vocabulary
+
+    old_slots = {rule_id: rule.reassembly_list.slot
+                 for key, entry in old_dictionary.items()
+                 for rule_id, rule in rule_ids(key, entry)}
+    next_slot = self.context.n_cycles
+    changed = ElizaDictionary()
+    kept = []
+    for key, entry in new.dictionary.items():
+        old_entry = old_dictionary.get(key)
+        if (old_entry is not None and
+                entry_signature(old_entry, old_categories) == entry_signature(entry, new.categories)):
+            new.dictionary[key] = old_entry  # Same slots, already compiled
+            kept.append(old_entry)
+            continue
+        for rule_id, rule in rule_ids(key, entry):
+            slot = old_slots.get(rule_id)
+            if slot is None:
+                slot, next_slot = next_slot, next_slot + 1
+            rule.reassembly_list.slot = slot
+        changed[key] = entry
+    context.n_cycles = next_slot
+
+    helpers.precompile_dictionary(changed, elements=self.engine == "token")
+    return ElizaReload(new.dictionary, new.categories, context,
+                       scanner.build_keyword_table(new.dictionary), source, len(changed), kept)
+
+
+def apply_reload(self: "Eliza") -> None:
+    """
+    Method for Eliza:
+    Swap in a prepared reload, if any. Called before every request.
+    """
+    with self._reload_lock:
+        prepared, self._pending_reload = self._pending_reload, None
+    if prepared is None:
+        return
+    prepared.bind_kept()
+    self.dictionary = prepared.dictionary
+    self.categories = prepared.categories
+    self.context = prepared.context
+    self.script_changed()
+    self._keyword_table = prepared.keyword_table
+    self._category_index = None
+    self.stats["reloads"] += 1
+    logger.info(f"Reloaded {prepared.source or 'script'}: {prepared.n_changed} of "
+                f"{len(prepared.dictionary)} entries recompiled")
+
+
+def reload_logic(self: "Eliza", script_path: Optional[str] = None,
+                 script_data: Optional[str] = None, apply: bool = True) -> bool:
+    """
+    Method for Eliza:
+    Reload the script from `script_data`, `script_path` or the path the
+    Eliza was created from. Return False, log the problem and keep the
+    running script if the new one does not parse or compile; the error is
+    kept in `reload_error`. With apply=False the new script is only
+    prepared, the next request swaps it in.
+    """
+    source = None if script_data is not None else (script_path or self.script_path)
+    try:
+        if script_data is None:
+            if source is None:
+                raise ValueError("No script path to reload from")
+            with open(source, encoding="utf-8") as file:
+                script_data = file.read()
+        prepared = prepare_reload(self, script_data, source)
+    except (OSError, ValueError, ElizaScriptError) as e:
+        self.reload_error = e
+        self.stats["reload_errors"] += 1
+        logger.info(f"Reload of {source or 'script'} failed, keeping the running script: {e}")
+        return False
+    self.reload_error = None
+    with self._reload_lock:
+        self._pending_reload = prepared
+    if apply:
+        apply_reload(self)
+    return True
+
+
+class ScriptWatcher:
+    """Poll a script file and prepare a reload whenever it changes."""
+    def __init__(self, eliza: "Eliza", path: str, interval: float = 1.0):
+        self.eliza = eliza
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._version = self.version()
+        self._thread = threading.Thread(target=self._run, name="eliza-watch", daemon=True)
+        self._thread.start()
+
+    def version(self) -> Optional[tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self) -> bool:
+        """Prepare a reload if the file changed since the last check."""
+        version = self.version()
+        if version is None or version == self._version:
+            return False
+        self._version = version
+        # Applied by the next request, in the thread serving it
+        return self.eliza.reload(self.path, apply=False)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def watch_logic(self: "Eliza", script_path: Optional[str] = None,
+                interval: float = 1.0) -> ScriptWatcher:
+    """
+    Method for Eliza:
+    Reload the script in the background whenever its file changes.
+    """
+    path = script_path or self.script_path
+    if path is None:
+        raise ValueError("No script path to watch")
+    if self._watcher is not None:
+        self._watcher.stop()
+    watcher = self._watcher = ScriptWatcher(self, path, interval)
+    return watcher
@@ -40,12 +40,19 @@ _base_logger.setLevel(logging.INFO)
 logger = VerbosityLoggerAdapter(_base_logger, {})
 
 def setup_logger(verbosity: int, color: str | None = None) -> None:
+    from .trace import tracer, log_event  # trace imports this module
+
     _base_logger.handlers = []
+    _base_logger.filters = []
 
     if verbosity == 0:
         _base_logger.addHandler(logging.NullHandler())
+        # Hot path trace events are not even built
+        tracer.unsubscribe(log_event)
         return
 
+    tracer.subscribe(log_event)
+
     if color and _rich_available:
         handler = logging.StreamHandler(sys.stdout)
 
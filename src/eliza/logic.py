@@ -1,126 +1,502 @@
-import regex as re
-from typing import Optional
-from .utils import SPLIT_REGEX, WORD_RE, PRE_RE
-from .exceptions import ElizaScriptError
-from .logger import logger
-from .model import ElizaEntry, ElizaRule, ElizaReassemblyList
+from typing import Optional, Iterable, Union
+from .utils import PRE_RE
+from .rules import SPACES_RE
+from .scanner import scan_clauses
+from .matcher import Tokens, tokenize, match_tokens
+from .budget import ElizaBudget, BudgetTracker
+from .exceptions import ElizaScriptError, ElizaBudgetExceeded
+from .trace import tracer
+from .model import ElizaEntry, ElizaRule, ElizaReassemblyList, ElizaKeystack, ElizaSession
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .core import Eliza
+
+# A decomposition match: the rule and its capture groups
+RuleMatch = tuple[ElizaRule, tuple[Optional[str], ...]]
+
+# Precomputed matches: (key, reflected_input, use_memory) -> (match, visited_keys),
+# a lookup using one is charged its len(visited_keys) - 1 rule-level hops
+MatchTable = dict[tuple[str, str, bool], tuple[Optional[RuleMatch], list[str]]]
+
+def input_words(reflected_input: str) -> frozenset[str]:
+    """
+    Casefolded whitespace-separated words. Every literal of a rule
+    matching `reflected_input` is one of them (see ElizaRule.literals).
+    """
+    return frozenset(reflected_input.casefold().split())
+
+def entry_tokens(self: "Eliza",
+                 rules: Iterable[ElizaRule],
+                 reflected_input: str) -> Optional[Tokens]:
+    """Token engine input for `rules`, None if no pattern can match it."""
+    for rule in rules:
+        if rule.pattern:
+            rule.elements  # Intern all pattern words before the input's
+    return tokenize(reflected_input, self.context.vocabulary)
+
+def match_keyword_entry(self: "Eliza",
+                        key: str,
+                        reflected_input: str,
+                        use_memory: bool,
+                        visited_keys: list[str],
+                        budget: Optional[BudgetTracker] = None) -> Optional[RuleMatch]:
+    """
+    Find the first decomposition rule of `key` matching `reflected_input`,
+    following rule-level redirections (resolved in self.dispatch_table).
+    This step is stateless. Raise ElizaBudgetExceeded when `budget` runs out.
+    """
+    dispatch = self.dispatch_table.get((key, use_memory))
+    if dispatch is None:
+        entry = self.dictionary.get(key)
+        if not entry:
+            raise ElizaScriptError(f"No dictionary entry found for key: {key}")
+        hops, target = ((key, entry.memory_rules if use_memory else entry.response_rules),), None
+    else:
+        hops, target = dispatch
+
+    use_tokens = self.engine == "token"
+    combined = self.combined_match and not tracer.every_rule
+    previous_key = None
+    for key, rules in hops:
+        if previous_key is not None:
+            if tracer.enabled:
+                tracer.emit("rule_redirection", key=previous_key, target=key)
+            if budget:
+                budget.redirect()
+        previous_key = key
+        # The chain itself is acyclic, nested lookups may lead back
+        if visited_keys and key in visited_keys:
+            path = " -> ".join(visited_keys + [key])
+            raise ElizaScriptError(f"Circular rule-level redirection detected: {path}")
+        visited_keys.append(key)
+
+        if combined and (matcher := self.combined_matcher(key, use_memory, rules)):
+            rule_match: Optional[RuleMatch]
+            try:
+                rule_match, skipped = matcher.match(reflected_input, input_words(reflected_input),
+                                                    timeout=budget.remaining() if budget else None)
+            except TimeoutError:
+                raise ElizaBudgetExceeded(f"matching timed out on {key}")
+            if skipped:
+                self.stats["prefilter_skips"] += skipped
+            if rule_match is not None:
+                if tracer.enabled:
+                    rule, groups = rule_match
+                    tracer.emit("rule_matched", key=key, memory=use_memory,
+                                pattern=rule.pattern, groups=groups)
+                return rule_match
+            continue
+
+        words = None  # Casefolded input words, for the literal prefilter
+        tokens = entry_tokens(self, rules, reflected_input) if use_tokens else None
+
+        for rule in rules:
+            if tracer.enabled:
+                tracer.emit("rule_tried", key=key, memory=use_memory, pattern=rule.pattern)
+            if rule.literals:
+                if words is None:
+                    words = input_words(reflected_input)
+                if not rule.literals <= words:
+                    self.stats["prefilter_skips"] += 1
+                    if tracer.enabled:
+                        tracer.emit("rule_prefiltered", key=key, memory=use_memory,
+                                    pattern=rule.pattern)
+                    continue
+            if use_tokens:
+                if budget:
+                    budget.remaining()
+                if tokens and (groups := match_tokens(rule.elements, tokens)) is not None:
+                    if tracer.enabled:
+                        tracer.emit("rule_matched", key=key, memory=use_memory,
+                                    pattern=rule.pattern, groups=groups)
+                    return rule, groups
+            else:
+                if budget:
+                    try:
+                        match = rule.regex.fullmatch(reflected_input,
+                                                     timeout=budget.remaining())
+                    except TimeoutError:
+                        raise ElizaBudgetExceeded(f"matching timed out on {rule.pattern}")
+                else:
+                    match = rule.regex.fullmatch(reflected_input)
+                if match:
+                    if tracer.enabled:
+                        tracer.emit("rule_matched", key=key, memory=use_memory,
+                                    pattern=rule.pattern, groups=match.groups())
+                    return rule, match.groups()
+
+    if target is not None:
+        # A dangling or circular redirection, only an error when reached
+        if tracer.enabled:
+            tracer.emit("rule_redirection", key=previous_key, target=target)
+        if budget:
+            budget.redirect()
+        if target in visited_keys:
+            path = " -> ".join(visited_keys + [target])
+            raise ElizaScriptError(f"Circular rule-level redirection detected: {path}")
+        raise ElizaScriptError(f"No dictionary entry found for key: {target}")
+    return None
+
+def normalize_groups(groups: tuple[Optional[str], ...]) -> tuple[Optional[str], ...]:
+    """Capture groups with whitespace runs collapsed, as reassembly uses them."""
+    return tuple(SPACES_RE.sub(" ", group) if group else group for group in groups)
+
+def cache_value(rule_match: Optional[RuleMatch],
+                visited_keys: list[str]) -> tuple[Optional[RuleMatch], tuple[str, ...]]:
+    """What the match cache keeps of a top-level lookup."""
+    if rule_match is not None:
+        rule, groups = rule_match
+        rule_match = rule, normalize_groups(groups)
+    return rule_match, tuple(visited_keys)
+
+def reassemble(self: "Eliza",
+               rule_match: RuleMatch,
+               reflected_input: str,
+               use_memory: bool,
+               visited_keys: list[str],
+               session: ElizaSession,
+               budget: Optional[BudgetTracker] = None) -> Optional[str]:
+    """
+    Build the response for a decomposition match. This step advances
+    the session's reassembly cycle and may follow a redirection.
+    """
+    rule, groups = rule_match
+    reassembly = rule.reassembly_list(session)
+
+    response = None
+
+    if reassembly.pattern:
+        if tracer.enabled:
+            tracer.emit("reassembly", pattern=reassembly.pattern)
+        response = reassembly.render(groups)
+
+    if reassembly.redirection:
+        if tracer.enabled:
+            tracer.emit("reassembly_redirection", target=reassembly.redirection)
+        if budget:
+            budget.redirect()
+        if response:
+            reflected_input = response
+        return process_keyword_entry(self, reassembly.redirection,
+                                     reflected_input, use_memory, visited_keys,
+                                     session, budget=budget)
+
+    return response
 
 def process_keyword_entry(self: "Eliza",
                           key: str,
                           reflected_input: str,
                           use_memory: bool,
-                          visited_keys: list[str]) -> Optional[str]:
-    
-    if key in visited_keys:
-        path = " -> ".join(visited_keys + [key])
-        raise ElizaScriptError(f"Circular rule-level redirection detected: {path}")
-    visited_keys.append(key)
+                          visited_keys: list[str],
+                          session: ElizaSession,
+                          matches: Optional[MatchTable] = None,
+                          budget: Optional[BudgetTracker] = None) -> Optional[str]:
 
-    entry = self.dictionary.get(key)
-    if not entry:
-        raise ElizaScriptError(f"No dictionary entry found for key: {key}")
-
-    if use_memory:
-        rules = entry.memory_rules
+    # Only top-level lookups may use precomputed or cached matches, nested
+    # ones need the redirection cycle check against visited_keys
+    match_key = (key, reflected_input, use_memory)
+    precomputed = None
+    cache = None
+    if not visited_keys:
+        if matches:
+            precomputed = matches.get(match_key)
+        if self.match_cache is not None and not tracer.every_rule:
+            cache = self.match_cache
+            if precomputed is None:
+                precomputed = cache.get(match_key)
+            elif match_key not in cache:
+                cache.put(match_key, cache_value(*precomputed))
+    if precomputed:
+        rule_match, visited = precomputed
+        if budget and len(visited) > 1:
+            budget.redirect(len(visited) - 1)  # The rule-level hops it took
+        visited_keys.extend(visited)
+        if tracer.enabled:
+            for previous_key, next_key in zip(visited, visited[1:]):
+                tracer.emit("rule_redirection", key=previous_key, target=next_key)
+            if rule_match is not None:
+                rule, groups = rule_match
+                tracer.emit("rule_matched", key=visited[-1], memory=use_memory,
+                            pattern=rule.pattern, groups=groups, reused=True)
     else:
-        rules = entry.response_rules
-    
-    for rule in rules:
-        
-        if rule.redirection:
-            logger.info(f"  rule.redirection: {rule.redirection}")
-            return process_keyword_entry(self, rule.redirection,
-                                         reflected_input, use_memory, visited_keys)
-
-        logger.info(f"  rule.pattern: {rule.pattern}")
-        match = rule.regex.fullmatch(reflected_input)
-        if match:
-            groups = match.groups()
-            reassembly = rule.reassembly_list()
-
-            response = None
-            
-            if reassembly.pattern:
-                logger.info(f"   reassembly.pattern: {reassembly.pattern}")
-                response_format, capture_indices = reassembly.template
-                selected = [
-                    re.sub(r"\s+", " ", groups[i - 1]) if groups[i - 1] else ""
-                    for i in capture_indices
-                ]
-                response = response_format.format(*selected)
-
-            if reassembly.redirection:
-                logger.info(f"   reassembly.redirection: {reassembly.redirection}")
-                if response:
-                    reflected_input = response
-                return process_keyword_entry(self, reassembly.redirection,
-                                             reflected_input, use_memory, visited_keys)
-                
-            return response
-                
-    return None
+        rule_match = match_keyword_entry(self, key, reflected_input,
+                                         use_memory, visited_keys, budget)
+        if cache is not None:
+            cache.put(match_key, cache_value(rule_match, visited_keys))
+    if rule_match is None:
+        return None
+    return reassemble(self, rule_match, reflected_input, use_memory,
+                      visited_keys, session, budget)
 
-def get_response_logic(self, user_input: str) -> str:
-    part_sentences = SPLIT_REGEX.split(user_input)
+def scan_input(self: "Eliza", user_input: str) -> tuple[str, ElizaKeystack]:
+    """Tokenize user input, look up keywords and fill a fresh keystack."""
+    keystack = ElizaKeystack()  # Per call, so sessions can run concurrently
+    if self.budget and self.budget.max_input_length is not None:
+        user_input = user_input[:self.budget.max_input_length]
+    table = self.keyword_table
     reflected_input = ""
     found_keyword = False
 
-    # 1) Tokenize user input, look up keywords, fill keystack
-    for part in part_sentences:
-        part_clean = part.strip()
-        if not part_clean:
-            continue
-        tokens = WORD_RE.findall(part_clean.upper())
+    for tokens in scan_clauses(user_input.upper()):
         toprank = 0
         for i, token in enumerate(tokens):
-            entry = self.dictionary.get(token)
-            if entry and entry.rank is not None:
-                rank = entry.rank
-                if entry.alias:
-                    tokens[i] = entry.alias
+            hit = table.get(token)
+            if hit is not None:
+                key, rank, tokens[i] = hit
                 found_keyword = True
                 if rank >= toprank:
-                    self.keystack.push((token, rank))
+                    keystack.push((key, rank))
                     toprank = rank
                 else:
-                    self.keystack.append((token, rank))
+                    keystack.append((key, rank))
         reflected_input = " ".join(tokens)
         if found_keyword:
             break
-    
-    logger.info(f"reflected_input: {reflected_input}")
-    logger.info(f"keystack: {str(self.keystack)}")
 
+    return reflected_input, keystack
+
+def respond(self: "Eliza",
+            reflected_input: str,
+            keystack: ElizaKeystack,
+            session: ElizaSession,
+            matches: Optional[MatchTable] = None) -> str:
+    """
+    Steps 2) to 5) of get_response, `matches` may hold precomputed matches.
+    If the keywords exhaust the budget, fall back to memory and NONE.
+    """
+    if tracer.enabled:
+        tracer.emit("input", reflected_input=reflected_input, keystack=list(keystack))
+
+    budget = self.budget.start() if self.budget else None
     response_text = None
     memory_text = None
+    policy = self.memory_policy
+
+    session.turn += 1
+    if policy is not None and (expired := policy.expire(session)):
+        self.stats["memory_expired"] += expired
 
     # 2) Pop from keystack until we got both or keystack exhausted
-    while self.keystack and (not response_text or not memory_text):
-        key, _ = self.keystack.pop()
-        logger.info(f" key: {key}")
-        if not response_text:
-            response_text = process_keyword_entry(self, key, reflected_input,
-                                                  use_memory=False, visited_keys=[])
-
-        if not memory_text:
-            memory_text = process_keyword_entry(self, key, reflected_input,
-                                                use_memory=True, visited_keys=[])
-        
-    self.keystack.clear()
+    try:
+        while keystack and (not response_text or not memory_text):
+            key, _ = keystack.pop()
+            if tracer.enabled:
+                tracer.emit("keyword", key=key)
+            if not response_text:
+                response_text = process_keyword_entry(self, key, reflected_input,
+                                                      use_memory=False, visited_keys=[],
+                                                      session=session, matches=matches,
+                                                      budget=budget)
+
+            if not memory_text:
+                memory_text = process_keyword_entry(self, key, reflected_input,
+                                                    use_memory=True, visited_keys=[],
+                                                    session=session, matches=matches,
+                                                    budget=budget)
+    except ElizaBudgetExceeded as e:
+        if tracer.enabled:
+            tracer.emit("budget_exceeded", error=e)
+        self.stats["budget_exceeded"] += 1
+        # The fallback gets a budget of its own
+        budget = self.budget.start() if self.budget else None
 
     # 3) If we got a memory_text, append it to memory
     if memory_text:
-        self.context.memory_queue.append(memory_text)
+        if policy is None:
+            session.remember(memory_text)
+        elif evicted := policy.remember(session, memory_text):
+            self.stats["memory_evicted"] += evicted
 
     # 4) If still nothing, try memory
-    if not response_text and self.context.memory_queue:
-        response_text = self.context.memory_queue.popleft()
-        logger.info(f"memory_queue.popleft: {response_text}")
+    if not response_text:
+        response_text = session.recall()
+        if response_text and tracer.enabled:
+            tracer.emit("memory_popped", text=response_text)
 
     # 5) If still nothing, fallback to 'NONE' entry
     if not response_text and 'NONE' in self.dictionary:
-        logger.info(" key: NONE")
-        response_text = process_keyword_entry(self, 'NONE', reflected_input,
-                                              use_memory=False, visited_keys=[])
+        if tracer.enabled:
+            tracer.emit("keyword", key="NONE")
+        try:
+            response_text = process_keyword_entry(self, 'NONE', reflected_input,
+                                                  use_memory=False, visited_keys=[],
+                                                  session=session, matches=matches,
+                                                  budget=budget)
+        except ElizaBudgetExceeded as e:
+            if tracer.enabled:
+                tracer.emit("budget_exceeded", error=e)
+            self.stats["budget_exceeded"] += 1
+
+    response_text = response_text or "I ShoULd NoT sAy tHIs;)"
+    if tracer.enabled:
+        tracer.emit("response", text=response_text)
+    return response_text
+
+def get_response_logic(self: "Eliza", user_input: str,
+                       session: Optional[ElizaSession] = None) -> str:
+    if session is None:
+        session = self.session
+    if self._pending_reload is not None:
+        self.apply_reload()
+
+    # 1) Tokenize user input, look up keywords, fill keystack
+    reflected_input, keystack = scan_input(self, user_input)
+
+    return respond(self, reflected_input, keystack, session)
+
+def match_group(self: "Eliza",
+                key: str,
+                reflected_inputs: list[str],
+                use_memory: bool,
+                matches: MatchTable,
+                trackers: Optional[dict[str, BudgetTracker]] = None) -> None:
+    """
+    Match all `reflected_inputs` selecting `key` against its rules,
+    running each rule's matcher over the whole group in one loop.
+    With a time budget, every input spends one deadline across all the
+    rules and hops it goes through, kept in `trackers` (by input) so
+    other groups of the same input share it too. Inputs running out of
+    time are left to the sequential pass, which answers them exactly as
+    get_response does.
+    """
+    entry = self.dictionary.get(key)
+    if not entry:
+        return  # Let the sequential pass raise the error in order
+    rules = entry.memory_rules if use_memory else entry.response_rules
+    budgets: Optional[dict[str, BudgetTracker]] = None
+    if self.budget and self.budget.timeout is not None:
+        # Time only: redirections are charged to the request using the
+        # match, see process_keyword_entry
+        time_budget = ElizaBudget(timeout=self.budget.timeout)
+        budgets = trackers if trackers is not None else {}
+        for text in reflected_inputs:
+            if text not in budgets:
+                budgets[text] = time_budget.start()
+
+    words = {text: input_words(text) for text in reflected_inputs}
+    tokens = None
+    if self.engine == "token":
+        tokens = {text: entry_tokens(self, rules, text) for text in reflected_inputs}
+    pending = reflected_inputs
+    for rule in rules:
+        if not pending:
+            return
+        if rule.redirection:
+            if tracer.enabled:
+                return  # Its events belong to the requests, left to the sequential pass
+            for reflected_input in pending:
+                visited_keys = [key]
+                try:
+                    budget = budgets[reflected_input] if budgets else None
+                    rule_match = match_keyword_entry(self, rule.redirection,
+                                                     reflected_input, use_memory,
+                                                     visited_keys, budget)
+                except (ElizaScriptError, ElizaBudgetExceeded):
+                    continue  # Raised again by the sequential pass
+                matches[(key, reflected_input, use_memory)] = (rule_match, visited_keys)
+            return
+
+        literals = rule.literals
+        unmatched = []
+        if tokens is not None:
+            elements = rule.elements
+            for reflected_input in pending:
+                if literals and not literals <= words[reflected_input]:
+                    self.stats["prefilter_skips"] += 1
+                    unmatched.append(reflected_input)
+                    continue
+                if budgets:
+                    try:
+                        budgets[reflected_input].remaining()
+                    except ElizaBudgetExceeded:
+                        continue  # Left to the sequential pass and its fallback
+                text_tokens = tokens[reflected_input]
+                if text_tokens and (groups := match_tokens(elements, text_tokens)) is not None:
+                    matches[(key, reflected_input, use_memory)] = ((rule, groups), [key])
+                else:
+                    unmatched.append(reflected_input)
+        else:
+            fullmatch = rule.regex.fullmatch
+            for reflected_input in pending:
+                if literals and not literals <= words[reflected_input]:
+                    self.stats["prefilter_skips"] += 1
+                    unmatched.append(reflected_input)
+                    continue
+                if budgets:
+                    try:
+                        match = fullmatch(reflected_input,
+                                          timeout=budgets[reflected_input].remaining())
+                    except (TimeoutError, ElizaBudgetExceeded):
+                        continue  # Left to the sequential pass and its fallback
+                else:
+                    match = fullmatch(reflected_input)
+                if match:
+                    matches[(key, reflected_input, use_memory)] = ((rule, match.groups()), [key])
+                else:
+                    unmatched.append(reflected_input)
+        pending = unmatched
+
+    for reflected_input in pending:
+        matches[(key, reflected_input, use_memory)] = (None, [key])
+
+def get_responses_logic(self: "Eliza",
+                        batch: Iterable[tuple[Optional[ElizaSession], str]],
+                        return_exceptions: bool = False) -> list[Union[str, Exception]]:
+    """
+    Respond to many (session, user_input) pairs in one call.
+
+    Inputs are scanned first, then grouped by the keyword they select so
+    the (stateless) decomposition matching runs rule by rule over each
+    group. Reassembly, which advances session state, then runs strictly
+    in batch order: the result equals sequential get_response calls.
+    As with those, an error stops the batch where it happens, after the
+    pairs before it were answered; with return_exceptions=True it takes
+    the place of its pair's response instead and the others go on.
+    """
+    if self._pending_reload is not None:
+        self.apply_reload()
+    items = []
+    groups: dict[tuple[str, bool], list[str]] = {}
+
+    # 1) Tokenize all inputs and group them by selected keyword
+    for session, user_input in batch:
+        reflected_input, keystack = scan_input(self, user_input)
+        items.append((session, reflected_input, keystack))
+        if keystack:
+            key, _ = next(iter(keystack))
+            groups.setdefault((key, False), []).append(reflected_input)
+            groups.setdefault((key, True), []).append(reflected_input)
+        elif 'NONE' in self.dictionary:
+            groups.setdefault(('NONE', False), []).append(reflected_input)
+
+    # 2) Match each group, identical inputs only once
+    matches: MatchTable = {}
+    trackers: dict[str, BudgetTracker] = {}  # One deadline per input, see match_group
+    cache = self.match_cache if not tracer.every_rule else None
+    for (key, use_memory), reflected_inputs in groups.items():
+        unique_inputs = list(dict.fromkeys(reflected_inputs))
+        if cache is not None:
+            unique_inputs = [text for text in unique_inputs
+                             if (key, text, use_memory) not in cache]
+        if unique_inputs:
+            try:
+                match_group(self, key, unique_inputs, use_memory, matches, trackers)
+            except ElizaScriptError:
+                pass  # Raised again, in order, by the sequential pass
 
-    return response_text or "I ShoULd NoT sAy tHIs;)"
+    # 3) Reassemble in order, state changes happen only here
+    if not return_exceptions:
+        return [
+            respond(self, reflected_input, keystack,
+                    self.session if session is None else session, matches)
+            for session, reflected_input, keystack in items
+        ]
+    responses: list[Union[str, Exception]] = []
+    for session, reflected_input, keystack in items:
+        try:
+            responses.append(respond(self, reflected_input, keystack,
+                                     self.session if session is None else session, matches))
+        except Exception as e:
+            responses.append(e)
+    return responses
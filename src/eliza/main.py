@@ -4,13 +4,34 @@ import argparse
 import logging
 
 from .core import Eliza
+from .budget import add_budget_arguments, budget_from_args
+from .metrics import ElizaMetrics
 from .utils import clean_response
 from .logger import logger, setup_logger
 
 def run() -> None:
+    # Subcommands, the plain form stays `eliza [options] file_path`
+    if sys.argv[1:2] == ["serve"]:
+        from . import server
+        return server.run(sys.argv[2:])
+    if sys.argv[1:2] == ["pipe"]:
+        from . import pipe
+        return pipe.run(sys.argv[2:])
+    if sys.argv[1:2] == ["bench-replay"]:
+        from . import replay
+        return replay.run(sys.argv[2:])
+
     parser = argparse.ArgumentParser()
     parser.add_argument("--debug", type=int, default=0, help="verbosity level for logging")
     parser.add_argument("--log-color", type=str, default=None, help="log color if rich is installed")
+    parser.add_argument("--cache-dir", type=str, default=None,
+                        help="directory for compiled script cache")
+    add_budget_arguments(parser)
+    parser.add_argument("--precompile", nargs="?", const="eager", default=None,
+                        choices=["eager", "background"],
+                        help="compile all patterns at load time, optionally in a background thread")
+    parser.add_argument("--metrics-file", type=str, default=None,
+                        help="write keyword/rule metrics here on exit (.prom: Prometheus, else JSON)")
     parser.add_argument("file_path", nargs='?', help="Path to ELIZA script")
     args = parser.parse_args()
 
@@ -20,20 +41,30 @@ def run() -> None:
         print("Usage: ... file_path")
         sys.exit(1)
 
-    eliza = Eliza(script_path=args.file_path)
+    precompile = {"eager": True, "background": "background"}.get(args.precompile, False)
+    eliza = Eliza(script_path=args.file_path, cache_dir=args.cache_dir,
+                  budget=budget_from_args(args), precompile=precompile)
     logger.info(f"Created Eliza object with {len(eliza.dictionary)} dictionary entries.")
     n_rules, n_reassemblies = eliza.dictionary.get_statistics()
     logger.info(f"Rules: {n_rules} | Reassemblies: {n_reassemblies}", v=2)
     logger.info(f"eliza.categories:\n{eliza.categories}", v=3)
     
+    metrics = ElizaMetrics() if args.metrics_file else None
+    if metrics:
+        metrics.start()
+
     print("HOW DO YOU DO. PLEASE TELL ME YOUR PROBLEM")
-    while True:
-        user_input = input("You: ")
-        if user_input.lower() in ["exit", "bye", "quit"]:
-            print("ELIZA: GOODBYE! TAKE CARE.")
-            break
-        response = eliza.get_response(user_input)
-        print("ELIZA:", clean_response(response))
+    try:
+        while True:
+            user_input = input("You: ")
+            if user_input.lower() in ["exit", "bye", "quit"]:
+                print("ELIZA: GOODBYE! TAKE CARE.")
+                break
+            response = eliza.get_response(user_input)
+            print("ELIZA:", clean_response(response))
+    finally:
+        if metrics:
+            metrics.export(args.metrics_file)
 
 if __name__ == "__main__":
     run()
@@ -0,0 +1,80 @@
+# matchcache.py
+"""
+Bounded LRU cache of decomposition matches.
+
+For a given script, which rule of a keyword matches and its capture
+groups depend only on (key, reflected_input, use_memory); only the
+reassembly that follows advances session state. Frequent short inputs
+("YES", "NO", "I DON'T KNOW") are matched once and then served from
+here, while reassembly still cycles per session as before.
+
+Only top-level lookups of a keyword are cached, as for the precomputed
+matches of get_responses. The cache is cleared whenever the script
+changes (update_entry, editing, category changes, reloads) and bypassed
+while the tracer is enabled, so traces and metrics still show every
+rule tried.
+"""
+from collections import OrderedDict
+from typing import Any, Optional
+
+# (key, reflected_input, use_memory)
+MatchKey = tuple[str, str, bool]
+
+
+class ElizaMatchCache:
+    """LRU map from MatchKey to (rule match or None, visited keys), with counters."""
+    __slots__ = ("maxsize", "hits", "misses", "evictions", "_entries")
+
+    def __init__(self, maxsize: int = 1024):
+        if maxsize < 1:
+            raise ValueError(f"Match cache size must be positive, got {maxsize}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[MatchKey, Any] = OrderedDict()
+
+    def __repr__(self) -> str:
+        return (f"{self.__class__.__name__}(maxsize={self.maxsize}, size={len(self)}, "
+                f"hits={self.hits}, misses={self.misses})")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, match_key: MatchKey) -> bool:
+        """Whether `match_key` is cached, without counting or refreshing it."""
+        return match_key in self._entries
+
+    def get(self, match_key: MatchKey) -> Optional[Any]:
+        entries = self._entries
+        try:
+            value = entries[match_key]
+            entries.move_to_end(match_key)
+        except KeyError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, match_key: MatchKey, value: Any) -> None:
+        entries = self._entries
+        entries[match_key] = value
+        entries.move_to_end(match_key)
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (the script changed), keep the counters."""
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,171 @@
+# matcher.py
+"""
+Token-level decomposition matcher, an alternative to the backtracking
+regexes built by rules.drule_to_regex.
+
+Patterns compile to a list of elements over integer word ids, the input
+is split once into words interned against the same vocabulary. Matching
+is dynamic programming over (element, word position), O(elements * words),
+while the backtracking regex can take polynomial time of high degree.
+"""
+import threading
+from typing import Optional, Sequence, Union, cast
+
+from .utils import WORD_RE
+from .rules import PatternItem
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .model import ElizaRule, ElizaContext
+
+# Element kinds
+ANY = 0    # "0": any number of words
+COUNT = 1  # "N": exactly N words
+WORDS = 2  # literal, (* ...) or (/...): one word out of a set
+EMPTY = 3  # (/TAG) of an empty category: the regex matches "" there
+
+# (kind, N for COUNT | frozenset of word ids for WORDS)
+Element = tuple[int, Union[int, frozenset[int]]]
+
+# (original words, word ids, leading whitespace, trailing whitespace)
+Tokens = tuple[list[str], list[int], bool, bool]
+
+UNKNOWN = -1  # Id of words that no pattern mentions
+
+# Patterns compile on first use, in request threads and the background
+# precompile thread alike: two new words must not get the same id
+_vocabulary_lock = threading.Lock()
+
+
+def word_id(vocabulary: dict[str, int], word: str) -> int:
+    """Intern `word` (case-insensitively) into `vocabulary`."""
+    word = word.lower()
+    number = vocabulary.get(word)
+    if number is None:
+        with _vocabulary_lock:
+            number = vocabulary.setdefault(word, len(vocabulary))
+    return number
+
+
+def compile_items(items: Sequence[PatternItem],
+                  categories: dict[str, list[str]],
+                  vocabulary: dict[str, int]) -> list[Element]:
+    """Compile parsed pattern items (see rules.drule_to_items) into elements."""
+    elements: list[Element] = []
+    for item in items:
+        if isinstance(item, int):
+            elements.append((ANY, 0) if item == 0 else (COUNT, item))
+        elif isinstance(item, str):
+            elements.append((WORDS, frozenset([word_id(vocabulary, item)])))
+        else:
+            kind, words = item
+            if kind == "/":
+                words = categories.get(words[0].upper()) or []
+                if not words:
+                    elements.append((EMPTY, 0))
+                    continue
+            elements.append((WORDS, frozenset(word_id(vocabulary, w) for w in words)))
+    return elements
+
+
+def drule_to_elements(self: "ElizaRule") -> list[Element]:
+    """
+    Method for ElizaRule:
+    Compiles the decomposition pattern for the token matcher,
+    interning its words into the script's vocabulary.
+    """
+    context = cast("ElizaContext", self.context) # self.context is not None!
+    return compile_items(self.items, context.categories, context.vocabulary)
+
+
+def tokenize(text: str, vocabulary: dict[str, int]) -> Optional[Tokens]:
+    """
+    Split `text` into words and intern them. Return None if some piece
+    is not a word, no decomposition pattern can match such text.
+    """
+    words = text.split()
+    for word in words:
+        if not (word.isalpha() or WORD_RE.fullmatch(word)):
+            return None
+    get = vocabulary.get
+    ids = [get(word.lower(), UNKNOWN) for word in words]
+    return words, ids, text[:1].isspace(), text[-1:].isspace()
+
+
+def match_tokens(elements: list[Element], tokens: Tokens) -> Optional[tuple[Optional[str], ...]]:
+    """
+    Match compiled `elements` against the whole of `tokens`.
+    Return the same groups the pattern's regex fullmatch would, up to
+    whitespace inside groups, or None if there is no match.
+
+    A backward pass computes, per element, the word positions from which
+    the rest of the pattern can match. A forward pass then picks, element
+    by element, the first feasible option in the regex's preference
+    order. Both passes are linear in the number of words.
+    """
+    words, ids, leading, trailing = tokens
+    n_words = len(ids)
+    n_elements = len(elements)
+
+    # Leading / trailing whitespace can only be eaten by the \s* next to
+    # an empty "0" at the very start / end of a pattern of 2+ elements
+    if (leading or trailing) and n_elements < 2:
+        return None
+    if leading and elements[0][0] != ANY:
+        return None
+    if trailing and elements[-1][0] != ANY:
+        return None
+
+    def empty_only(e: int) -> bool:
+        return (leading and e == 0) or (trailing and e == n_elements - 1)
+
+    # ok[e][pos]: elements[e:] can match words[pos:]
+    ok = [[False] * (n_words + 1) for _ in range(n_elements + 1)]
+    ok[n_elements][n_words] = True
+    # nxt[e][pos]: smallest p >= pos with ok[e][p], n_words + 1 if none
+    nxt: list[Optional[list[int]]] = [None] * (n_elements + 1)
+
+    for e in range(n_elements - 1, -1, -1):
+        kind, value = elements[e]
+        after = ok[e + 1]
+        row = ok[e]
+        if kind == WORDS:
+            for pos in range(n_words):
+                row[pos] = after[pos + 1] and ids[pos] in value  # type: ignore[operator]
+        elif kind == COUNT:
+            for pos in range(n_words + 1 - value):  # type: ignore[operator]
+                row[pos] = after[pos + value]  # type: ignore[operator]
+        elif kind == EMPTY:
+            if n_words:  # \b needs a word next to it
+                row[:] = after
+        else:
+            following = [n_words + 1] * (n_words + 2)
+            for pos in range(n_words, -1, -1):
+                following[pos] = pos if after[pos] else following[pos + 1]
+            nxt[e + 1] = following
+            nonempty = not empty_only(e)
+            for pos in range(n_words + 1):
+                row[pos] = after[pos] or (nonempty and following[pos + 1] <= n_words)
+
+    if not ok[0][0]:
+        return None
+
+    groups: list[Optional[str]] = []
+    pos = 0
+    for e, (kind, value) in enumerate(elements):
+        if kind == WORDS:
+            end = pos + 1
+        elif kind == COUNT:
+            end = pos + value  # type: ignore[operator]
+        elif kind == EMPTY:
+            end = pos
+        else:
+            # Like the regex (W(?:\s+W)*?)? : one word, two, ... then none
+            following = cast(list[int], nxt[e + 1])  # Set by the backward pass
+            end = n_words + 1 if empty_only(e) else following[pos + 1]
+            if end > n_words:
+                groups.append(None)
+                continue
+        groups.append(" ".join(words[pos:end]))
+        pos = end
+    return tuple(groups)
@@ -0,0 +1,99 @@
+# memory.py
+"""
+Bounds on the memory queue of a conversation.
+
+Every MEMORY rule hit stores a memory and only a turn without keywords
+takes one back, so the queue of a long conversation grows without
+limit. An ElizaMemoryPolicy caps it:
+
+- capacity: memories kept per session; beyond it "drop-oldest" evicts
+  the oldest ones, "drop-newest" does not store the new one
+- ttl: turns a memory is kept for; a memory stored at turn t can be
+  recalled up to turn t + ttl and is dropped at the start of the next
+
+Memories dropped either way are counted in Eliza.stats
+("memory_evicted", "memory_expired"), Eliza.memory_stats() adds the
+depth of given sessions. Restored sessions (see snapshot.py) do not
+carry the turn of their memories: their time-to-live starts anew.
+"""
+import argparse
+from typing import Any, Iterable, Optional
+
+from .model import ElizaSession
+from .utils import autogen_repr
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .core import Eliza
+
+
+@autogen_repr
+class ElizaMemoryPolicy:
+    """Capacity and time-to-live of every session's memory queue, None means unlimited."""
+    OVERFLOW = ("drop-oldest", "drop-newest")
+
+    def __init__(self,
+                 capacity: Optional[int] = None,
+                 overflow: str = "drop-oldest",
+                 ttl: Optional[int] = None):
+        if capacity is not None and capacity < 0:
+            raise ValueError(f"Memory capacity must not be negative, got {capacity}")
+        if overflow not in self.OVERFLOW:
+            raise ValueError(f"Unknown overflow policy {overflow!r}, expected one of {self.OVERFLOW}")
+        if ttl is not None and ttl < 0:
+            raise ValueError(f"Memory time-to-live must not be negative, got {ttl}")
+        self.capacity = capacity
+        self.overflow = overflow
+        self.ttl = ttl
+
+    def remember(self, session: ElizaSession, text: str) -> int:
+        """Store a memory in `session`, return the number of memories dropped."""
+        return session.remember(text, self.capacity, self.overflow == "drop-newest",
+                                track_turns=self.ttl is not None)
+
+    def expire(self, session: ElizaSession) -> int:
+        """Drop the memories of `session` past their time-to-live, return their number."""
+        if self.ttl is None:
+            return 0
+        return session.expire(self.ttl)
+
+
+def memory_stats_logic(self: "Eliza",
+                       sessions: Optional[Iterable[ElizaSession]] = None) -> dict[str, Any]:
+    """
+    Method for Eliza:
+    Memory queue counters, with the depth of the queues of `sessions`
+    (by default the default session) in total and at most.
+    """
+    if sessions is None:
+        sessions = [self.session]
+    depths = [session.memory_depth for session in sessions]
+    policy = self.memory_policy
+    return {
+        "capacity": policy.capacity if policy else None,
+        "overflow": policy.overflow if policy else None,
+        "ttl": policy.ttl if policy else None,
+        "evicted": self.stats["memory_evicted"],
+        "expired": self.stats["memory_expired"],
+        "sessions": len(depths),
+        "depth": sum(depths),
+        "max_depth": max(depths, default=0),
+    }
+
+
+def add_memory_arguments(parser: argparse.ArgumentParser) -> None:
+    """Command line options for an ElizaMemoryPolicy."""
+    parser.add_argument("--memory-capacity", type=int, default=None,
+                        help="memories kept per session")
+    parser.add_argument("--memory-overflow", choices=ElizaMemoryPolicy.OVERFLOW,
+                        default="drop-oldest",
+                        help="what to drop when a session's memory is full")
+    parser.add_argument("--memory-ttl", type=int, default=None, metavar="TURNS",
+                        help="turns a memory is kept for")
+
+
+def memory_policy_from_args(args: argparse.Namespace) -> Optional[ElizaMemoryPolicy]:
+    """The ElizaMemoryPolicy set by add_memory_arguments options, None if unbounded."""
+    if args.memory_capacity is None and args.memory_ttl is None:
+        return None
+    return ElizaMemoryPolicy(args.memory_capacity, args.memory_overflow, args.memory_ttl)
@@ -0,0 +1,225 @@
+# metrics.py
+"""
+Per-keyword and per-rule counters built from trace events.
+
+    metrics = ElizaMetrics()
+    with metrics:  # subscribed to the tracer meanwhile
+        eliza.get_response("...")
+    metrics.export("rules.prom")
+
+Time is attributed to whatever was running between two consecutive
+events: the current keyword from its selection to the next keyword (or
+the response), the current rule from its attempt to its outcome.
+
+Metrics subscribe without every_rule (see trace.py), so the match cache
+and the combined matcher stay on. Lookups they or the grouped matching
+of get_responses answer run no per-rule attempts: their matches are
+counted, the matches of cached and batch lookups also as "reused",
+attempts and rule time are not.
+"""
+import json
+import time
+from collections import Counter, defaultdict
+from typing import Any, Callable, Optional
+
+from .trace import tracer
+
+# (keyword, memory rule?, pattern)
+RuleKey = tuple[str, bool, str]
+
+
+class ElizaMetrics:
+    """Aggregate trace events into counters, export them as JSON or Prometheus text."""
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.responses = 0
+        self.response_seconds = 0.0
+        self.memory_fallbacks = 0
+        self.budget_exceeded = 0
+        self.keyword_selected: Counter[str] = Counter()
+        self.keyword_wins: Counter[str] = Counter()
+        self.keyword_seconds: defaultdict[str, float] = defaultdict(float)
+        self.rule_tried: Counter[RuleKey] = Counter()
+        self.rule_prefiltered: Counter[RuleKey] = Counter()
+        self.rule_matches: Counter[RuleKey] = Counter()
+        self.rule_reused: Counter[RuleKey] = Counter()
+        self.rule_seconds: defaultdict[RuleKey, float] = defaultdict(float)
+        self.redirections: Counter[tuple[str, str]] = Counter()  # (level, target)
+        # What the time since the last event is spent on
+        self._keyword: Optional[str] = None
+        self._rule: Optional[RuleKey] = None
+        self._first_keyword = False
+        self._request_start = self._last = time.perf_counter()
+
+    def start(self) -> None:
+        tracer.subscribe(self, every_rule=False)
+
+    def stop(self) -> None:
+        tracer.unsubscribe(self)
+
+    def __enter__(self) -> "ElizaMetrics":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def __call__(self, event: str, fields: dict[str, Any]) -> None:
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        if self._keyword is not None:
+            self.keyword_seconds[self._keyword] += elapsed
+        if self._rule is not None:
+            self.rule_seconds[self._rule] += elapsed
+            self._rule = None
+
+        if event == "input":
+            self._request_start = now
+            self._first_keyword = True
+            self._keyword = None
+        elif event == "keyword":
+            key = fields["key"]
+            self._keyword = key
+            self.keyword_selected[key] += 1
+            if self._first_keyword:
+                self.keyword_wins[key] += 1
+                self._first_keyword = False
+        elif event == "rule_tried":
+            self._rule = (fields["key"], fields["memory"], fields["pattern"])
+            self.rule_tried[self._rule] += 1
+        elif event == "rule_prefiltered":
+            self.rule_prefiltered[(fields["key"], fields["memory"], fields["pattern"])] += 1
+        elif event == "rule_matched":
+            rule = (fields["key"], fields["memory"], fields["pattern"])
+            self.rule_matches[rule] += 1
+            if fields.get("reused"):
+                self.rule_reused[rule] += 1
+        elif event == "rule_redirection":
+            self.redirections[("rule", fields["target"])] += 1
+        elif event == "reassembly_redirection":
+            self.redirections[("reassembly", fields["target"])] += 1
+        elif event == "memory_popped":
+            self.memory_fallbacks += 1
+        elif event == "budget_exceeded":
+            self.budget_exceeded += 1
+        elif event == "response":
+            self.responses += 1
+            self.response_seconds += now - self._request_start
+            self._keyword = None
+
+    def snapshot(self) -> dict[str, Any]:
+        """Plain data copy of all counters, hottest entries first."""
+        keywords = {
+            key: {
+                "selected": count,
+                "wins": self.keyword_wins[key],
+                "seconds": self.keyword_seconds.get(key, 0.0),
+            }
+            for key, count in self.keyword_selected.most_common()
+        }
+        rules = [
+            {
+                "keyword": key,
+                "memory": memory,
+                "pattern": pattern,
+                "tried": self.rule_tried[rule],
+                "prefiltered": self.rule_prefiltered[rule],
+                # Actual matcher runs
+                "attempts": self.rule_tried[rule] - self.rule_prefiltered[rule],
+                "matches": self.rule_matches[rule],
+                "reused": self.rule_reused[rule],
+                "seconds": self.rule_seconds.get(rule, 0.0),
+            }
+            for rule in sorted({**self.rule_tried, **self.rule_matches},
+                               key=lambda rule: (-self.rule_tried[rule], -self.rule_matches[rule]))
+            for key, memory, pattern in [rule]
+        ]
+        return {
+            "responses": self.responses,
+            "response_seconds": self.response_seconds,
+            "memory_fallbacks": self.memory_fallbacks,
+            "budget_exceeded": self.budget_exceeded,
+            "keywords": keywords,
+            "rules": rules,
+            "redirections": [
+                {"level": level, "target": target, "count": count}
+                for (level, target), count in self.redirections.most_common()
+            ],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format."""
+        data = self.snapshot()
+        lines: list[str] = []
+
+        def metric(name: str, kind: str, help_text: str,
+                   samples: list[tuple[dict[str, Any], float]]) -> None:
+            lines.append(f"# HELP eliza_{name} {help_text}")
+            lines.append(f"# TYPE eliza_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{prometheus_escape(str(v))}"'
+                                      for k, v in labels.items())
+                lines.append(f"eliza_{name}{{{label_text}}} {value}" if label_text
+                             else f"eliza_{name} {value}")
+
+        metric("responses_total", "counter", "Responses produced.",
+               [({}, data["responses"])])
+        metric("response_seconds_total", "counter", "Time spent producing responses.",
+               [({}, data["response_seconds"])])
+        metric("memory_fallbacks_total", "counter", "Responses taken from the memory queue.",
+               [({}, data["memory_fallbacks"])])
+        metric("budget_exceeded_total", "counter", "Requests that ran out of budget.",
+               [({}, data["budget_exceeded"])])
+        keywords = data["keywords"].items()
+        metric("keyword_selected_total", "counter", "Keywords processed.",
+               [({"keyword": k}, v["selected"]) for k, v in keywords])
+        metric("keyword_wins_total", "counter", "Keywords on top of the keystack.",
+               [({"keyword": k}, v["wins"]) for k, v in keywords])
+        metric("keyword_seconds_total", "counter", "Time spent processing keywords.",
+               [({"keyword": k}, v["seconds"]) for k, v in keywords])
+        for field, help_text in [("attempts", "Decomposition matcher runs."),
+                                 ("prefiltered", "Rules skipped by the literal prefilter."),
+                                 ("matches", "Decomposition matches."),
+                                 ("reused", "Matches taken from the batch table or match cache."),
+                                 ("seconds", "Time spent matching rules.")]:
+            metric(f"rule_{field}_total", "counter", help_text,
+                   [({"keyword": r["keyword"], "memory": str(r["memory"]).lower(),
+                      "pattern": r["pattern"]}, r[field]) for r in data["rules"]])
+        metric("redirections_total", "counter", "Redirections followed.",
+               [({"level": r["level"], "target": r["target"]}, r["count"])
+                for r in data["redirections"]])
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: Optional[str] = None,
+               callback: Optional[Callable[[str], None]] = None,
+               format: Optional[str] = None) -> str:
+        """
+        Render a snapshot, write it to `path` and/or pass it to `callback`.
+        `format` is "json" or "prometheus", by default guessed from the
+        path (.prom or .txt means Prometheus), else JSON.
+        """
+        if format is None:
+            format = "prometheus" if path and path.endswith((".prom", ".txt")) else "json"
+        if format == "json":
+            text = self.to_json()
+        elif format == "prometheus":
+            text = self.to_prometheus()
+        else:
+            raise ValueError(f"Unknown metrics format {format!r}, expected json or prometheus")
+        if path:
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(text)
+        if callback:
+            callback(text)
+        return text
+
+
+def prometheus_escape(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -2,23 +2,125 @@
 # TODO: understand and handle the PRE symbol
 # TODO: handle the (* ored lists) in rules
 from __future__ import annotations
+import sys
 import regex as re
-from typing import Optional, List, Union
+from typing import Any, Optional, List, Union
 from textwrap import indent
+from array import array
 from collections import deque
 from .utils import INDENT, autogen_repr, fmt
 
-from . import helpers, rules
+from . import helpers, rules, matcher
 
 class ElizaContext:
+    """Read-only state shared by all rules of one loaded script."""
     def __init__(self, categories: ElizaCategories):
         self.categories = categories
-        self.memory_queue = deque() # First-in-first-out memory
+        self.n_cycles = 0 # Number of allocated reassembly cycle slots
+        self.vocabulary: dict[str, int] = {} # Word ids for the token matcher
         # Add more shared stuff here if needed (logger, memory stack, etc.)
 
     def __repr__(self):
         return f"<ElizaContext categories={len(self.categories)}>"
 
+    def allocate_cycle(self) -> int:
+        """Reserve a slot in the per-session cycle counter array."""
+        slot = self.n_cycles
+        self.n_cycles += 1
+        return slot
+
+
+class ElizaSession:
+    """
+    Per-conversation state: the memory queue and one round-robin
+    counter per ElizaReassemblyList, indexed by its slot, plus the number
+    of turns answered (see memory.py for the bounds on the queue).
+    Everything else lives in the shared script.
+    """
+    __slots__ = ("_memory_queue", "_memory_turns", "cycles", "turn")
+
+    def __init__(self, n_cycles: int = 0):
+        # Most conversations never store a memory, an empty deque is 600 bytes
+        self._memory_queue: Optional[deque[str]] = None
+        # Turn each memory was stored at, only kept for a time-to-live
+        self._memory_turns: Optional[deque[int]] = None
+        self.cycles = array("H", bytes(2 * n_cycles))
+        self.turn = 0
+
+    def __repr__(self):
+        return (f"{self.__class__.__name__}(memory_queue={list(self._memory_queue or ())!r}, "
+                f"cycles={self.cycles.tolist()!r})")
+
+    @property
+    def memory_queue(self) -> deque[str]:
+        """First-in-first-out memory, allocated on first use."""
+        if self._memory_queue is None:
+            self._memory_queue = deque()
+        return self._memory_queue
+
+    @property
+    def memory_depth(self) -> int:
+        return len(self._memory_queue) if self._memory_queue else 0
+
+    def memory_turns(self) -> deque[int]:
+        """The turn of every memory, those stored untracked (e.g. restored) count as now."""
+        if self._memory_turns is None:
+            self._memory_turns = deque([self.turn] * self.memory_depth)
+        return self._memory_turns
+
+    def remember(self, text: str, capacity: Optional[int] = None,
+                 drop_newest: bool = False, track_turns: bool = False) -> int:
+        """
+        Append a memory, keeping at most `capacity` by dropping the oldest
+        ones or else this one if `drop_newest`. Record the current turn
+        for expire() if `track_turns`. Return the number of memories dropped.
+        """
+        queue = self.memory_queue
+        if capacity is not None and len(queue) >= capacity and drop_newest:
+            return 1
+        if track_turns or self._memory_turns is not None:
+            self.memory_turns().append(self.turn)
+        queue.append(text)
+        dropped = 0
+        while capacity is not None and len(queue) > capacity:
+            queue.popleft()
+            if self._memory_turns is not None:
+                self._memory_turns.popleft()
+            dropped += 1
+        return dropped
+
+    def recall(self) -> Optional[str]:
+        """Pop the oldest memory, None if there is none."""
+        if self._memory_queue:
+            if self._memory_turns:
+                self._memory_turns.popleft()
+            return self._memory_queue.popleft()
+        return None
+
+    def expire(self, ttl: int) -> int:
+        """Drop memories stored more than `ttl` turns ago, return their number."""
+        if not self._memory_queue:
+            return 0
+        queue = self._memory_queue
+        turns = self.memory_turns()
+        oldest = self.turn - ttl
+        dropped = 0
+        while turns and turns[0] < oldest:
+            turns.popleft()
+            queue.popleft()
+            dropped += 1
+        return dropped
+
+    def advance(self, slot: int, length: int) -> int:
+        """Return the current position of cycle `slot` and move it on."""
+        cycles = self.cycles
+        if slot >= len(cycles):
+            # Script grew after this session was created
+            cycles.extend([0] * (slot + 1 - len(cycles)))
+        index = cycles[slot] % length
+        cycles[slot] = (index + 1) % length
+        return index
+
 class ElizaDictionary(dict[str, "ElizaEntry"]):
     def __str__(self):
         return '\n'.join(f"{k}:\n{indent(str(v), INDENT)}" for k, v in self.items())
@@ -30,8 +132,18 @@ class ElizaCategories(dict[str, List[str]]):
     def __str__(self):
         return '\n'.join(f"{k}:\n{indent(str(v), INDENT)}" for k, v in self.items())
 
+def intern(text: Optional[str]) -> Optional[str]:
+    """Share one copy of a script string between all rules using it."""
+    return sys.intern(text) if type(text) is str else text
+
+
+# The model classes below are slotted: a loaded script is mostly made of
+# them, and slots take a fraction of the memory of an instance __dict__.
+
 @autogen_repr
 class ElizaEntry:
+    __slots__ = ("alias", "rank", "response_rules", "memory_rules")
+
     def __init__(self,
                  alias: Optional[str] = None,
                  rank: Optional[int] = None,
@@ -59,54 +171,66 @@ class ElizaEntry:
 
     
 class ElizaRulesList(list["ElizaRule"]):
+    __slots__ = ()
+
     def __str__(self):
         return "["+',\n'.join(str(elem) for elem in self)+"]"
 
 
 class ElizaReassemblyList(list["ElizaReassembly"]):
-    def __init__(self, *args):
+    __slots__ = ("slot",)
+
+    def __init__(self, *args: Any, slot: int = 0):
         super().__init__(*args)
-        self._index = 0
+        self.slot = slot # Index into ElizaSession.cycles
 
     def __str__(self):
         return "["+',\n '.join("'"+str(elem)+"'" for elem in self)+"]"
 
-    def __call__(self):
-        return self.next()
+    def __call__(self, session: ElizaSession) -> ElizaReassembly:
+        return self.next(session)
 
-    def next(self):
+    def next(self, session: ElizaSession) -> ElizaReassembly:
         if not self:
             raise IndexError("No reassembly rules available.")
 
-        item = self[self._index]
-        self._index = (self._index + 1) % len(self)
-        return item
+        return self[session.advance(self.slot, len(self))]
 
 
 @autogen_repr
 class ElizaRule:
+    __slots__ = ("pattern", "redirection", "reassembly_list", "context", "_items",
+                 "_regex_source", "_compiled_regex", "_elements", "literals")
+
     def __init__(self,
                  pattern: Optional[str] = None,
                  redirection: Optional[str] = None,
                  reassembly_list: Optional[ElizaReassemblyList] = None,
-                 context: Optional[ElizaContext] = None):
+                 context: Optional[ElizaContext] = None,
+                 items: Optional[list[rules.PatternItem]] = None):
         
         # For now ElizaRule is either a pattern or a redirection
         assert pattern or redirection and not pattern and redirection
         
-        self.pattern = pattern
-        self.redirection = redirection
+        self.pattern = intern(pattern)
+        self.redirection = intern(redirection)
         self.reassembly_list = ElizaReassemblyList()
         self.context = context
+        self._items = items  # Parsed pattern, see rules.drule_to_items
+        self._regex_source: Optional[str] = None
         self._compiled_regex = None
+        self._elements = None
+        # Words the input must contain for the regex to have a chance
+        self.literals = self.to_literals() if pattern else frozenset()
         self.update(reassembly_list=reassembly_list)
 
     @classmethod
     def from_pattern(cls, pattern: str,
                      reassembly_list: ElizaReassemblyList,
-                     context: ElizaContext):
-        return cls(pattern=pattern,
-                   reassembly_list=reassembly_list, context=context)
+                     context: ElizaContext,
+                     items: Optional[list[rules.PatternItem]] = None):
+        return cls(pattern=pattern, reassembly_list=reassembly_list,
+                   context=context, items=items)
 
     @classmethod
     def from_redirection(cls, redirection: str,
@@ -130,20 +254,72 @@ class ElizaRule:
     def add_reassembly(self, reassembly):
         self.reassembly_list.append(reassembly)
 
+    def invalidate(self):
+        """Forget the compiled pattern after a category change, rebuild what was built."""
+        compiled = self._compiled_regex is not None
+        elements = self._elements is not None
+        self._regex_source = None
+        self._compiled_regex = None
+        self._elements = None
+        if compiled:
+            self.regex
+        if elements:
+            self.elements
+
+    def __getstate__(self):
+        # Compiled patterns are not pickled, they are rebuilt
+        # lazily from the (cheap to compile) regex source string.
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state["_compiled_regex"] = None
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        # Unpickled strings are copies, share them again
+        self.pattern = intern(self.pattern)
+        self.redirection = intern(self.redirection)
+
+    @property
+    def items(self):
+        # Parsed pattern, kept from the script parser or parsed lazily
+        if self._items is None:
+            self._items = self.to_items()
+        return self._items
+
+    @property
+    def regex_source(self) -> str:
+        # Lazy build and cache
+        if self._regex_source is None:
+            self._regex_source = self.to_regex()
+        return self._regex_source
+
     @property
     def regex(self):
         # Lazy compile and cache
         if self._compiled_regex is None:
-            pattern_str = self.to_regex()
-            self._compiled_regex = re.compile(pattern_str, re.IGNORECASE)
+            self._compiled_regex = re.compile(self.regex_source, re.IGNORECASE)
         return self._compiled_regex
 
+    @property
+    def elements(self):
+        # Lazy compile for the token matcher and cache
+        if self._elements is None:
+            self._elements = self.to_elements()
+        return self._elements
+
     # instance method to build the regex from the pattern
     to_regex = rules.drule_to_regex
+    to_items = rules.drule_to_items
+    to_literals = rules.drule_literals
+    to_categories = rules.drule_categories
+    to_elements = matcher.drule_to_elements
     
 
 @autogen_repr
 class ElizaReassembly:
+    __slots__ = ("pattern", "redirection", "_pieces", "_n_groups")
+
     def __init__(self,
                  pattern: Optional[str] = None,
                  redirection: Optional[str] = None):
@@ -151,10 +327,11 @@ class ElizaReassembly:
         # ElizaReassembly is a reassembly or a redirection or both
         #assert reassembly or redirection
         
-        self.pattern = pattern
-        self.redirection = redirection
-        self._format: Optional[str] = None
-        self._indices: Optional[list[int]] = None
+        self.pattern = intern(pattern)
+        self.redirection = intern(redirection)
+        # Compiled for a decomposition with _n_groups components, see render()
+        self._pieces: tuple[Union[str, int], ...] = ()
+        self._n_groups = -1
 
     @classmethod
     def from_pattern(cls, pattern: str):
@@ -173,18 +350,27 @@ class ElizaReassembly:
         return cls()
     
     def __str__(self):
-        return f"{self.reassembly}"
-
-    @property
-    def template(self) -> tuple[str, list[int]]:
-        # Lazy format and collect indices
-        if self._format is None:
-            self._format, self._indices = self.to_template()
-        assert self._format is not None and self._indices is not None
-        return self._format, self._indices
-
-    # instance method to build the template
-    to_template = rules.rrule_to_template
+        return f"{self.pattern}"
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.pattern = intern(self.pattern)
+        self.redirection = intern(self.redirection)
+
+    def pieces(self, n_groups: int) -> tuple[Union[str, int], ...]:
+        # Lazy compile for the renderer and cache
+        if self._n_groups != n_groups:
+            self._pieces = self.to_pieces(n_groups)
+            self._n_groups = n_groups
+        return self._pieces
+
+    # instance methods to compile and render the pieces
+    to_pieces = rules.rrule_to_pieces
+    render = rules.rrule_render
 
 
 class ElizaKeystack:
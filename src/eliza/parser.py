@@ -1,8 +1,9 @@
 import sys
-from typing import Optional
-import sexpdata
-from sexpdata import Symbol, dumps
+from typing import Any, Iterable, Optional
+from sexpdata import Symbol
 from .exceptions import ElizaScriptError
+from .reader import Form, read_forms, render, render_items
+from .rules import sexp_to_items
 from .utils import REDIR_RE, PRE_RE, NEWKEY_RE, VALID_DECO
 from .model import (
     ElizaEntry,
@@ -10,6 +11,7 @@ from .model import (
     ElizaReassemblyList,
     ElizaRule,
     ElizaReassembly,
+    intern,
 )
 
 from typing import TYPE_CHECKING
@@ -20,20 +22,27 @@ if TYPE_CHECKING:
 # They are marked during parsing by a rank == None 
 special_keys = ["DIT", "XFREMD", "NONE"]
 
+def position_of(value: Any) -> str:
+    """' at line L, column C' for a Form (or a list starting with one), else ''."""
+    if not isinstance(value, Form):
+        value = next((item for item in value if isinstance(item, Form)), None) \
+            if isinstance(value, list) else None
+    return f" at {value.position()}" if value is not None and value.line else ""
+
 class ElizaScriptEntryError(ElizaScriptError):
     def __init__(self, entry):
         self.entry = entry
-        super().__init__(f"Malformed entry: {dumps(entry)}")
+        super().__init__(f"Malformed entry: {render(entry)}{position_of(entry)}")
 
 class ElizaScriptRuleError(ElizaScriptError):
     def __init__(self, rule):
         self.rule = rule
-        super().__init__(f"Malformed rule: {dumps(rule)}")
+        super().__init__(f"Malformed rule: {render(rule)}{position_of(rule)}")
 
 class ElizaScriptMemoryRuleError(ElizaScriptError):
     def __init__(self, rule):
         self.rule = rule
-        super().__init__(f"Malformed memory-rule: {dumps(rule)}")
+        super().__init__(f"Malformed memory-rule: {render(rule)}{position_of(rule)}")
 
 def parse_eliza_rules(rules_data: list[list],
                       context = None,
@@ -52,7 +61,7 @@ def parse_eliza_rules(rules_data: list[list],
             # We (for now) don't support partition syntax (0 = BLAH)
             if is_memory:
                 raise ElizaScriptMemoryRuleError(raw_rule)
-            redirection = sexpdata.dumps(raw_rule)[1:-1].strip('= ')
+            redirection = render_items(raw_rule).strip('= ')
             if ' ' in redirection or i < len(rules_data) - 1:
                 raise ElizaScriptRuleError(rules_data)  # show all rules
             
@@ -64,14 +73,21 @@ def parse_eliza_rules(rules_data: list[list],
         if len(raw_rule) < 2 or not all(isinstance(e, list) for e in raw_rule):
             raise ElizaScriptRuleError(raw_rule)
 
-        pattern_str = sexpdata.dumps(raw_rule[0])[1:-1]
+        pattern_str = render_items(raw_rule[0])
         if not VALID_DECO.fullmatch(pattern_str):
             raise ElizaScriptRuleError(raw_rule)
+        # Keep the parsed pattern, the rule needs no second parse
+        try:
+            items = sexp_to_items(raw_rule[0], pattern_str)
+        except ElizaScriptError:
+            items = None  # Fail lazily, as a rule parsed from the string would
 
         reassembly_list = ElizaReassemblyList()
+        if context is not None:
+            reassembly_list.slot = context.allocate_cycle()
         
         for item in raw_rule[1:]:
-            rr = sexpdata.dumps(item)[1:-1].strip()
+            rr = render_items(item).strip()
 
             if is_memory:
                 reassembly_list.append(ElizaReassembly.from_pattern(rr))
@@ -104,7 +120,7 @@ def parse_eliza_rules(rules_data: list[list],
             # 4) Otherwise it's a plain "reassembly" text
             reassembly_list.append(ElizaReassembly.from_pattern(rr))
             
-        new_rule = ElizaRule.from_pattern(pattern_str, reassembly_list, context)
+        new_rule = ElizaRule.from_pattern(pattern_str, reassembly_list, context, items)
         
         rules_list.append(new_rule)
 
@@ -113,8 +129,11 @@ def parse_eliza_rules(rules_data: list[list],
 
 def parse_eliza_data(self: "Eliza", data: str) -> None:
     """Parses ELIZA script data from a string."""
-    parsed_data = sexpdata.loads(f'({data})')
+    parse_eliza_forms(self, read_forms(data.splitlines(keepends=True)))
+
 
+def parse_eliza_forms(self: "Eliza", parsed_data: Iterable[Any]) -> None:
+    """Parses ELIZA script entries as they come from reader.read_forms."""
     for entry in parsed_data:
         # Symbol STOP or empty list '()' stops evaluation
         if ((isinstance(entry, Symbol) and str(entry) == "STOP")
@@ -141,9 +160,9 @@ def parse_eliza_data(self: "Eliza", data: str) -> None:
         if isinstance(entry[1], Symbol) and "MEMORY" in map(str, entry[:2]):
             
             if str(entry[0]) == "MEMORY":
-                key = str(entry[1])
+                key = intern(str(entry[1]))
             else:
-                key = str(entry[0])
+                key = intern(str(entry[0]))
 
             if not (len(entry) >= 3 and all(isinstance(e, list) for e in entry[2:])):
                 raise ElizaScriptEntryError(entry)
@@ -153,7 +172,7 @@ def parse_eliza_data(self: "Eliza", data: str) -> None:
             self.update_entry(key, memory_rules=memory_rules)
             continue
 
-        key = str(entry[0])  # Keyword
+        key = intern(str(entry[0]))  # Keyword
         index = 1  # Start checking the items at index 1
 
         # Check if the second item is "=" (indicating an alias)
@@ -161,7 +180,7 @@ def parse_eliza_data(self: "Eliza", data: str) -> None:
             if not (len(entry) >= 3 and isinstance(entry[2], Symbol)):
                 raise ElizaScriptEntryError(entry)
 
-            alias = str(entry[2])  # entry[2] is the alias
+            alias = intern(str(entry[2]))  # entry[2] is the alias
             index = 3
 
         # Check if this is a DLIST entry
@@ -201,10 +220,9 @@ def parse_eliza_data(self: "Eliza", data: str) -> None:
     
 
 def parse_eliza_script(self: "Eliza", file_path: str) -> None:
-    """Reads ELIZA script from a file and parses it."""
+    """Reads ELIZA script from a file and parses it while streaming it."""
     with open(file_path, 'r', encoding='utf-8') as file:
-        data = file.read()
-    return parse_eliza_data(self, data)
+        parse_eliza_forms(self, read_forms(file))
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,166 @@
+# pipe.py
+import sys
+import json
+import argparse
+from typing import Any, Optional, TextIO
+
+from .core import Eliza
+from .budget import add_budget_arguments, budget_from_args
+from .memory import add_memory_arguments, memory_policy_from_args
+from .model import ElizaSession
+from .utils import clean_response
+from .logger import logger, setup_logger
+
+class ElizaPipe:
+    """
+    Answer a stream of utterances without a prompt.
+
+    In text mode every input line is one utterance of a single
+    conversation and every output line the response to it. In JSONL mode
+    every line is a record like `{"session": "abc", "text": "Hello"}`,
+    answered by `{"session": "abc", "response": "..."}` in input order;
+    any number of sessions may be interleaved, `"end": true` forgets a
+    session and an "id" is echoed back.
+
+    Lines are answered in batches through Eliza.get_responses, which
+    gives the same responses as answering them one by one. A line that
+    fails (e.g. on a broken script redirection) gets the error, in JSONL
+    mode as its record's "error", in text mode as an empty line; the
+    other lines of its batch are answered as usual.
+    """
+    def __init__(self, eliza: Eliza, jsonl: bool = False, raw: bool = False):
+        self.eliza = eliza
+        self.jsonl = jsonl
+        self.raw = raw
+        self.sessions: dict[str, ElizaSession] = {}
+
+    def get_session(self, session_id: str) -> ElizaSession:
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = self.eliza.new_session()
+        return session
+
+    def parse_record(self, line: str) -> tuple[dict[str, Any], Optional[tuple[ElizaSession, str]]]:
+        """Reply skeleton for a JSONL line, plus the (session, text) to answer if any."""
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            return {"error": f"invalid JSON: {e}"}, None
+        if not isinstance(record, dict):
+            return {"error": "record must be a JSON object"}, None
+
+        reply: dict[str, Any] = {}
+        if "id" in record:
+            reply["id"] = record["id"]
+        session_id = str(record.get("session", ""))
+        reply["session"] = session_id
+        if record.get("end"):
+            self.sessions.pop(session_id, None)
+            reply["ended"] = True
+            return reply, None
+        text = record.get("text")
+        if not isinstance(text, str):
+            reply["error"] = "missing 'text'"
+            return reply, None
+        return reply, (self.get_session(session_id), text)
+
+    def process(self, lines: list[str]) -> str:
+        """Answer a batch of input lines, return the output for all of them."""
+        if not self.jsonl:
+            session = self.get_session("")
+            responses = self.eliza.get_responses(
+                [(session, line.rstrip("\r\n")) for line in lines], return_exceptions=True)
+            output = []
+            for response in responses:
+                if isinstance(response, Exception):
+                    logger.info(f"Line failed: {response!r}")
+                    response = ""  # Keeps output lines aligned with input lines
+                elif not self.raw:
+                    response = clean_response(response)
+                output.append(response + "\n")
+            return "".join(output)
+
+        replies = []
+        pending = []  # (reply, session, text)
+        for line in lines:
+            if not line.strip():
+                continue
+            reply, request = self.parse_record(line)
+            replies.append(reply)
+            if request is not None:
+                pending.append((reply, *request))
+
+        responses = self.eliza.get_responses(
+            [(session, text) for _, session, text in pending], return_exceptions=True)
+        for (reply, _, _), response in zip(pending, responses):
+            if isinstance(response, Exception):
+                logger.info(f"Record failed: {response!r}")
+                reply["error"] = str(response)
+            else:
+                reply["response"] = response if self.raw else clean_response(response)
+        return "".join(json.dumps(reply) + "\n" for reply in replies)
+
+    def run(self, infile: TextIO, outfile: TextIO,
+            batch_size: int = 64, flush: bool = False) -> None:
+        """
+        Answer `infile` line by line into `outfile`, `batch_size` lines
+        at a time. Someone typing at a terminal gets every line answered
+        (and flushed) right away.
+        """
+        if infile.isatty():
+            batch_size, flush = 1, True
+        batch: list[str] = []
+        for line in infile:
+            batch.append(line)
+            if len(batch) >= batch_size:
+                outfile.write(self.process(batch))
+                batch = []
+                if flush:
+                    outfile.flush()
+        if batch:
+            outfile.write(self.process(batch))
+        outfile.flush()
+
+
+def run(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="eliza pipe")
+    parser.add_argument("--debug", type=int, default=0, help="verbosity level for logging")
+    parser.add_argument("--cache-dir", type=str, default=None,
+                        help="directory for compiled script cache")
+    add_budget_arguments(parser)
+    add_memory_arguments(parser)
+    parser.add_argument("--jsonl", action="store_true",
+                        help="read and write JSON records with session ids instead of plain lines")
+    parser.add_argument("--raw", action="store_true",
+                        help="write responses without clean_response")
+    parser.add_argument("--batch", type=int, default=64,
+                        help="lines answered per get_responses call")
+    parser.add_argument("--flush", action="store_true",
+                        help="flush the output after every batch (use --batch 1 for every line)")
+    parser.add_argument("--match-cache", type=int, default=0, metavar="SIZE",
+                        help="cache this many decomposition matches (LRU), 0 disables")
+    parser.add_argument("--combined-match", action="store_true",
+                        help="match the rules of an entry with one combined regex (regex engine)")
+    parser.add_argument("--watch", type=float, nargs="?", const=1.0, default=None,
+                        metavar="SECONDS",
+                        help="reload the script when its file changes, checking every SECONDS (1)")
+    parser.add_argument("file_path", help="Path to ELIZA script")
+    args = parser.parse_args(argv)
+
+    setup_logger(args.debug)
+
+    eliza = Eliza(script_path=args.file_path, cache_dir=args.cache_dir,
+                  budget=budget_from_args(args), match_cache_size=args.match_cache,
+                  combined_match=args.combined_match,
+                  memory_policy=memory_policy_from_args(args),
+                  precompile=True)
+    logger.info(f"Created Eliza object with {len(eliza.dictionary)} dictionary entries.")
+    if args.watch:
+        eliza.watch(interval=args.watch)
+    try:
+        ElizaPipe(eliza, jsonl=args.jsonl, raw=args.raw).run(
+            sys.stdin, sys.stdout, max(1, args.batch), args.flush)
+    except BrokenPipeError:
+        sys.stderr.close()  # Reader went away, e.g. `| head`
+    except KeyboardInterrupt:
+        sys.exit(1)
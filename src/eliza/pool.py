@@ -0,0 +1,129 @@
+# pool.py
+import gc
+import os
+import zlib
+import multiprocessing
+from multiprocessing.connection import Connection
+from typing import Any, Optional, Union, cast
+
+from .core import Eliza
+from .model import ElizaSession
+from .logger import logger
+
+# A request to the pool: (session id, user input)
+PoolRequest = tuple[str, str]
+
+
+def shard_of(session_id: str, n_workers: int) -> int:
+    """Stable worker index for a session id (same in every process)."""
+    return zlib.crc32(session_id.encode("utf-8")) % n_workers
+
+
+def worker_loop(eliza: Eliza, conn: Connection) -> None:
+    """
+    Serve batches from `conn` until a None arrives. Each is answered
+    with a list of responses, an exception in place of a failed one.
+    """
+    sessions: dict[str, ElizaSession] = {}
+    while True:
+        batch = conn.recv()
+        if batch is None:
+            break
+        try:
+            pairs = []
+            for session_id, user_input in batch:
+                session = sessions.get(session_id)
+                if session is None:
+                    session = sessions[session_id] = eliza.new_session()
+                pairs.append((session, user_input))
+            conn.send(eliza.get_responses(pairs, return_exceptions=True))
+        except Exception as e:
+            conn.send(e)
+    conn.close()
+
+
+class ElizaPool:
+    """
+    Pre-fork pool of worker processes sharing one compiled script.
+
+    The script is fully compiled in the parent, then the workers are
+    forked so they share those pages copy-on-write. Every session id is
+    always routed to the same worker, which owns the session state, so
+    memory queues and reassembly cycles stay consistent.
+    Requires the 'fork' start method (Linux, other POSIX systems).
+    """
+    def __init__(self, eliza: Eliza, n_workers: Optional[int] = None):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        n_regexes, n_templates = eliza.precompile()
+        logger.info(f"Pool: precompiled {n_regexes} regexes, {n_templates} templates", v=2)
+
+        # Keep the garbage collector from touching (and so copying) the
+        # shared objects in the workers
+        gc.collect()
+        gc.freeze()
+
+        context = multiprocessing.get_context("fork")
+        self.connections: list[Connection] = []
+        self.processes: list[Any] = []
+        for _ in range(self.n_workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=worker_loop,
+                                      args=(eliza, child_conn), daemon=True)
+            process.start()
+            child_conn.close()
+            self.connections.append(parent_conn)
+            self.processes.append(process)
+        gc.unfreeze()
+
+    def __enter__(self) -> "ElizaPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def get_response(self, session_id: str, user_input: str) -> str:
+        return cast(str, self.get_responses([(session_id, user_input)])[0])  # Errors raise
+
+    def get_responses(self, batch: list[PoolRequest],
+                      return_exceptions: bool = False) -> list[Union[str, Exception]]:
+        """
+        Split `batch` by worker, run the parts in parallel, keep the order.
+        A failed request does not stop the others, which have moved their
+        sessions on: with return_exceptions=True its error takes the place
+        of its response, else the first error is raised once all workers
+        have answered.
+        """
+        shards: list[list[int]] = [[] for _ in range(self.n_workers)]
+        for i, (session_id, _) in enumerate(batch):
+            shards[shard_of(session_id, self.n_workers)].append(i)
+
+        busy = []
+        for worker, indices in enumerate(shards):
+            if indices:
+                self.connections[worker].send([batch[i] for i in indices])
+                busy.append(worker)
+
+        responses: list[Union[str, Exception]] = [""] * len(batch)
+        for worker in busy:
+            result = self.connections[worker].recv()
+            if isinstance(result, Exception):
+                result = [result] * len(shards[worker])  # The whole part failed
+            for i, response in zip(shards[worker], result):
+                responses[i] = response
+        if not return_exceptions:
+            for response in responses:
+                if isinstance(response, Exception):
+                    raise response
+        return responses
+
+    def close(self) -> None:
+        for conn in self.connections:
+            try:
+                conn.send(None)
+            except (OSError, ValueError):
+                pass
+            conn.close()
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
@@ -0,0 +1,256 @@
+# reader.py
+"""
+Streaming reader for the S-expression syntax of ELIZA scripts.
+
+The script is read chunk by chunk (usually line by line) and every
+top-level form is yielded as soon as it is complete, so parsing is a
+single linear pass that can stop at STOP without reading the rest.
+Forms are the same values sexpdata.loads builds (lists, Symbols, ints,
+floats, strings, Quoted, Brackets) with lists being Forms that know
+where they start in the source, and render() writes them back exactly
+as sexpdata.dumps does.
+"""
+from typing import Any, Iterable, Iterator, Optional
+
+import regex as re
+from sexpdata import Symbol, String, Quoted, Brackets, tosexp # type: ignore
+
+from .exceptions import ElizaScriptError
+
+# One token: whitespace, comment, delimiters, quote, string start, atom.
+# A backslash escapes any character in an atom, as in sexpdata.
+TOKEN_RE = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>;[^\n]*)
+  | (?P<open>[(\[])
+  | (?P<close>[)\]])
+  | (?P<quote>')
+  | (?P<string>")
+  | (?P<atom>(?:[^\s()\[\]";\\]|\\.)+)
+  | (?P<escape>\\)
+""", re.VERBOSE | re.DOTALL)
+
+# Rest of a string literal, up to and including its closing quote
+STRING_RE = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+STRING_BODY_RE = re.compile(r'(?:[^"\\]|\\.)*', re.DOTALL)
+ESCAPE_RE = re.compile(r"\\(.)", re.DOTALL)
+
+# Lines with none of these take the fast path: words and parentheses only
+NOT_PLAIN_RE = re.compile(r"""["\\;\[\]]|(?:^|[\s()])'""")
+
+CLOSERS = {"(": ")", "[": "]"}
+SYMBOL_ESCAPES = str.maketrans({c: q for c, q in Symbol._lisp_quoted_specials})
+
+
+class ElizaScriptSyntaxError(ElizaScriptError):
+    """Raised when the script is not a valid sequence of S-expressions."""
+    def __init__(self, message: str, line: int, column: int):
+        self.line = line
+        self.column = column
+        super().__init__(f"{message} at line {line}, column {column}")
+
+
+class Form(list[Any]):
+    """A parenthesized list, with the position of its opening bracket."""
+    line = 0
+    column = 0
+
+    def position(self) -> str:
+        return f"line {self.line}, column {self.column}" if self.line else "unknown position"
+
+
+def atom(token: str) -> Any:
+    """Value of an unescaped atom, like sexpdata's Parser.atom."""
+    first = token[0]
+    if first.isalpha() and first not in "iInNt":  # Can't be nil, t or a number
+        return Symbol(token)
+    if token == "nil":
+        return []
+    if token == "t":
+        return True
+    try:
+        return int(token)
+    except ValueError:
+        try:
+            return float(token)
+        except ValueError:
+            return Symbol(token)
+
+
+def unescape(text: str, quoted_to_raw: dict[str, str]) -> str:
+    if "\\" not in text:
+        return text
+    unescaped: str = ESCAPE_RE.sub(lambda m: quoted_to_raw.get(m.group(0), m.group(0)), text)
+    return unescaped
+
+
+def read_forms(chunks: Iterable[str]) -> Iterator[Any]:
+    """
+    Yield the top-level forms of the text split into `chunks`.
+    Chunks may end anywhere, e.g. fixed-size blocks or lines.
+    Raise ElizaScriptSyntaxError on unbalanced brackets and the like.
+    """
+    stack: list[tuple[Form, str]] = []  # Open lists and their closing bracket
+    quotes: list[tuple[int, int]] = []  # Positions of quotes waiting for a value
+    quote_depths: list[int] = []  # len(stack) at each pending quote
+    top: list[Any] = []  # Completed top-level values not yet yielded
+    line = 1
+    string_parts: Optional[list[str]] = None  # Inside a multi-chunk string
+    string_start = (0, 0)
+    atoms: dict[str, Any] = {}  # Fast path atom values, shared between forms
+
+    def add(value: Any) -> None:
+        # Wrap pending quotes opened at this depth
+        while quote_depths and quote_depths[-1] == len(stack):
+            quote_depths.pop()
+            quotes.pop()
+            value = Quoted(value)
+        (stack[-1][0] if stack else top).append(value)
+
+    carry = ""  # Atom cut off at the end of the previous chunk
+    line_start = 0  # Offset of the current line, relative to the chunk
+
+    for chunk in chunks:
+        if carry:
+            chunk = carry + chunk
+            carry = ""
+        pos = 0
+        end = len(chunk)
+
+        if (string_parts is None and not quote_depths and chunk.endswith("\n")
+                and chunk.count("\n") == 1 and not NOT_PLAIN_RE.search(chunk)):
+            # Fast path for a plain line, most of any script
+            search = 0
+            for token in chunk.replace("(", " ( ").replace(")", " ) ").split():
+                if token == "(":
+                    search = chunk.index("(", search) + 1
+                    form = Form()
+                    form.line, form.column = line, search - line_start
+                    stack.append((form, ")"))
+                elif token == ")":
+                    search = chunk.index(")", search) + 1
+                    if not stack:
+                        raise ElizaScriptSyntaxError("Unexpected ')'", line, search - line_start)
+                    form, expected = stack.pop()
+                    if expected != ")":
+                        raise ElizaScriptSyntaxError(
+                            f"Expected {expected!r} to close line {form.line}, "
+                            f"column {form.column}, got ')'", line, search - line_start)
+                    (stack[-1][0] if stack else top).append(form)
+                else:
+                    value: Any = atoms.get(token)
+                    if value is None:
+                        value = atom(token)
+                        if token != "nil":  # Only immutable values are shared
+                            atoms[token] = value
+                    (stack[-1][0] if stack else top).append(value)
+            line += 1
+            line_start = pos = end
+
+        while pos < end:
+            if string_parts is not None:
+                match = STRING_RE.match(chunk, pos)
+                stop: int = end if match is None else match.end()
+                newlines = chunk.count("\n", pos, stop)
+                if newlines:
+                    line += newlines
+                    line_start = chunk.rfind("\n", 0, stop) + 1
+                if match is None:
+                    # A trailing backslash waits for the character it escapes
+                    stop = STRING_BODY_RE.match(chunk, pos).end()
+                    string_parts.append(chunk[pos:stop])
+                    carry = chunk[stop:]
+                    pos = stop
+                    break
+                string_parts.append(match.group()[:-1])
+                add(unescape("".join(string_parts), String._lisp_quoted_to_raw))
+                string_parts = None
+                pos = stop
+                continue
+
+            match = TOKEN_RE.match(chunk, pos)
+            kind: str = match.lastgroup
+            column = pos - line_start + 1
+            start, pos = pos, match.end()
+            if kind == "space":
+                newlines = match.group().count("\n")
+                if newlines:
+                    line += newlines
+                    line_start = chunk.rfind("\n", 0, pos) + 1
+            elif kind in ("atom", "escape", "comment") and (
+                    pos == end or (kind == "atom" and chunk[pos:] == "\\")):
+                # The token may go on in the next chunk
+                carry = chunk[start:]
+                pos = start
+                break
+            elif kind in ("atom", "escape"):
+                if kind == "escape":
+                    raise ElizaScriptSyntaxError("Backslash at end of input", line, column)
+                text: str = match.group()
+                if "\n" in text:  # Escaped newlines
+                    line += text.count("\n")
+                    line_start = chunk.rfind("\n", 0, pos) + 1
+                add(atom(unescape(text, Symbol._lisp_quoted_to_raw)))
+            elif kind == "open":
+                form = Form()
+                form.line, form.column = line, column
+                stack.append((form, CLOSERS[match.group()]))
+            elif kind == "close":
+                closer: str = match.group()
+                if not stack:
+                    raise ElizaScriptSyntaxError(f"Unexpected {closer!r}", line, column)
+                if quote_depths and quote_depths[-1] == len(stack):
+                    raise ElizaScriptSyntaxError("Nothing after quote", *quotes[-1])
+                form, expected = stack.pop()
+                if closer != expected:
+                    raise ElizaScriptSyntaxError(
+                        f"Expected {expected!r} to close line {form.line}, "
+                        f"column {form.column}, got {closer!r}", line, column)
+                add(form if expected == ")" else Brackets(list(form)))
+            elif kind == "quote":
+                quotes.append((line, column))
+                quote_depths.append(len(stack))
+            elif kind == "string":
+                string_parts = []
+                string_start = (line, column)
+            # Comments are skipped
+
+        # Offsets in the next chunk start from `pos` in this one
+        line_start -= pos
+
+        # Hand out complete top-level values as soon as possible
+        if top and not quote_depths:
+            yield from top
+            top.clear()
+
+    if carry and string_parts is None and carry[0] != ";":
+        match = TOKEN_RE.match(carry)
+        if match.lastgroup != "atom" or match.end() != len(carry):
+            raise ElizaScriptSyntaxError("Backslash at end of input", line, 1 - line_start)
+        add(atom(unescape(carry, Symbol._lisp_quoted_to_raw)))
+    if string_parts is not None:
+        raise ElizaScriptSyntaxError("Unterminated string", *string_start)
+    if stack:
+        form, expected = stack[-1]
+        raise ElizaScriptSyntaxError(f"Missing {expected!r} for the list opened",
+                                     form.line, form.column)
+    if quotes:
+        raise ElizaScriptSyntaxError("Nothing after quote", *quotes[-1])
+    yield from top
+
+
+def render(value: Any) -> str:
+    """Write `value` back as sexpdata.dumps would."""
+    if isinstance(value, Symbol):
+        return str.translate(value, SYMBOL_ESCAPES)
+    if isinstance(value, list):
+        return "(" + " ".join(map(render, value)) + ")"
+    if type(value) is int:
+        return str(value)
+    text: str = tosexp(value)
+    return text
+
+
+def render_items(form: list[Any]) -> str:
+    """The items of a list written back, without the brackets."""
+    return " ".join(map(render, form))
@@ -0,0 +1,326 @@
+# replay.py
+"""
+Replay recorded conversations against a script and measure latency,
+to size hardware from real traffic instead of guessing.
+
+    eliza bench-replay script.eliza transcripts... [--sessions N]
+        [--concurrency N] [--seed N] [--connect HOST:PORT | --unix PATH]
+
+Transcripts are plain text or JSONL (by the .jsonl extension):
+
+- text: one utterance per line, a blank line between conversations;
+  "ELIZA:" lines are skipped and a "You:" prefix is dropped, so the
+  transcript of an interactive session replays as is
+- JSONL: records like `{"session": "abc", "text": "Hello"}` as for
+  `eliza pipe --jsonl`, one conversation per session in order
+
+Every replayed session plays one conversation, picked at random with
+`--seed`. In process, `--concurrency` conversations are interleaved turn
+by turn in one thread, so the same seed replays the very same requests
+in the same order. That only changes the order of the turns: requests
+never overlap in process, so throughput and latencies are those of one
+session at a time whatever the concurrency, and the report says so.
+Against a server (`eliza serve`), each of the
+`--concurrency` NDJSON connections plays one session at a time; the
+order then depends on the server too, the requests of every session
+still do not.
+
+Each turn is timed and filed under its selected keyword (the top of
+the keystack, "NONE" without keywords), worked out for every utterance
+before the replay starts. The report gives throughput and
+p50/p90/p99/max latency per keyword; --json adds a log2 histogram in
+microseconds.
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from typing import Any, Iterable, Iterator, Optional
+
+from .core import Eliza
+from .logic import scan_input
+from .model import ElizaSession
+from .logger import logger, setup_logger
+
+PERCENTILES = (50, 90, 99)
+ALL = "(all)"
+
+# One conversation: its utterances in order
+Conversation = list[str]
+
+
+def read_text_transcript(lines: Iterable[str]) -> list[Conversation]:
+    conversations: list[Conversation] = []
+    current: Conversation = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if current:
+                conversations.append(current)
+                current = []
+            continue
+        if line.startswith("ELIZA:"):
+            continue
+        if line.startswith("You:"):
+            line = line[len("You:"):].strip()
+        current.append(line)
+    if current:
+        conversations.append(current)
+    return conversations
+
+
+def read_jsonl_transcript(lines: Iterable[str]) -> list[Conversation]:
+    sessions: dict[str, Conversation] = {}
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {number}: invalid JSON: {e}") from e
+        if isinstance(record, dict) and isinstance(record.get("text"), str):
+            sessions.setdefault(str(record.get("session", "")), []).append(record["text"])
+    return [conversation for conversation in sessions.values() if conversation]
+
+
+def load_transcripts(paths: Iterable[str]) -> list[Conversation]:
+    """All conversations of the transcript files at `paths`."""
+    conversations = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as file:
+            if path.endswith(".jsonl"):
+                conversations.extend(read_jsonl_transcript(file))
+            else:
+                conversations.extend(read_text_transcript(file))
+    return conversations
+
+
+def plan_sessions(conversations: list[Conversation], n_sessions: Optional[int],
+                  seed: int) -> list[Conversation]:
+    """
+    The conversation of every session to replay: each one once in a
+    shuffled order if `n_sessions` is None, else picked at random.
+    """
+    rng = random.Random(seed)
+    if n_sessions is None:
+        plan = list(conversations)
+        rng.shuffle(plan)
+        return plan
+    return [rng.choice(conversations) for _ in range(n_sessions)]
+
+
+def selected_keyword(eliza: Eliza, text: str) -> str:
+    """The keyword `text` is answered from first, "NONE" if it has none."""
+    _, keystack = scan_input(eliza, text)
+    return keystack.pop()[0] if keystack else "NONE"
+
+
+def selected_keywords(eliza: Eliza, plan: list[Conversation]) -> dict[str, str]:
+    """selected_keyword of every utterance in `plan`, before timing anything."""
+    keywords: dict[str, str] = {}
+    for conversation in plan:
+        for text in conversation:
+            if text not in keywords:
+                keywords[text] = selected_keyword(eliza, text)
+    return keywords
+
+
+class ElizaLatencies:
+    """Latencies per keyword and the wall time they were taken in."""
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = {}
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def add(self, keyword: str, seconds: float) -> None:
+        self.samples.setdefault(keyword, []).append(seconds)
+
+    @property
+    def turns(self) -> int:
+        return sum(len(samples) for samples in self.samples.values())
+
+    @staticmethod
+    def summarize(samples: list[float]) -> dict[str, Any]:
+        """Count, nearest-rank percentiles, max (ms) and a log2 histogram (µs)."""
+        ordered = sorted(samples)
+        summary: dict[str, Any] = {"count": len(ordered)}
+        for p in PERCENTILES:
+            rank = max(1, -(-p * len(ordered) // 100))  # ceil
+            summary[f"p{p}"] = ordered[rank - 1] * 1e3
+        summary["max"] = ordered[-1] * 1e3
+        histogram: dict[int, int] = {}
+        for seconds in ordered:
+            bucket = 1 << max(0, int(seconds * 1e6)).bit_length()  # Upper bound, µs
+            histogram[bucket] = histogram.get(bucket, 0) + 1
+        summary["histogram_us"] = histogram
+        return summary
+
+    def report(self, top: Optional[int] = None) -> dict[str, Any]:
+        """Throughput and summaries, overall and for the `top` most frequent keywords."""
+        keywords = sorted(self.samples, key=lambda key: (-len(self.samples[key]), key))
+        all_samples = [seconds for samples in self.samples.values() for seconds in samples]
+        return {
+            "turns": self.turns,
+            "errors": self.errors,
+            "elapsed": self.elapsed,
+            "throughput": len(all_samples) / self.elapsed if self.elapsed else 0.0,
+            "latency": {
+                ALL: self.summarize(all_samples) if all_samples else {"count": 0},
+                **{key: self.summarize(self.samples[key]) for key in keywords[:top]},
+            },
+        }
+
+
+def replay_in_process(eliza: Eliza, plan: list[Conversation], concurrency: int = 1,
+                      latencies: Optional[ElizaLatencies] = None) -> ElizaLatencies:
+    """
+    Replay the sessions of `plan` on `eliza`, `concurrency` of them at
+    a time, taking turns in a fixed order. Requests never overlap:
+    concurrency only sets how many sessions are interleaved.
+    """
+    latencies = latencies or ElizaLatencies()
+    keywords = selected_keywords(eliza, plan)
+    pending = iter(plan)
+    active: list[tuple[ElizaSession, Iterator[str]]] = []
+    clock = time.perf_counter
+    start = clock()
+    while True:
+        while len(active) < concurrency:
+            conversation = next(pending, None)
+            if conversation is None:
+                break
+            active.append((eliza.new_session(), iter(conversation)))
+        if not active:
+            break
+        still_active = []
+        for session, turns in active:
+            text = next(turns, None)
+            if text is None:
+                continue
+            before = clock()
+            try:
+                eliza.get_response(text, session)
+            except Exception as e:
+                latencies.errors += 1
+                logger.info(f"Replayed turn failed: {e!r}", v=1)
+            latencies.add(keywords[text], clock() - before)
+            still_active.append((session, turns))
+        active = still_active
+    latencies.elapsed = clock() - start
+    return latencies
+
+
+async def replay_server(eliza: Eliza, plan: list[Conversation], concurrency: int = 1,
+                        host: Optional[str] = None, port: int = 0,
+                        unix_path: Optional[str] = None,
+                        latencies: Optional[ElizaLatencies] = None) -> ElizaLatencies:
+    """
+    Replay the sessions of `plan` against an `eliza serve` NDJSON
+    endpoint over `concurrency` connections. `eliza` (the same script)
+    only tells the selected keywords.
+    """
+    latencies = latencies or ElizaLatencies()
+    keywords = selected_keywords(eliza, plan)
+    queue = list(enumerate(plan))
+    queue.reverse()
+    clock = time.perf_counter
+
+    async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                      record: dict[str, Any]) -> dict[str, Any]:
+        writer.write(json.dumps(record).encode() + b"\n")
+        await writer.drain()
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        reply: dict[str, Any] = json.loads(line)
+        return reply
+
+    async def worker() -> None:
+        if unix_path:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while queue:
+                number, conversation = queue.pop()
+                session_id = f"replay-{number}"
+                for text in conversation:
+                    before = clock()
+                    reply = await request(reader, writer, {"session": session_id, "text": text})
+                    latencies.add(keywords[text], clock() - before)
+                    if "error" in reply:
+                        latencies.errors += 1
+                await request(reader, writer, {"session": session_id, "end": True})
+        finally:
+            writer.close()
+
+    start = clock()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(plan)) or 1)))
+    latencies.elapsed = clock() - start
+    return latencies
+
+
+def format_report(report: dict[str, Any], description: str) -> str:
+    lines = [f"{description}: {report['turns']} turns in {report['elapsed']:.3f} s, "
+             f"{report['throughput']:.1f} turns/s, {report['errors']} errors",
+             f"{'keyword':<16} {'count':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}"]
+    for keyword, summary in report["latency"].items():
+        if not summary["count"]:
+            continue
+        lines.append(f"{keyword:<16} {summary['count']:>7} " + " ".join(
+            f"{summary[name]:>8.3f}" for name in ("p50", "p90", "p99", "max")))
+    return "\n".join(lines)
+
+
+def run(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="eliza bench-replay")
+    parser.add_argument("--debug", type=int, default=0, help="verbosity level for logging")
+    parser.add_argument("--sessions", type=int, default=None,
+                        help="sessions to replay, picked at random (default: every conversation once)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="sessions in progress at the same time; in process they only "
+                             "take turns in one thread, which does not change the numbers")
+    parser.add_argument("--seed", type=int, default=0, help="seed for picking conversations")
+    parser.add_argument("--top", type=int, default=15, help="keywords to report latencies for")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--connect", type=str, default=None, metavar="HOST:PORT",
+                        help="replay against `eliza serve` on this TCP address")
+    target.add_argument("--unix", type=str, default=None, metavar="PATH",
+                        help="replay against `eliza serve` on this unix socket")
+    parser.add_argument("file_path", help="Path to ELIZA script")
+    parser.add_argument("transcripts", nargs="+", help="transcript files (.jsonl or text)")
+    args = parser.parse_args(argv)
+
+    setup_logger(args.debug)
+
+    conversations = load_transcripts(args.transcripts)
+    if not conversations:
+        parser.error("no conversations in the transcripts")
+    plan = plan_sessions(conversations, args.sessions, args.seed)
+    eliza = Eliza(script_path=args.file_path, precompile=True)
+    concurrency = max(1, args.concurrency)
+
+    if args.connect or args.unix:
+        host, port = None, 0
+        if args.connect:
+            host, _, port_text = args.connect.rpartition(":")
+            port = int(port_text)
+        latencies = asyncio.run(replay_server(eliza, plan, concurrency, host or None, port,
+                                              args.unix))
+        mode = f"server {args.connect or args.unix}"
+    else:
+        latencies = replay_in_process(eliza, plan, concurrency)
+        mode = "in-process"
+        if concurrency > 1:
+            mode += " (one thread: concurrency only interleaves sessions, no effect on throughput)"
+
+    report = latencies.report(args.top)
+    if args.json:
+        json.dump({"sessions": len(plan), "concurrency": concurrency, "seed": args.seed,
+                   "mode": mode, **report}, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print(format_report(report, f"{len(plan)} sessions, concurrency {concurrency}, {mode}"))
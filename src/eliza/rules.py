@@ -1,9 +1,10 @@
+import sys
 import regex as re
 import sexpdata # type: ignore
 from .utils import WORD
 from .exceptions import ElizaScriptError
 
-from typing import TYPE_CHECKING, List, cast
+from typing import TYPE_CHECKING, Any, List, Optional, Union, cast
 if TYPE_CHECKING:
     from .model import ElizaRule, ElizaContext, ElizaReassembly
 
@@ -21,43 +22,80 @@ def normalize_subrule(subrule: List[str], prefixes: str = "*/=") -> List[str]:
     return list(map(str, subrule))
 
 
-def drule_to_regex(self: "ElizaRule") -> str:
+# A parsed decomposition pattern item: a count (0 = any number of words),
+# a literal word, or ("*", alternatives) / ("/", category tag)
+PatternItem = Union[int, str, tuple[str, list[str]]]
+
+def drule_to_items(self: "ElizaRule") -> list[PatternItem]:
     """
     Method for ElizaRule:
-    Converts the decomposition pattern into regex.
-
-    Variable tokens:
-    - "0" matches any number of words (non-greedy), including empty
-    - "1" matches exactly one word
-    - "N" matches exactly N words
+    Parses the decomposition pattern into a list of items.
 
-    Literal tokens are treated case-insensitively and escaped.
-
-    :return: Regex pattern string
+    :return: List of ints, literal strings and ("*" | "/", [words]) tuples
     """
-    regex_parts = []
-
     # Parse the rule using sexpdata
     try:
         parsed_data = sexpdata.loads(f"({self.pattern})")
     except Exception as e:
         raise ValueError(f"Invalid S-expression in rule: {self.pattern!r}\n{e}")
 
+    return sexp_to_items(parsed_data, self.pattern)
+
+
+def sexp_to_items(parsed_data: list[Any], pattern: Optional[str]) -> list[PatternItem]:
+    """
+    Converts the parsed S-expression of a decomposition pattern into a
+    list of items (see drule_to_items), `pattern` is for error messages.
+    """
+    items: list[PatternItem] = []
+
     for entry in parsed_data:
         if isinstance(entry, list):
             subrule = normalize_subrule(entry)
 
             if len(subrule) > 2 and subrule[0] == "*":
-                options = [str(e) for e in subrule[1:]]
-                regex_parts.append(r"\b(" + "|".join(re.escape(opt) for opt in options) + r")\b")
+                items.append(("*", [str(e) for e in subrule[1:]]))
             elif len(subrule) == 2 and subrule[0] == "/":
-                tag = subrule[1]
+                items.append(("/", [subrule[1]]))
+            else:
+                raise ElizaScriptError(f"Invalid subrule syntax: {pattern!r}")
+
+        elif isinstance(entry, int):
+            items.append(entry)
+
+        else: # Symbol a.k.a. str
+            items.append(str(entry))
+
+    return items
+
+
+def drule_to_regex(self: "ElizaRule") -> str:
+    """
+    Method for ElizaRule:
+    Converts the decomposition pattern into regex.
+
+    Variable tokens:
+    - "0" matches any number of words (non-greedy), including empty
+    - "1" matches exactly one word
+    - "N" matches exactly N words
+
+    Literal tokens are treated case-insensitively and escaped.
+
+    :return: Regex pattern string
+    """
+    regex_parts = []
+
+    for entry in self.items:
+        if isinstance(entry, tuple):
+            kind, words = entry
+            if kind == "*":
+                options = words
+            else:
+                tag = words[0]
                 context = cast("ElizaContext", self.context) # self.context is not None!
                 options = context.categories.get(tag.upper()) or []
-                regex_parts.append(r"\b(" + "|".join(re.escape(opt) for opt in options) + r")\b")
-            else:
-                raise ElizaScriptError(f"Invalid subrule syntax: {self.pattern!r}")
-            
+            regex_parts.append(r"\b(" + "|".join(re.escape(opt) for opt in options) + r")\b")
+
         elif isinstance(entry, int):
             if entry == 0:
                 regex_parts.append(r"({}(?:\s+{})*?)?".format(WORD, WORD))
@@ -66,22 +104,96 @@ def drule_to_regex(self: "ElizaRule") -> str:
             else:
                 regex_parts.append(r"({}(?:\s+{}){{{}}})".format(WORD, WORD, entry-1))
             
-        else: # Symbol a.k.a. str
+        else: # Literal word
             regex_parts.append(r"\b(" + re.escape(entry) + r")\b")
 
     regex_pattern =  r"\s*".join(regex_parts) 
     return regex_pattern
 
 
-def rrule_to_template(self: "ElizaReassembly") -> tuple[str, list[int]]:
+# Top-level items of a decomposition pattern: a (sublist) or a token
+PATTERN_ITEM_RE = re.compile(r"\([^()]*\)|[^\s()]+")
+
+def drule_literals(self: "ElizaRule") -> frozenset[str]:
     """
-    Replaces positive numbers in the input string with '{}' and returns the modified string
-    along with a list of the numbers found.
-    
-    :param rrule: Input string containing positive numbers
-    :return: Tuple (modified string, list of found numbers)
+    Method for ElizaRule:
+    The literal words every match of the pattern must contain, casefolded.
+    Alternatives "(* ...)" and categories "(/...)" are not required words.
+
+    :return: Frozenset of words
+    """
+    literals = set()
+    for item in PATTERN_ITEM_RE.findall(self.pattern or ""):
+        if item[0] == "(" or item.isdigit():
+            continue
+        literals.add(sys.intern(item.replace("\\", "").casefold()))
+    return frozenset(literals)
+
+
+def drule_categories(self: "ElizaRule") -> frozenset[str]:
     """
-    numbers = re.findall(r'\b(\d+)\b', self.pattern)  # Find all whole positive numbers
-    formatted_string = re.sub(r'\b\d+\b', '{}', self.pattern)  # Replace numbers with '{}'
-    return formatted_string, [int(num) for num in numbers]
+    Method for ElizaRule:
+    The category tags "(/TAG)" the pattern refers to, uppercased.
 
+    :return: Frozenset of tags
+    """
+    tags: set[str] = set()
+    for item in PATTERN_ITEM_RE.findall(self.pattern or ""):
+        inner = item[1:-1].strip() if item[0] == "(" else ""
+        if inner.startswith("/"):
+            tags.update(tag.upper() for tag in inner[1:].split()[:1])
+    return frozenset(tags)
+
+
+# Whole numbers in a reassembly pattern, references to decomposition components
+COMPONENT_RE = re.compile(r'\b(\d+)\b')
+SPACES_RE = re.compile(r'\s+')
+
+def rrule_to_pieces(self: "ElizaReassembly", n_groups: int) -> tuple[Union[str, int], ...]:
+    """
+    Method for ElizaReassembly:
+    Splits the pattern into literal strings and the 0-based indices of
+    the components it refers to, for a decomposition with `n_groups`
+    components. Adjacent literals are merged. Numbers are components
+    from 1 to `n_groups`; "0" is literal text, as are braces.
+
+    :param n_groups: Number of components (capture groups) of the decomposition
+    :return: Tuple of str and int pieces
+    :raises ElizaScriptError: If a number refers to a component beyond `n_groups`
+    """
+    pattern = self.pattern or ""
+    pieces: list[Union[str, int]] = []
+    pos = 0
+    for match in COMPONENT_RE.finditer(pattern):
+        number = int(match.group(1))
+        if number == 0:
+            continue  # Stays in the literal text up to the next component
+        if number > n_groups:
+            raise ElizaScriptError(
+                f"Reassembly ({pattern}) refers to component {number}, "
+                f"beyond the {n_groups} of its decomposition")
+        if match.start() > pos:
+            pieces.append(sys.intern(pattern[pos:match.start()]))
+        pieces.append(number - 1)
+        pos = match.end()
+    if pos < len(pattern) or not pieces:
+        pieces.append(sys.intern(pattern[pos:]))
+    return tuple(pieces)
+
+
+def rrule_render(self: "ElizaReassembly", groups: tuple[Optional[str], ...]) -> str:
+    """
+    Method for ElizaReassembly:
+    The response for the capture `groups` of a decomposition match, each
+    selected capture with its whitespace runs collapsed to single spaces.
+    The pieces are compiled on first use and again if the number of
+    groups changes (the rule was replaced).
+    """
+    pieces = self._pieces if self._n_groups == len(groups) else self.pieces(len(groups))
+    if len(pieces) == 1 and isinstance(first := pieces[0], str):
+        return first
+    sub = SPACES_RE.sub
+    return "".join([
+        piece if isinstance(piece, str) else (sub(" ", group) if (group := groups[piece]) else "")
+        for piece in pieces
+    ])
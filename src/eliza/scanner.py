@@ -0,0 +1,82 @@
+# scanner.py
+import re as stdre
+import sys
+from typing import Iterator
+
+from .utils import SCAN_RE, SEPARATORS
+from .model import ElizaDictionary
+
+# token -> (interned key, rank, interned substitution)
+KeywordTable = dict[str, tuple[str, int, str]]
+
+
+def build_keyword_table(dictionary: ElizaDictionary) -> KeywordTable:
+    """
+    Precompute one lookup per input token: the keyword it selects,
+    its rank and the word it is replaced with in the reflected input.
+    Special keys (rank None) are not scanned for.
+    """
+    table: KeywordTable = {}
+    for key, entry in dictionary.items():
+        if entry.rank is None:
+            continue
+        key = sys.intern(key)
+        table[key] = (key, entry.rank, sys.intern(entry.alias or key))
+    return table
+
+
+def scan_clauses(text: str) -> Iterator[list[str]]:
+    """
+    Walk upper-cased `text` once and lazily yield the word tokens of each
+    non-blank clause. Equivalent to splitting with SPLIT_REGEX, dropping
+    blank parts and running WORD_RE.findall on each remaining part.
+    """
+    if FAST_TEXT_RE.fullmatch(text):
+        return scan_ascii_clauses(text)
+    return scan_unicode_clauses(text)
+
+
+# ASCII text where str.split() and regex \s agree on whitespace.
+# There WORD is plain [A-Z]+('[A-Z]+)* and the stdlib re is much faster.
+FAST_TEXT_RE = stdre.compile(r"[\x00-\x1b\x20-\x7f]*")
+ASCII_WORD_RE = stdre.compile(r"[A-Za-z]+(?:'[A-Za-z]+)*")
+
+
+def scan_ascii_clauses(text: str) -> Iterator[list[str]]:
+    # A separator run can only end a whitespace-delimited chunk,
+    # and not the last one unless whitespace follows it
+    tokens: list[str] = []
+    blank = True
+    chunks = text.split()
+    closed = len(chunks) if text[-1:].isspace() else len(chunks) - 1
+    for i, chunk in enumerate(chunks):
+        head = chunk.rstrip(SEPARATORS) if i < closed else chunk
+        if head:
+            blank = False
+            if head.isalpha():
+                tokens.append(head)
+            else:
+                tokens.extend(ASCII_WORD_RE.findall(head))
+        if len(head) < len(chunk) and not blank:
+            yield tokens
+            tokens = []
+            blank = True
+    if not blank:
+        yield tokens
+
+
+def scan_unicode_clauses(text: str) -> Iterator[list[str]]:
+    tokens: list[str] = []
+    start = 0
+    for match in SCAN_RE.finditer(text):
+        word = match.group(1)
+        if word is not None:
+            tokens.append(word)
+            continue
+        # Clause separator
+        if tokens or text[start:match.start()].strip():
+            yield tokens
+            tokens = []
+        start = match.end()
+    if tokens or text[start:].strip():
+        yield tokens
@@ -0,0 +1,313 @@
+# server.py
+import sys
+import base64
+import json
+import time
+import asyncio
+import argparse
+from collections import OrderedDict
+from typing import Any, Optional
+
+from .core import Eliza
+from .budget import add_budget_arguments, budget_from_args
+from .memory import add_memory_arguments, memory_policy_from_args
+from .exceptions import ElizaSnapshotError
+from .snapshot import dump_session
+from .metrics import ElizaMetrics
+from .model import ElizaSession
+from .utils import clean_response
+from .logger import logger, setup_logger
+
+HTTP_METHODS = (b"GET ", b"POST ", b"HEAD ", b"PUT ", b"DELETE ", b"OPTIONS ")
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+                405: "Method Not Allowed", 411: "Length Required", 413: "Payload Too Large"}
+MAX_LINE = 64 * 1024
+
+class ElizaServer:
+    """
+    Serve conversations for one loaded script over asyncio streams.
+
+    Every connection speaks either newline-delimited JSON or HTTP/1.1,
+    detected from its first line. NDJSON requests look like
+    `{"session": "abc", "text": "Hello"}` and get
+    `{"session": "abc", "response": "..."}` back, in request order, so
+    clients may pipeline; `{"op": "health"}` and `{"op": "metrics"}` are
+    answered too. `{"op": "snapshot", "session": "abc"}` returns the
+    session state as base64 "snapshot" and `{"op": "restore", "session":
+    "abc", "snapshot": "..."}` replaces the session with it, e.g. to move
+    conversations to another worker running the same script. HTTP offers `POST /respond` with the same JSON body,
+    `GET /health` and `GET /metrics`.
+    """
+    def __init__(self, eliza: Eliza, max_sessions: Optional[int] = None):
+        self.eliza = eliza
+        self.max_sessions = max_sessions
+        self.sessions: OrderedDict[str, ElizaSession] = OrderedDict()
+        self.started = time.monotonic()
+        self.connections = 0
+        self.requests = 0
+        self.errors = 0
+        self.evicted_sessions = 0
+
+    def get_session(self, session_id: str) -> ElizaSession:
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = self.eliza.new_session()
+            if self.max_sessions and len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)  # Least recently used
+                self.evicted_sessions += 1
+        else:
+            self.sessions.move_to_end(session_id)
+        return session
+
+    def metrics(self) -> dict[str, Any]:
+        metrics = {
+            "uptime": round(time.monotonic() - self.started, 3),
+            "connections": self.connections,
+            "sessions": len(self.sessions),
+            "evicted_sessions": self.evicted_sessions,
+            "script_reloads": self.eliza.stats["reloads"],
+            "requests": self.requests,
+            "errors": self.errors,
+        }
+        if self.eliza.match_cache is not None:
+            metrics["match_cache"] = self.eliza.match_cache.stats()
+        metrics["memory"] = self.eliza.memory_stats(self.sessions.values())
+        return metrics
+
+    def handle_request(self, request: Any) -> dict[str, Any]:
+        """Answer one decoded JSON request."""
+        self.requests += 1
+        if not isinstance(request, dict):
+            self.errors += 1
+            return {"error": "request must be a JSON object"}
+
+        reply: dict[str, Any] = {}
+        if "id" in request:
+            reply["id"] = request["id"]
+
+        op = request.get("op")
+        if op == "health":
+            reply["status"] = "ok"
+            return reply
+        if op == "metrics":
+            reply.update(self.metrics())
+            return reply
+
+        session_id = str(request.get("session", ""))
+        reply["session"] = session_id
+        if op == "snapshot":
+            session = self.sessions.get(session_id) or self.eliza.new_session()
+            snapshot = dump_session(session, self.eliza.fingerprint)
+            reply["snapshot"] = base64.b64encode(snapshot).decode("ascii")
+            return reply
+        if op == "restore":
+            try:
+                data = base64.b64decode(request.get("snapshot", ""), validate=True)
+                session = self.eliza.restore_session(data)
+            except (ValueError, TypeError, ElizaSnapshotError) as e:
+                self.errors += 1
+                reply["error"] = f"cannot restore: {e}"
+                return reply
+            self.get_session(session_id)  # Counts against max_sessions
+            self.sessions[session_id] = session
+            reply["restored"] = True
+            return reply
+        if request.get("end"):
+            self.sessions.pop(session_id, None)
+            reply["ended"] = True
+            return reply
+
+        text = request.get("text")
+        if not isinstance(text, str):
+            self.errors += 1
+            reply["error"] = "missing 'text'"
+            return reply
+
+        try:
+            response = self.eliza.get_response(text, self.get_session(session_id))
+        except Exception as e:
+            self.errors += 1
+            logger.info(f"Request failed: {e!r}")
+            reply["error"] = str(e)
+        else:
+            reply["response"] = clean_response(response)
+        return reply
+
+    def handle_line(self, line: bytes) -> bytes:
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            self.requests += 1
+            self.errors += 1
+            reply: dict[str, Any] = {"error": f"invalid JSON: {e}"}
+        else:
+            reply = self.handle_request(request)
+        return json.dumps(reply).encode() + b"\n"
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            first = await reader.readline()
+            if first.startswith(HTTP_METHODS):
+                await self.serve_http(first, reader, writer)
+            else:
+                await self.serve_ndjson(first, reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # Client went away or sent garbage (e.g. overlong line)
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def serve_ndjson(self, line: bytes, reader: asyncio.StreamReader,
+                           writer: asyncio.StreamWriter) -> None:
+        while line:
+            if line.strip():
+                writer.write(self.handle_line(line))
+            # Replies queue up in order, drain only blocks on a full buffer
+            await writer.drain()
+            line = await reader.readline()
+
+    async def serve_http(self, line: bytes, reader: asyncio.StreamReader,
+                         writer: asyncio.StreamWriter) -> None:
+        while line:
+            try:
+                method, path, version = line.decode("latin-1").split()
+            except ValueError:
+                self.write_http(writer, 400, {"error": "bad request line"}, False)
+                break
+
+            headers = {}
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = header.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            keep_alive = (headers.get("connection", "").lower() != "close"
+                          and version == "HTTP/1.1")
+            if "transfer-encoding" in headers:
+                # Bodies are only read by Content-Length: the chunks would
+                # be taken for the next request
+                self.write_http(writer, 411, {"error": "send a Content-Length, "
+                                                       "Transfer-Encoding is not supported"}, False)
+                break
+            try:
+                length = int(headers.get("content-length", "0") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                # No telling where the body ends, so no keeping the connection
+                self.write_http(writer, 400, {"error": "bad Content-Length"}, False)
+                break
+            if length > MAX_LINE:
+                self.write_http(writer, 413, {"error": "body too large"}, False)
+                break
+            body = await reader.readexactly(length) if length else b""
+
+            path = path.split("?", 1)[0]
+            if path == "/health":
+                status, reply = 200, {"status": "ok"}
+            elif path == "/metrics":
+                status, reply = 200, self.metrics()
+            elif path == "/respond":
+                if method != "POST":
+                    status, reply = 405, {"error": "use POST"}
+                else:
+                    try:
+                        request = json.loads(body)
+                    except ValueError as e:
+                        self.requests += 1
+                        self.errors += 1
+                        status, reply = 400, {"error": f"invalid JSON: {e}"}
+                    else:
+                        reply = self.handle_request(request)
+                        status = 400 if "error" in reply else 200
+            else:
+                status, reply = 404, {"error": f"no route {path}"}
+
+            self.write_http(writer, status, reply, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+            line = await reader.readline()
+        await writer.drain()
+
+    @staticmethod
+    def write_http(writer: asyncio.StreamWriter, status: int,
+                   reply: dict[str, Any], keep_alive: bool) -> None:
+        body = json.dumps(reply).encode()
+        head = (f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+
+    async def start(self, host: Optional[str] = None, port: int = 0,
+                    unix_path: Optional[str] = None) -> asyncio.Server:
+        if unix_path:
+            return await asyncio.start_unix_server(self.handle_connection,
+                                                   path=unix_path, limit=MAX_LINE)
+        return await asyncio.start_server(self.handle_connection,
+                                          host=host, port=port, limit=MAX_LINE)
+
+
+async def serve(eliza: Eliza, host: Optional[str], port: int,
+                unix_path: Optional[str], max_sessions: Optional[int]) -> None:
+    server = await ElizaServer(eliza, max_sessions).start(host, port, unix_path)
+    for sock in server.sockets:
+        logger.info(f"Serving on {sock.getsockname()}")
+    async with server:
+        await server.serve_forever()
+
+
+def run(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="eliza serve")
+    parser.add_argument("--debug", type=int, default=0, help="verbosity level for logging")
+    parser.add_argument("--cache-dir", type=str, default=None,
+                        help="directory for compiled script cache")
+    add_budget_arguments(parser)
+    add_memory_arguments(parser)
+    parser.add_argument("--precompile", nargs="?", const="eager", default=None,
+                        choices=["eager", "background"],
+                        help="compile all patterns at load time, optionally in a background thread")
+    parser.add_argument("--metrics-file", type=str, default=None,
+                        help="write keyword/rule metrics here on exit (.prom: Prometheus, else JSON)")
+    parser.add_argument("--match-cache", type=int, default=0, metavar="SIZE",
+                        help="cache this many decomposition matches (LRU), 0 disables")
+    parser.add_argument("--combined-match", action="store_true",
+                        help="match the rules of an entry with one combined regex (regex engine)")
+    parser.add_argument("--watch", type=float, nargs="?", const=1.0, default=None,
+                        metavar="SECONDS",
+                        help="reload the script when its file changes, checking every SECONDS (1)")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="TCP port to listen on")
+    parser.add_argument("--unix", type=str, default=None,
+                        help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--max-sessions", type=int, default=None,
+                        help="drop least recently used sessions beyond this")
+    parser.add_argument("file_path", help="Path to ELIZA script")
+    args = parser.parse_args(argv)
+
+    setup_logger(args.debug)
+
+    precompile = {"eager": True, "background": "background"}.get(args.precompile, False)
+    eliza = Eliza(script_path=args.file_path, cache_dir=args.cache_dir,
+                  budget=budget_from_args(args), match_cache_size=args.match_cache,
+                  combined_match=args.combined_match,
+                  memory_policy=memory_policy_from_args(args),
+                  precompile=precompile)
+    logger.info(f"Created Eliza object with {len(eliza.dictionary)} dictionary entries.")
+    if args.watch:
+        eliza.watch(interval=args.watch)
+    metrics = ElizaMetrics() if args.metrics_file else None
+    if metrics:
+        metrics.start()
+    try:
+        asyncio.run(serve(eliza, args.host, args.port, args.unix, args.max_sessions))
+    except KeyboardInterrupt:
+        sys.exit(0)
+    finally:
+        if metrics:
+            metrics.export(args.metrics_file)
@@ -0,0 +1,163 @@
+# snapshot.py
+"""
+Snapshots of conversation state (ElizaSession) for checkpointing,
+migrating sessions between processes and resuming them after a restart.
+
+A snapshot holds the memory queue and the reassembly cycle positions,
+plus the fingerprint of the script they belong to: cycle positions are
+only meaningful for the same reassembly lists, so restoring a snapshot
+taken on a different script is refused.
+
+Binary layout (little-endian):
+    magic b"ELZS", format u8, fingerprint 16 bytes,
+    n_cycles u32, cycles u16 * n_cycles,
+    n_memory u32, (length u32, UTF-8 text) * n_memory
+JSON: {"format", "fingerprint" (hex), "cycles", "memory"}
+"""
+import sys
+import json
+import struct
+import hashlib
+from array import array
+from typing import Optional, Union
+
+from .exceptions import ElizaSnapshotError
+from .model import ElizaDictionary, ElizaSession
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .core import Eliza
+
+MAGIC = b"ELZS"
+SNAPSHOT_FORMAT = 1
+HEADER = struct.Struct("<4sB16sI")
+COUNT = struct.Struct("<I")
+
+
+def script_fingerprint(dictionary: ElizaDictionary) -> bytes:
+    """
+    16-byte digest of everything session state refers to: every
+    reassembly list with its cycle slot and its reassemblies.
+    """
+    digest = hashlib.sha256(b"eliza session state\0")
+    for key, entry in dictionary.items():
+        for ruleset in (entry.response_rules, entry.memory_rules):
+            for rule in ruleset:
+                reassemblies = rule.reassembly_list
+                if reassemblies:
+                    digest.update(f"{key}\0{rule.pattern}\0{reassemblies.slot}\0".encode())
+                    for reassembly in reassemblies:
+                        digest.update(f"{reassembly.pattern}\0{reassembly.redirection}\0".encode())
+    return digest.digest()[:16]
+
+
+def dump_session(session: ElizaSession, fingerprint: bytes) -> bytes:
+    """Binary snapshot of `session`."""
+    cycles = array("H", session.cycles)
+    if sys.byteorder == "big":
+        cycles.byteswap()
+    parts = [HEADER.pack(MAGIC, SNAPSHOT_FORMAT, fingerprint, len(cycles)),
+             cycles.tobytes(), COUNT.pack(len(session.memory_queue))]
+    for text in session.memory_queue:
+        data = text.encode("utf-8")
+        parts.append(COUNT.pack(len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def load_session(data: bytes, fingerprint: bytes, n_cycles: int) -> ElizaSession:
+    """Session from a binary snapshot taken on the script with `fingerprint`."""
+    try:
+        magic, version, snapshot_fingerprint, n_saved = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != SNAPSHOT_FORMAT:
+            raise ElizaSnapshotError("not a session snapshot of this format")
+        if snapshot_fingerprint != fingerprint:
+            raise ElizaSnapshotError("snapshot was taken on a different script")
+        offset = HEADER.size
+        if offset + 2 * n_saved > len(data):
+            raise ElizaSnapshotError("truncated snapshot")
+        cycles = array("H")
+        cycles.frombytes(data[offset:offset + 2 * n_saved])
+        if sys.byteorder == "big":
+            cycles.byteswap()
+        offset += 2 * n_saved
+        (n_memory,) = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        memory = []
+        for _ in range(n_memory):
+            (length,) = COUNT.unpack_from(data, offset)
+            offset += COUNT.size
+            if offset + length > len(data):
+                raise ElizaSnapshotError("truncated snapshot")
+            memory.append(data[offset:offset + length].decode("utf-8"))
+            offset += length
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ElizaSnapshotError(f"malformed snapshot: {e}") from e
+    if offset != len(data):
+        raise ElizaSnapshotError("trailing data after snapshot")
+    return make_session(n_cycles, cycles, memory)
+
+
+def session_to_json(session: ElizaSession, fingerprint: bytes) -> str:
+    """JSON snapshot of `session`."""
+    return json.dumps({
+        "format": SNAPSHOT_FORMAT,
+        "fingerprint": fingerprint.hex(),
+        "cycles": session.cycles.tolist(),
+        "memory": list(session.memory_queue),
+    })
+
+
+def session_from_json(text: str, fingerprint: bytes, n_cycles: int) -> ElizaSession:
+    """Session from a JSON snapshot taken on the script with `fingerprint`."""
+    try:
+        state = json.loads(text)
+        if state["format"] != SNAPSHOT_FORMAT:
+            raise ElizaSnapshotError("not a session snapshot of this format")
+        if state["fingerprint"] != fingerprint.hex():
+            raise ElizaSnapshotError("snapshot was taken on a different script")
+        cycles = array("H", state["cycles"])
+        memory = state["memory"]
+        if not all(isinstance(text, str) for text in memory):
+            raise ElizaSnapshotError("memory must be a list of strings")
+    except (ValueError, TypeError, KeyError, OverflowError) as e:
+        raise ElizaSnapshotError(f"malformed snapshot: {e!r}") from e
+    return make_session(n_cycles, cycles, memory)
+
+
+def make_session(n_cycles: int, cycles: "array[int]", memory: list[str]) -> ElizaSession:
+    if len(cycles) > n_cycles:
+        raise ElizaSnapshotError("snapshot has more cycles than the script")
+    session = ElizaSession(n_cycles)
+    session.cycles[:len(cycles)] = cycles
+    if memory:
+        session.memory_queue.extend(memory)
+    return session
+
+
+def save_session_logic(self: "Eliza", session: Optional[ElizaSession] = None,
+                       format: str = "binary") -> Union[bytes, str]:
+    """
+    Method for Eliza:
+    Snapshot `session` (default: self.session) as bytes, or as a JSON
+    string with format="json".
+    """
+    if session is None:
+        session = self.session
+    if format == "binary":
+        return dump_session(session, self.fingerprint)
+    if format == "json":
+        return session_to_json(session, self.fingerprint)
+    raise ValueError(f"Unknown snapshot format {format!r}, expected binary or json")
+
+
+def restore_session_logic(self: "Eliza", data: Union[bytes, str]) -> ElizaSession:
+    """
+    Method for Eliza:
+    New session from a snapshot taken by save_session (either format)
+    on the same script. Raise ElizaSnapshotError otherwise.
+    """
+    n_cycles = self.context.n_cycles
+    if isinstance(data, str):
+        return session_from_json(data, self.fingerprint, n_cycles)
+    return load_session(data, self.fingerprint, n_cycles)
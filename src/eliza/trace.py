@@ -0,0 +1,103 @@
+# trace.py
+"""
+Structured tracing of the response hot path.
+
+The logic emits events only behind a check of `tracer.enabled`:
+
+    if tracer.enabled:
+        tracer.emit("keyword", key=key)
+
+so a disabled tracer costs one attribute lookup per event site, without
+formatting anything or going through the logging machinery.
+setup_logger(verbosity > 0) subscribes log_event, which prints the
+events as the --debug log lines.
+
+Listeners see every rule attempt by default: `tracer.every_rule` is set
+and the match cache and the combined matcher, which skip the per-rule
+steps, are bypassed. Listeners subscribed with every_rule=False (e.g.
+ElizaMetrics) leave them on and get rule_matched events with
+reused=True for matches taken from the batch table or the match cache.
+"""
+from typing import Any, Callable
+
+from .logger import logger
+
+# Events and their fields:
+#   input:                  reflected_input, keystack (list of (key, rank))
+#   keyword:                key
+#   rule_tried:             key, memory, pattern
+#   rule_prefiltered:       key, memory, pattern (skipped without matching)
+#   rule_matched:           key, memory, pattern, groups, reused (precomputed or cached match)
+#   rule_redirection:       key, target
+#   reassembly:             pattern
+#   reassembly_redirection: target
+#   memory_popped:          text
+#   budget_exceeded:        error
+#   response:               text
+TraceListener = Callable[[str, dict[str, Any]], None]
+
+
+class Tracer:
+    """
+    Dispatch trace events to listeners, enabled while there are any;
+    every_rule while any of them needs every rule attempt.
+    """
+    __slots__ = ("enabled", "every_rule", "listeners", "_every_rule_listeners")
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.every_rule = False
+        self.listeners: list[TraceListener] = []
+        self._every_rule_listeners: list[TraceListener] = []
+
+    def subscribe(self, listener: TraceListener, every_rule: bool = True) -> None:
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+        if every_rule and listener not in self._every_rule_listeners:
+            self._every_rule_listeners.append(listener)
+        self.enabled = True
+        self.every_rule = bool(self._every_rule_listeners)
+
+    def unsubscribe(self, listener: TraceListener) -> None:
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+        if listener in self._every_rule_listeners:
+            self._every_rule_listeners.remove(listener)
+        self.enabled = bool(self.listeners)
+        self.every_rule = bool(self._every_rule_listeners)
+
+    def emit(self, event: str, **fields: Any) -> None:
+        for listener in self.listeners:
+            listener(event, fields)
+
+
+def format_event(event: str, fields: dict[str, Any]) -> list[str]:
+    """The --debug log lines for an event, possibly none."""
+    if event == "input":
+        return [f"reflected_input: {fields['reflected_input']}",
+                "keystack: " + ", ".join(f"{key} ({rank})" for key, rank in fields["keystack"])]
+    if event == "keyword":
+        return [f" key: {fields['key']}"]
+    if event == "rule_tried":
+        return [f"  rule.pattern: {fields['pattern']}"]
+    if event == "rule_redirection":
+        return [f"  rule.redirection: {fields['target']}"]
+    if event == "reassembly":
+        return [f"   reassembly.pattern: {fields['pattern']}"]
+    if event == "reassembly_redirection":
+        return [f"   reassembly.redirection: {fields['target']}"]
+    if event == "memory_popped":
+        return [f"memory_queue.popleft: {fields['text']}"]
+    if event == "budget_exceeded":
+        return [f"budget exceeded: {fields['error']}"]
+    return []
+
+
+def log_event(event: str, fields: dict[str, Any]) -> None:
+    """Listener writing events to the eliza logger, one record per line."""
+    for line in format_event(event, fields):
+        logger.info(line)
+
+
+# Process-wide tracer used by the response logic
+tracer = Tracer()
@@ -24,7 +24,11 @@ WORD_RE = re.compile(WORD)
 # Sentence splitter for "end of thought" splitting
 # Does not remove punctuation at the very end of a sentence.
 # That is done by the tokenizer afterwards.
-SPLIT_REGEX = re.compile(r"[.?!,:;]+(?=\s)")
+SEPARATORS = ".?!,:;"
+SPLIT_REGEX = re.compile(fr"[{SEPARATORS}]+(?=\s)")
+
+# Single-pass scanner: a word (group 1) or a SPLIT_REGEX separator
+SCAN_RE = re.compile(fr"({WORD})|[{SEPARATORS}]+(?=\s)")
 
 #REDIR_RE = re.compile(r'^=\s*(\S+)\s*$')
 REDIR_RE = re.compile(fr'^=\s*({WORD})\s*$')
@@ -66,11 +70,24 @@ T = TypeVar("T")
 
 def autogen_repr(cls: Type[T]) -> Type[T]:
     def __repr__(self: Any) -> str:
-        attrs = ', '.join(f"{k}={v!r}" for k, v in self.__dict__.items())
+        attrs = ', '.join(f"{k}={v!r}" for k, v in instance_fields(self).items())
         return f"{self.__class__.__name__}({attrs})"
     cls.__repr__ = __repr__  # type: ignore[method-assign]
     return cls
 
+def instance_fields(obj: Any) -> dict[str, Any]:
+    """Attributes of `obj` from its __dict__ or, for slotted classes, its set slots."""
+    if hasattr(obj, "__dict__"):
+        attributes: dict[str, Any] = obj.__dict__
+        return attributes
+    fields = {}
+    for klass in reversed(type(obj).__mro__):
+        slots = klass.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if hasattr(obj, name):
+                fields[name] = getattr(obj, name)
+    return fields
+
 def fmt(obj: Any) -> str: return str(obj) or "None"
 
 def clean_response(response: str) -> str:
@@ -1,19 +1,36 @@
 import pytest
 from eliza.model import ElizaReassembly
 
-@pytest.mark.parametrize("rrule, expected_fmt, expected_nums", [
-    ("WHAT MAKES YOU THINK I 3", "WHAT MAKES YOU THINK I {}", [3]),
-    ("DO YOU BELIEVE YOU ARE 4", "DO YOU BELIEVE YOU ARE {}", [4]),
-    ("WHAT 4", "WHAT {}", [4]),
-    ("DO YOU THINK IT IS LIKELY THAT 3", "DO YOU THINK IT IS LIKELY THAT {}", [3]),
-    ("SUPPOSE YOU GOT 0 NOW", "SUPPOSE YOU GOT {} NOW", [0]),
-    ("NO NUMBERS HERE", "NO NUMBERS HERE", []),
-    ("1 2 3 4", "{} {} {} {}", [1, 2, 3, 4]),
-    ("MIXED 3 with 2 and 7 again 3", "MIXED {} with {} and {} again {}", [3, 2, 7, 3]),
+@pytest.mark.parametrize("rrule, n_groups, expected", [
+    ("WHAT MAKES YOU THINK I 3", 3, ("WHAT MAKES YOU THINK I ", 2)),
+    ("DO YOU BELIEVE YOU ARE 4", 4, ("DO YOU BELIEVE YOU ARE ", 3)),
+    ("1 2 3 4", 4, (0, " ", 1, " ", 2, " ", 3)),
+    ("MIXED 3 with 2 and 7 again 3", 7, ("MIXED ", 2, " with ", 1, " and ", 6, " again ", 2)),
+    ("1 2", 2, (0, " ", 1)),
+    ("NO NUMBERS HERE", 0, ("NO NUMBERS HERE",)),
+    ("SUPPOSE YOU GOT 0 NOW", 1, ("SUPPOSE YOU GOT 0 NOW",)),
+    ("{1} COSTS 0 OR 2", 2, ("{", 0, "} COSTS 0 OR ", 1)),
+    ("", 1, ("",)),
 ])
 @pytest.mark.smoke
-def test_rrule_to_template(rrule, expected_fmt, expected_nums):
-    reassembly_obj = ElizaReassembly(rrule)
-    result_fmt, result_nums = reassembly_obj.to_template()
-    assert result_fmt == expected_fmt
-    assert result_nums == expected_nums
+def test_rrule_to_pieces(rrule, n_groups, expected):
+    assert ElizaReassembly(rrule).to_pieces(n_groups) == expected
+
+@pytest.mark.smoke
+def test_rrule_to_pieces_beyond_groups():
+    from eliza.exceptions import ElizaScriptError
+    with pytest.raises(ElizaScriptError, match="component 5"):
+        ElizaReassembly("HI 5").to_pieces(3)
+
+@pytest.mark.parametrize("rrule, groups, expected", [
+    ("WHY DO YOU SAY 2", ("", "I  AM\tSAD"), "WHY DO YOU SAY I AM SAD"),
+    ("1 AND 1", ("YOU", None), "YOU AND YOU"),
+    ("EMPTY 2 HERE", ("X", None), "EMPTY  HERE"),
+    ("{} 0 LITERAL", ("X",), "{} 0 LITERAL"),
+])
+@pytest.mark.smoke
+def test_rrule_render(rrule, groups, expected):
+    reassembly = ElizaReassembly(rrule)
+    assert reassembly.render(groups) == expected
+    # Recompiled when the number of groups changes
+    assert reassembly.render(groups + ("",)) == expected
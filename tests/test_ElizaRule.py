@@ -71,3 +71,33 @@ def test_drule_capture_groups(rule, text, expected_groups):
     match = regex.fullmatch(text)
     assert match, f"Pattern did not match: {pattern}"
     assert list(match.groups()) == expected_groups
+
+@pytest.mark.parametrize("rule,expected_literals", [
+    ("0 YOU REMEMBER 0", {"you", "remember"}),
+    ("0 YOU (* WANT NEED) 0", {"you"}),
+    ("0 YOUR 0 (/FAMILY) 0", {"your"}),
+    ("0 YOU DON\\'T 0", {"you", "don't"}),
+    ("0", set()),
+    ("2 YOU WANT", {"you", "want"}),
+])
+@pytest.mark.smoke
+def test_drule_literals(rule, expected_literals):
+    assert ElizaRule(pattern=rule).literals == expected_literals
+
+@pytest.mark.smoke
+def test_rule_slots_and_interning():
+    import pickle
+    from eliza.model import ElizaReassembly, ElizaReassemblyList
+    rule = ElizaRule(pattern="0 YOUR " + "0",
+                     reassembly_list=ElizaReassemblyList([ElizaReassembly("WHY " + "2")]))
+    assert not hasattr(rule, "__dict__")
+    assert rule.pattern is ElizaRule(pattern="0 YOUR 0").pattern
+    assert repr(rule).startswith("ElizaRule(pattern='0 YOUR 0', redirection=None, "
+                                 "reassembly_list=[ElizaReassembly(pattern='WHY 2'")
+
+    rule.regex  # Compiled patterns are not pickled
+    copy = pickle.loads(pickle.dumps(rule))
+    assert copy.pattern is rule.pattern
+    assert copy.reassembly_list[0].pattern is rule.reassembly_list[0].pattern
+    assert repr(copy) == repr(rule).replace(f"_compiled_regex={rule.regex!r}",
+                                            "_compiled_regex=None")
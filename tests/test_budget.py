@@ -0,0 +1,130 @@
+import time
+import pytest
+from eliza.core import Eliza
+from eliza.budget import ElizaBudget
+from eliza.utils import clean_response
+
+# (0 A 0 A ... 0 B) against many A's and no final B backtracks for seconds
+eliza_script_backtracking = """
+(A 5
+((0 A 0 A 0 A 0 A 0 A 0 B)
+(GOT IT)))
+
+(NONE
+((0)
+(PLEASE GO ON)))
+
+(MY MEMORY
+((0 YOUR 0)
+(LETS DISCUSS FURTHER WHY YOUR 3)))
+
+(MY = YOUR 2
+((0 YOUR 0)
+(YOUR 3)))
+"""
+
+eliza_script_redirections = """
+(ONE
+((0)
+(=TWO)))
+
+(TWO
+((0)
+(=THREE)))
+
+(THREE
+((0)
+(THREE)))
+
+(NONE
+((0)
+(PLEASE GO ON)))
+"""
+
+ADVERSARIAL = "B " + " ".join(["A"] * 1000)
+
+@pytest.mark.smoke
+def test_budget_timeout_falls_back_to_none():
+    eliza = Eliza(script_data=eliza_script_backtracking,
+                  budget=ElizaBudget(timeout=0.05))
+    start = time.perf_counter()
+    assert clean_response(eliza.get_response(ADVERSARIAL)) == "PLEASE GO ON"
+    assert time.perf_counter() - start < 1
+    assert eliza.stats["budget_exceeded"] == 1
+
+@pytest.mark.smoke
+def test_budget_timeout_falls_back_to_memory():
+    eliza = Eliza(script_data=eliza_script_backtracking,
+                  budget=ElizaBudget(timeout=0.05))
+    assert clean_response(eliza.get_response("MY DOG IS SICK")) == "YOUR DOG IS SICK"
+    assert clean_response(eliza.get_response(ADVERSARIAL)) == "LETS DISCUSS FURTHER WHY YOUR DOG IS SICK"
+
+@pytest.mark.smoke
+def test_budget_timeout_batch():
+    eliza = Eliza(script_data=eliza_script_backtracking,
+                  budget=ElizaBudget(timeout=0.05))
+    responses = eliza.get_responses([(None, ADVERSARIAL), (None, "A A A A A B")])
+    assert [clean_response(r) for r in responses] == ["PLEASE GO ON", "GOT IT"]
+
+@pytest.mark.parametrize("max_redirections, expected_response", [
+    (None, "THREE"),
+    (2, "THREE"),
+    (1, "PLEASE GO ON"),
+    (0, "PLEASE GO ON"),
+])
+@pytest.mark.smoke
+def test_budget_redirections(max_redirections, expected_response):
+    eliza = Eliza(script_data=eliza_script_redirections,
+                  budget=ElizaBudget(max_redirections=max_redirections))
+    assert clean_response(eliza.get_response("ONE")) == expected_response
+
+@pytest.mark.smoke
+def test_budget_max_input_length():
+    eliza = Eliza(script_data=eliza_script_redirections,
+                  budget=ElizaBudget(max_input_length=11))
+    assert clean_response(eliza.get_response("HELLO ... THREE")) == "PLEASE GO ON"
+    assert clean_response(eliza.get_response("HELLO THREE")) == "THREE"
+
+eliza_script_chain = """
+(ONE (=TWO))
+(TWO ((0) (=THREE)))
+(THREE (=FOUR))
+(FOUR ((0) (FOUR)))
+(NONE ((0) (PLEASE GO ON)))
+"""
+
+@pytest.mark.parametrize("max_redirections, expected_response", [
+    (None, "FOUR"), (3, "FOUR"), (2, "PLEASE GO ON"), (1, "PLEASE GO ON"), (0, "PLEASE GO ON"),
+])
+@pytest.mark.smoke
+def test_budget_redirections_precomputed(max_redirections, expected_response):
+    # Rule-level hops of batch and cached matches count against the request
+    def eliza(**kwargs):
+        return Eliza(script_data=eliza_script_chain,
+                     budget=ElizaBudget(max_redirections=max_redirections), **kwargs)
+    assert clean_response(eliza().get_response("ONE")) == expected_response
+    assert [clean_response(r) for r in eliza().get_responses([(None, "ONE")] * 2)] == [
+        expected_response] * 2
+    cached = eliza(match_cache_size=16)
+    assert [clean_response(cached.get_response("ONE")) for _ in range(2)] == [
+        expected_response] * 2
+    assert cached.match_cache.hits
+
+# Ten rules, each backtracking about a tenth of a second over ADVERSARIAL_SHORT
+eliza_script_slow_rules = "(A 5 " + "((0 A 0 A 0 A 0 B) (GOT IT)) " * 10 + """((0) (FALLBACK)))
+(NONE ((0) (PLEASE GO ON)))
+"""
+ADVERSARIAL_SHORT = "B " + " ".join(["A"] * 400)
+
+@pytest.mark.smoke
+def test_budget_timeout_batch_spans_rules():
+    # Every rule fits in the timeout, all of them together do not
+    budget = ElizaBudget(timeout=0.25)
+    expected = Eliza(script_data=eliza_script_slow_rules, budget=budget).get_response(
+        ADVERSARIAL_SHORT)
+    eliza = Eliza(script_data=eliza_script_slow_rules, budget=budget)
+    start = time.perf_counter()
+    responses = eliza.get_responses([(None, ADVERSARIAL_SHORT), (None, "A A A B")])
+    elapsed = time.perf_counter() - start
+    assert responses == [expected, "GOT IT"]
+    assert elapsed < 0.9  # The deadline and the sequential retry, not ten rules' worth
@@ -0,0 +1,35 @@
+import pytest
+from eliza import cache
+from eliza.core import Eliza
+
+SCRIPT = "scripts/original.eliza"
+
+@pytest.mark.smoke
+def test_cache_roundtrip(tmp_path, monkeypatch):
+    first = Eliza(script_path=SCRIPT, cache_dir=str(tmp_path))
+    assert len(list(tmp_path.glob("*.pickle"))) == 1
+
+    # A cache hit must not parse the script at all
+    def no_parse(*args, **kwargs):
+        raise AssertionError("script was parsed")
+    monkeypatch.setattr(cache, "parse_eliza_data", no_parse)
+
+    second = Eliza(script_path=SCRIPT, cache_dir=str(tmp_path))
+    assert str(second) == str(first)
+    assert second.context.categories is second.categories
+    for text in ["I remember my mother", "My family hates me", "xyz"]:
+        assert second.get_response(text) == first.get_response(text)
+
+@pytest.mark.smoke
+def test_cache_stale_entry(tmp_path):
+    script = tmp_path / "test.eliza"
+    script.write_text("(HELLO ((0)(HI)))")
+    assert Eliza(script_path=str(script), cache_dir=str(tmp_path)).get_response("HELLO") == "HI"
+
+    script.write_text("(HELLO ((0)(HOWDY)))")
+    assert Eliza(script_path=str(script), cache_dir=str(tmp_path)).get_response("HELLO") == "HOWDY"
+
+    # Corrupt entries fall back to a full parse
+    for path in tmp_path.glob("*.pickle"):
+        path.write_bytes(b"garbage")
+    assert Eliza(script_path=str(script), cache_dir=str(tmp_path)).get_response("HELLO") == "HOWDY"
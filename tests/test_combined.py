@@ -0,0 +1,82 @@
+import pytest
+from eliza.core import Eliza
+from eliza.combined import ElizaCombinedMatcher, build_combined_matcher
+from eliza.exceptions import ElizaScriptError
+from eliza.logic import input_words
+from eliza.trace import tracer
+
+UTTERANCES = ["Yes", "No", "I don't know", "My mother hates me", "I remember my dog",
+              "You are sad", "I want a new car", "I am unhappy", "I was tired",
+              "You are not very aggressive but I think you don't want me to notice that",
+              "xyz", "Everybody hates me", "I feel that you can't help me"]
+
+@pytest.mark.parametrize("script", ["original", "nano", "minimal"])
+@pytest.mark.smoke
+def test_combined_responses_identical(script):
+    plain = Eliza(script_path=f"scripts/{script}.eliza")
+    combined = Eliza(script_path=f"scripts/{script}.eliza", combined_match=True)
+    expected = [plain.get_response(text) for text in UTTERANCES * 2]
+    assert [combined.get_response(text) for text in UTTERANCES * 2] == expected
+    assert combined.stats["prefilter_skips"] == plain.stats["prefilter_skips"]
+    session = combined.new_session()
+    assert combined.get_responses([(session, text) for text in UTTERANCES * 2]) == expected
+
+@pytest.mark.smoke
+def test_first_rule_in_script_order():
+    eliza = Eliza(script_data="""
+    (I ((0 I 0 SAD 0) (SAD 5)) ((0 I 0) (ANY 3)) ((0 I SAD) (NEVER)))
+    (NONE ((0) (GO ON)))
+    """, combined_match=True)
+    rules = eliza.dictionary["I"].response_rules
+    matcher = eliza.combined_matcher("I", False, rules)
+    assert isinstance(matcher, ElizaCombinedMatcher)
+    text = "WELL I AM SAD"
+    (rule, groups), skipped = matcher.match(text, input_words(text))
+    assert rule is rules[0] and groups == ("WELL", "I", "AM", "SAD", None)
+    text = "I AM HAPPY"
+    (rule, groups), skipped = matcher.match(text, input_words(text))
+    assert rule is rules[1] and groups == (None, "I", "AM HAPPY")
+    assert skipped == 1  # The SAD rule, by the prefilter
+    assert matcher.match("HELLO", input_words("HELLO")) == (None, 3)
+
+@pytest.mark.smoke
+def test_not_combined():
+    eliza = Eliza(script_data="(HELLO ((0 HELLO 0) (HI)))", combined_match=True)
+    assert eliza.combined_matcher("HELLO", False, eliza.dictionary["HELLO"].response_rules) is None
+    assert not Eliza(script_data="(HELLO ((0) (HI)))", engine="token",
+                     combined_match=True).combined_match
+
+@pytest.mark.smoke
+def test_bad_pattern_fails_when_reached():
+    eliza = Eliza(script_data="(HELLO ((HELLO) (HI)) ((0 (FOO) 0) (OOPS)))", combined_match=True)
+    assert build_combined_matcher(eliza.dictionary["HELLO"].response_rules) is None
+    assert eliza.get_response("hello") == "HI"
+    with pytest.raises(ElizaScriptError):
+        eliza.get_response("bye hello")
+
+@pytest.mark.smoke
+def test_matchers_dropped_on_changes():
+    eliza = Eliza(script_data="""
+    (MY = YOUR 2 ((0 YOUR 0 (/FAMILY) 0) (FAMILY 4)) ((0 YOUR 0) (YOUR 3)))
+    (MOTHER DLIST (/FAMILY))
+    (NONE ((0) (GO ON)))
+    """, combined_match=True)
+    assert eliza.get_response("my father") == "YOUR FATHER"
+    assert eliza._combined_matchers
+    eliza.update_category("FAMILY", "FATHER")
+    assert not eliza._combined_matchers
+    assert eliza.get_response("my father") == "FAMILY FATHER"
+    eliza.set_entries("(MY = YOUR 2 ((0 YOUR 0) (WHY YOUR 3)) ((0) (NEVER)))")
+    assert eliza.get_response("my father") == "WHY YOUR FATHER"
+
+@pytest.mark.smoke
+def test_tracing_tries_every_rule():
+    eliza = Eliza(script_path="scripts/original.eliza", combined_match=True)
+    events = []
+    listener = lambda event, fields: events.append(event)
+    tracer.subscribe(listener)
+    try:
+        eliza.get_response("I am unhappy")
+    finally:
+        tracer.unsubscribe(listener)
+    assert events.count("rule_tried") > 1
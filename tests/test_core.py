@@ -8,3 +8,41 @@ def test_eliza_rule_regex_caching():
     first = rule.regex
     second = rule.regex
     assert first is second  # same object -> compiled only once
+
+eliza_script_bad_reassembly = """
+(HELLO
+((0 HELLO 0)
+(HI 5)))
+"""
+
+@pytest.mark.parametrize("precompile", [True, "background"])
+@pytest.mark.smoke
+def test_eliza_precompile(precompile):
+    from eliza.core import Eliza
+
+    eliza = Eliza(script_path="scripts/original.eliza", precompile=precompile)
+    assert eliza.wait_precompiled(timeout=10)
+    assert eliza.compile_seconds is not None
+    for entry in eliza.dictionary.values():
+        for rule in [*entry.response_rules, *entry.memory_rules]:
+            if rule.pattern:
+                assert rule._compiled_regex is not None
+
+@pytest.mark.smoke
+def test_eliza_precompile_fails_fast():
+    from eliza.core import Eliza
+    from eliza.exceptions import ElizaScriptError
+
+    with pytest.raises(ElizaScriptError, match="HELLO"):
+        Eliza(script_data=eliza_script_bad_reassembly, precompile=True)
+
+    eliza = Eliza(script_data=eliza_script_bad_reassembly, precompile="background")
+    with pytest.raises(ElizaScriptError):
+        eliza.wait_precompiled()
+
+@pytest.mark.smoke
+def test_eliza_precompile_mode():
+    from eliza.core import Eliza
+
+    with pytest.raises(ValueError):
+        Eliza(precompile="later")
@@ -0,0 +1,57 @@
+import logging
+import pytest
+from eliza.core import Eliza
+from eliza.exceptions import ElizaScriptError
+
+CHAIN = """
+(A ((0 FOO 0) (FOO)) (=B))
+(B ((0 BAR 0) (BAR)) (=C))
+(C ((0 BAZ 0) (BAZ)) (=D))
+(D ((0 QUX 0) (QUX)) (=MISSING))
+(E ((0) (GO TO B) (=B)))
+(NONE ((0) (NONE)))
+"""
+
+@pytest.mark.smoke
+def test_chain_resolved():
+    eliza = Eliza(script_data=CHAIN)
+    hops, target = eliza.dispatch_table[("A", False)]
+    assert [key for key, _ in hops] == ["A", "B", "C", "D"]
+    assert [len(rules) for _, rules in hops] == [1, 1, 1, 1]
+    assert target == "MISSING"
+    assert ("A", True) not in eliza.dispatch_table  # No redirection, scanned directly
+    assert ("NONE", False) not in eliza.dispatch_table
+
+@pytest.mark.parametrize("text,expected", [
+    ("a foo", "FOO"), ("a bar", "BAR"), ("a baz", "BAZ"), ("a qux", "QUX"), ("c qux", "QUX"),
+])
+@pytest.mark.smoke
+def test_chain_responses(text, expected):
+    assert Eliza(script_data=CHAIN).get_response(text) == expected
+
+@pytest.mark.smoke
+def test_dangling_target():
+    eliza = Eliza(script_data=CHAIN)
+    with pytest.raises(ElizaScriptError, match="No dictionary entry found for key: MISSING"):
+        eliza.get_response("b x")
+    eliza.get_response("e x")  # GO TO B
+    with pytest.raises(ElizaScriptError, match="MISSING"):
+        eliza.get_response("e x")  # Reassembly-level redirection into the chain
+
+@pytest.mark.smoke
+def test_dangling_target_logged(caplog):
+    with caplog.at_level(logging.INFO, logger="eliza_logger"):
+        Eliza(script_data=CHAIN)
+    assert "D redirects to MISSING" in caplog.text
+
+@pytest.mark.smoke
+def test_cycle_raises_at_load():
+    script = CHAIN.replace("(=MISSING)", "(=B)")
+    with pytest.raises(ElizaScriptError, match="Circular rule-level redirection detected: B -> C -> D -> B"):
+        Eliza(script_data=script)
+    eliza = Eliza(script_data=CHAIN)
+    with pytest.raises(ElizaScriptError, match="Circular"):
+        eliza.set_entries("(MISSING (=A))")
+    assert "MISSING" not in eliza.dictionary
+    eliza.set_entries("(MISSING ((0) (FOUND)))")
+    assert eliza.get_response("a x") == "FOUND"
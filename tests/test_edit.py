@@ -0,0 +1,55 @@
+import pytest
+from eliza.core import Eliza
+from eliza.exceptions import ElizaScriptError
+
+SCRIPT = """
+(MY = YOUR 2 ((0 YOUR 0 (/FAMILY) 0) (FAMILY 4)) ((0 YOUR 0) (YOUR 3)))
+(MOTHER DLIST (/FAMILY))
+(NONE ((0) (GO ON)))
+"""
+
+@pytest.mark.parametrize("engine", ["regex", "token"])
+@pytest.mark.smoke
+def test_category_change_recompiles(engine):
+    eliza = Eliza(script_data=SCRIPT, engine=engine, precompile=True)
+    assert eliza.get_response("my father") == "YOUR FATHER"
+    assert eliza.get_response("my mother") == "FAMILY MOTHER"
+    assert eliza.category_index == {"FAMILY": {"MY"}}
+
+    eliza.update_category("FAMILY", "FATHER")
+    assert eliza.get_response("my father") == "FAMILY FATHER"
+    assert eliza.set_category("family", ["SISTER"]) == 1  # Only the (/FAMILY) rule
+    assert eliza.get_response("my mother") == "YOUR MOTHER"
+    assert eliza.get_response("my sister") == "FAMILY SISTER"
+    eliza.remove_category("FAMILY")
+    unknown = Eliza(script_data=SCRIPT.replace("(MOTHER DLIST (/FAMILY))", ""), engine=engine)
+    assert eliza.get_response("my sister") == unknown.get_response("my sister")
+
+@pytest.mark.smoke
+def test_set_and_remove_entries():
+    eliza = Eliza(script_data=SCRIPT, precompile=True)
+    session = eliza.new_session()
+    assert eliza.set_entries("""
+    (DOG 3 ((0 (/PET) 0) (A PET 2)) ((0) (WOOF)))
+    (CAT DLIST (/PET))
+    (NONE ((0) (AND THEN)))
+    """) == ["DOG", "NONE"]
+    assert eliza.get_response("hello", session) == "AND THEN"
+    assert eliza.get_response("my dog", session) == "WOOF"
+    assert eliza.get_response("dog cat", session) == "A PET CAT"
+    assert eliza.category_index["PET"] == {"DOG"}
+    assert eliza.get_response("my mother", session) == "FAMILY MOTHER"
+
+    assert eliza.remove_entry("DOG").rank == 3
+    assert eliza.get_response("dog", session) == "AND THEN"
+    with pytest.raises(KeyError):
+        eliza.remove_entry("DOG")
+
+@pytest.mark.parametrize("data", ["(DOG ((0) (WOOF))", "(DOG ((0 (* A)) (WOOF)))",
+                                  "(DOG ((1) (WOOF 2)))"])
+@pytest.mark.smoke
+def test_set_entries_error(data):
+    eliza = Eliza(script_data=SCRIPT)
+    with pytest.raises(ElizaScriptError):
+        eliza.set_entries(data)
+    assert "DOG" not in eliza.dictionary
@@ -0,0 +1,92 @@
+import time
+import pytest
+from eliza.core import Eliza
+
+SCRIPT = """
+(REMEMBER 5
+((0 YOU REMEMBER 0) (ONE 4) (TWO 4) (THREE 4)))
+(MY MEMORY ((0 YOUR 0) (EARLIER YOU SAID YOUR 3)))
+(MY = YOUR 2 ((0 YOUR 0 (/FAMILY) 0) (FAMILY 4)) ((0 YOUR 0) (YOUR 3)))
+(MOTHER DLIST (/FAMILY))
+(I = YOU)
+(NONE ((0) (GO ON)))
+"""
+
+@pytest.mark.smoke
+def test_reload_keeps_sessions():
+    eliza = Eliza(script_data=SCRIPT, precompile=True)
+    session = eliza.new_session()
+    assert eliza.get_response("I remember it", session) == "ONE IT"
+    eliza.get_response("my dog", session)
+
+    kept = eliza.dictionary["REMEMBER"]
+    changed = SCRIPT.replace("(NONE ((0) (GO ON)))", "(NONE ((0) (PLEASE GO ON)))")
+    assert eliza.reload(script_data=changed)
+    assert eliza.dictionary["REMEMBER"] is kept  # Unchanged entries are not recompiled
+    assert eliza.stats["reloads"] == 1
+    assert eliza.get_response("I remember it", session) == "TWO IT"
+    assert eliza.get_response("hello", session) == "EARLIER YOU SAID YOUR DOG"
+    assert eliza.get_response("hello", session) == "PLEASE GO ON"
+
+    # New rules get new slots, rules still there keep theirs
+    changed = changed.replace("(TWO 4)", "(TWO 4) (TWO AND A HALF 4)").replace(
+        "(REMEMBER 5", "(NEW ((0) (NEW)))\n(REMEMBER 5")
+    assert eliza.reload(script_data=changed)
+    assert eliza.dictionary["REMEMBER"] is not kept
+    assert eliza.get_response("I remember it", session) == "TWO AND A HALF IT"  # Position kept
+    assert eliza.get_response("new", session) == "NEW"
+    assert eliza.get_response("new", eliza.new_session()) == "NEW"
+
+@pytest.mark.smoke
+def test_reload_category_change():
+    eliza = Eliza(script_data=SCRIPT, precompile=True)
+    assert eliza.get_response("my father") == "YOUR FATHER"
+    assert eliza.reload(script_data=SCRIPT.replace("(/FAMILY))", "(/FAMILY))\n(FATHER DLIST (/FAMILY))"))
+    assert eliza.get_response("my father") == "FAMILY FATHER"
+
+@pytest.mark.parametrize("broken", ["(NONE ((0) (GO ON))", "(NONE ((0 (* A)) (GO ON)))"])
+@pytest.mark.smoke
+def test_reload_error_keeps_script(broken):
+    eliza = Eliza(script_data=SCRIPT)
+    dictionary = eliza.dictionary
+    assert not eliza.reload(script_data=SCRIPT.replace("(NONE ((0) (GO ON)))", broken))
+    assert eliza.reload_error is not None
+    assert eliza.dictionary is dictionary
+    assert eliza.get_response("hello") == "GO ON"
+
+@pytest.mark.smoke
+def test_failed_reload_leaves_running_script_unchanged():
+    eliza = Eliza(script_data=SCRIPT, precompile=True)
+    context = eliza.context
+    assert not eliza.reload(script_data=SCRIPT.replace("(0) (GO ON)", "(0 (* A)) (GO ON)"))
+    assert all(rule.context is context
+               for entry in eliza.dictionary.values() for rule in entry.response_rules)
+    eliza.set_category("FAMILY", ["MOTHER", "FATHER"])
+    assert eliza.get_response("my father") == "FAMILY FATHER"
+
+@pytest.mark.smoke
+def test_prepared_reload_binds_kept_rules_when_applied():
+    eliza = Eliza(script_data=SCRIPT, precompile=True)
+    context = eliza.context
+    assert eliza.reload(script_data=SCRIPT.replace("GO ON", "AND THEN"), apply=False)
+    assert eliza.dictionary["MY"].response_rules[0].context is context
+    assert eliza.get_response("hello") == "AND THEN"
+    assert eliza.context is not context
+    assert eliza.dictionary["MY"].response_rules[0].context is eliza.context
+
+@pytest.mark.smoke
+def test_watch(tmp_path):
+    path = tmp_path / "script.eliza"
+    path.write_text(SCRIPT)
+    eliza = Eliza(script_path=str(path))
+    watcher = eliza.watch(interval=60)
+    try:
+        assert not watcher.check()
+        path.write_text(SCRIPT.replace("GO ON", "AND THEN"))
+        assert watcher.check()
+        assert eliza.get_response("hello") == "AND THEN"
+        path.write_text(SCRIPT.replace("GO ON", "AND THEN") + "(")
+        assert not watcher.check()
+        assert eliza.get_response("hello") == "AND THEN"
+    finally:
+        watcher.stop()
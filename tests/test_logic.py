@@ -1,6 +1,8 @@
 import pytest
 from eliza.utils import clean_response
 from eliza.core import Eliza
+from eliza.budget import ElizaBudget
+from eliza.exceptions import ElizaScriptError
 
 eliza_script_redirections = """
 (YES
@@ -61,3 +63,92 @@ def eliza_instance():
 def test_counting(eliza_instance, user_input, expected_response):
     eliza_response = eliza_instance.get_response(user_input)
     assert clean_response(eliza_response) == expected_response
+
+
+eliza_script_memory = """
+(MY MEMORY
+((0 YOUR 0)
+(EARLIER YOU SAID YOUR 3)))
+
+(MY = YOUR 2
+((0 YOUR 0)
+(YOUR 3)))
+
+(NONE
+((0)
+(PLEASE GO ON)))
+"""
+
+@pytest.mark.smoke
+def test_sessions_are_independent():
+    eliza_obj = Eliza(script_data=eliza_script_counting + eliza_script_memory)
+    alice = eliza_obj.new_session()
+    bob = eliza_obj.new_session()
+
+    assert eliza_obj.get_response("COUNT", alice) == "ONE"
+    assert eliza_obj.get_response("COUNT", alice) == "TWO"
+    assert eliza_obj.get_response("COUNT", bob) == "ONE"
+    assert eliza_obj.get_response("COUNT") == "ONE"  # default session
+
+    assert eliza_obj.get_response("MY CAT", alice) == "YOUR CAT"
+    assert eliza_obj.get_response("HMM", bob) == "PLEASE GO ON"
+    assert eliza_obj.get_response("HMM", alice) == "EARLIER YOU SAID YOUR CAT"
+    assert not bob.memory_queue
+    assert len(alice.cycles) == eliza_obj.context.n_cycles
+
+
+@pytest.mark.parametrize("budget", [None, ElizaBudget(max_redirections=1)])
+@pytest.mark.smoke
+def test_batch_matches_sequential(budget):
+    script = eliza_script_redirections + eliza_script_counting + eliza_script_memory
+    sequential = Eliza(script_data=script, budget=budget)
+    batched = Eliza(script_data=script, budget=budget)
+    seq_sessions = [sequential.new_session() for _ in range(3)]
+    bat_sessions = [batched.new_session() for _ in range(3)]
+
+    inputs = [(0, "COUNT"), (1, "MY DOG"), (0, "COUNT"), (2, "RED"),
+              (1, "COUNT"), (1, "HMM"), (0, "COUNT"), (2, "GREEN, COUNT"), (0, "GREEN")]
+    expected = [sequential.get_response(text, seq_sessions[i]) for i, text in inputs]
+    result = batched.get_responses([(bat_sessions[i], text) for i, text in inputs])
+    assert result == expected
+    assert result[:3] == ["ONE", "YOUR DOG", "TWO"]
+
+
+@pytest.mark.smoke
+def test_batch_return_exceptions():
+    eliza = Eliza(script_data="(HELLO ((0) (=MISSING))) (BAD ((0 (FOO) 0) (NO))) (NONE ((0) (GO ON)))")
+    result = eliza.get_responses([(None, "HELLO"), (None, "XYZ"), (None, "BAD"), (None, "XYZ")],
+                                 return_exceptions=True)
+    assert [type(r) for r in result[::2]] == [ElizaScriptError, ElizaScriptError]
+    assert result[1::2] == ["GO ON", "GO ON"]
+    with pytest.raises(ElizaScriptError):
+        eliza.get_responses([(None, "XYZ"), (None, "BAD")])
+
+@pytest.mark.smoke
+def test_literal_prefilter():
+    eliza_obj = Eliza(script_data="""
+    (REMEMBER 5
+    ((0 YOU REMEMBER 0) (DO YOU OFTEN THINK OF 4))
+    ((0 DO I REMEMBER 0) (DID YOU THINK I WOULD FORGET 5))
+    ((0) (WHAT ELSE)))
+    (I = YOU)
+    """)
+    assert eliza_obj.get_response("remember this") == "WHAT ELSE"
+    assert eliza_obj.stats["prefilter_skips"] == 2
+    assert eliza_obj.get_response("I remember this") == "DO YOU OFTEN THINK OF THIS"
+    assert eliza_obj.stats["prefilter_skips"] == 2
+
+@pytest.mark.smoke
+def test_session_memory_allocated_on_use():
+    eliza_obj = Eliza(script_data="""
+    (MY MEMORY ((0 YOUR 0) (EARLIER YOU SAID YOUR 3)))
+    (MY = YOUR 2 ((0 YOUR 0) (YOUR 3)))
+    (NONE ((0) (GO ON)))
+    """)
+    session = eliza_obj.new_session()
+    assert eliza_obj.get_response("hello", session) == "GO ON"
+    assert session._memory_queue is None
+    eliza_obj.get_response("my dog", session)
+    assert list(session.memory_queue) == ["EARLIER YOU SAID YOUR DOG"]
+    assert eliza_obj.get_response("hello", session) == "EARLIER YOU SAID YOUR DOG"
+    assert session.recall() is None
@@ -0,0 +1,91 @@
+import pytest
+from eliza.core import Eliza
+from eliza.budget import ElizaBudget
+from eliza.matchcache import ElizaMatchCache
+from eliza.trace import tracer
+
+SCRIPT = "scripts/original.eliza"
+UTTERANCES = ["Yes", "No", "I don't know", "Yes", "My mother hates me", "No",
+              "I remember my dog", "Yes", "xyz", "I remember my dog", "No"]
+
+@pytest.mark.smoke
+def test_lru():
+    cache = ElizaMatchCache(2)
+    cache.put(("A", "X", False), 1)
+    cache.put(("B", "X", False), 2)
+    assert cache.get(("A", "X", False)) == 1
+    cache.put(("C", "X", False), 3)  # Evicts B, A was used more recently
+    assert ("B", "X", False) not in cache
+    assert cache.get(("B", "X", False)) is None
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 1, "misses": 1,
+                             "evictions": 1, "hit_rate": 0.5}
+    with pytest.raises(ValueError):
+        ElizaMatchCache(0)
+
+@pytest.mark.parametrize("engine", ["regex", "token"])
+@pytest.mark.parametrize("size", [1, 4, 1024])
+@pytest.mark.smoke
+def test_cached_responses_identical(engine, size):
+    plain = Eliza(script_path=SCRIPT, engine=engine)
+    cached = Eliza(script_path=SCRIPT, engine=engine, match_cache_size=size)
+    expected = [plain.get_response(text) for text in UTTERANCES * 3]
+    assert [cached.get_response(text) for text in UTTERANCES * 3] == expected
+    batched = Eliza(script_path=SCRIPT, engine=engine, match_cache_size=size)
+    session = batched.new_session()
+    assert batched.get_responses([(session, text) for text in UTTERANCES * 3]) == expected
+    if size == 1024:
+        assert cached.match_cache.hits > cached.match_cache.misses
+
+# Rule-level hops (ONE, THREE) on both sides of a reassembly redirection
+CHAIN = """
+(ONE (=TWO))
+(TWO ((0) (=THREE)))
+(THREE (=FOUR))
+(FOUR ((0) (FOUR)))
+(NONE ((0) (PLEASE GO ON)))
+"""
+
+@pytest.mark.parametrize("max_redirections", [0, 1, 2, 3])
+@pytest.mark.parametrize("script, utterances", [
+    ({"script_path": SCRIPT}, UTTERANCES + ["Maybe", "Certainly", "How are you", "Alike"]),
+    ({"script_data": CHAIN}, ["One", "Two", "Three", "Four"]),
+])
+@pytest.mark.smoke
+def test_cached_responses_identical_under_budget(max_redirections, script, utterances):
+    budget = ElizaBudget(max_redirections=max_redirections)
+    plain = Eliza(**script, budget=budget)
+    cached = Eliza(**script, budget=budget, match_cache_size=64)
+    expected = [plain.get_response(text) for text in utterances * 3]
+    assert [cached.get_response(text) for text in utterances * 3] == expected
+    assert cached.stats["budget_exceeded"] == plain.stats["budget_exceeded"]
+    assert cached.match_cache.hits
+
+@pytest.mark.smoke
+def test_cache_cleared_on_changes():
+    eliza = Eliza(script_data="""
+    (MY = YOUR 2 ((0 YOUR 0 (/FAMILY) 0) (FAMILY 4)) ((0 YOUR 0) (YOUR 3)))
+    (MOTHER DLIST (/FAMILY))
+    (NONE ((0) (GO ON)))
+    """, match_cache_size=16)
+    assert eliza.get_response("my father") == "YOUR FATHER"
+    assert eliza.get_response("my father") == "YOUR FATHER"
+    assert eliza.match_cache.hits == 2  # Response and memory lookups
+    eliza.update_category("FAMILY", "FATHER")
+    assert len(eliza.match_cache) == 0
+    assert eliza.get_response("my father") == "FAMILY FATHER"
+    eliza.set_entries("(MY = YOUR 2 ((0 YOUR 0) (WHY YOUR 3)))")
+    assert eliza.get_response("my father") == "WHY YOUR FATHER"
+
+@pytest.mark.smoke
+def test_cache_bypassed_while_tracing():
+    eliza = Eliza(script_path=SCRIPT, match_cache_size=16)
+    events = []
+    listener = lambda event, fields: events.append(event)
+    eliza.get_response("Yes")
+    tracer.subscribe(listener)
+    try:
+        eliza.get_response("Yes")
+    finally:
+        tracer.unsubscribe(listener)
+    assert "rule_tried" in events
+    assert eliza.match_cache.hits == 0
@@ -0,0 +1,94 @@
+import random
+import threading
+import pytest
+import regex as re
+from eliza.model import ElizaRule, ElizaContext, ElizaCategories
+from eliza.matcher import tokenize, match_tokens, word_id
+
+def make_context():
+    categories = ElizaCategories()
+    categories["FAMILY"] = ["MOTHER", "FATHER"]
+    categories["NOTHING"] = []
+    return ElizaContext(categories)
+
+def normalize(groups):
+    return [None if g is None else " ".join(g.split()) for g in groups]
+
+def both_engines(pattern, text, context):
+    rule = ElizaRule(pattern=pattern, context=context)
+    match = rule.regex.fullmatch(text)
+    expected = normalize(match.groups()) if match else None
+    elements = rule.elements  # Intern the pattern words before the input's
+    tokens = tokenize(text, context.vocabulary)
+    groups = match_tokens(elements, tokens) if tokens else None
+    return expected, (list(groups) if groups is not None else None)
+
+@pytest.mark.parametrize("pattern,text", [
+    ("0 YOU 0 I 0", "YOU YOU I"),
+    ("0 I 0", "I tell you"),
+    ("0 YOUR 0", "    YOUR    "),
+    ("HELLO", "  HELLO"),
+    ("0 YOUR 0 (/FAMILY) 0", "MY YOUR MOTHER IS NICE"),
+    ("0 YOU (* WANT NEED) 0", "I THINK YOU NEED HELP"),
+    ("0 (/NOTHING) 0", "SOME WORDS"),
+    ("2 YOU WANT", "WHAT DO YOU WANT"),
+    ("0 YOU 0", "HOW DO YOU DO."),
+    ("0", ""),
+    ("0", " "),
+])
+@pytest.mark.smoke
+def test_engines_agree(pattern, text):
+    expected, groups = both_engines(pattern, text, make_context())
+    assert groups == expected
+
+@pytest.mark.smoke
+def test_engines_agree_fuzz():
+    rnd = random.Random(8)
+    pieces = ["0", "0", "1", "2", "YOU", "I", "ME", "(* YOU ME)", "(/FAMILY)", "(/NOTHING)"]
+    words = ["YOU", "you", "I", "ME", "MOTHER", "X", "Y", "DON'T", "!"]
+    context = make_context()
+    for _ in range(2000):
+        items = []
+        for _ in range(rnd.randrange(1, 5)):
+            piece = rnd.choice(pieces)
+            if piece.isdigit() and items and items[-1].isdigit():
+                continue  # Not valid ELIZA syntax
+            items.append(piece)
+        text = " ".join(rnd.choice(words) for _ in range(rnd.randrange(6)))
+        text = rnd.choice(["", " "]) + text + rnd.choice(["", "  "])
+        expected, groups = both_engines(" ".join(items), text, context)
+        assert groups == expected, (items, text)
+
+@pytest.mark.smoke
+def test_token_engine_responses():
+    from eliza.core import Eliza
+    script = "scripts/original.eliza"
+    regex_eliza = Eliza(script_path=script)
+    token_eliza = Eliza(script_path=script, engine="token")
+    for text in ["I remember my mother", "You are afraid of me.", "My father is like my brother",
+                 "I feel that you believe I am sad", "xyz", "I want you to want me"] * 2:
+        assert token_eliza.get_response(text) == regex_eliza.get_response(text)
+
+    with pytest.raises(ValueError):
+        Eliza(engine="dfa")
+
+
+class RacingVocabulary(dict):
+    """Interns another word, from another thread, between picking an id and storing it."""
+    raced = False
+
+    def setdefault(self, key, default=None):
+        if not self.raced:
+            self.raced = True
+            thread = threading.Thread(target=word_id, args=(self, "OTHER"))
+            thread.start()
+            thread.join(timeout=0.2)  # Blocks on the lock, if there is one
+            self.thread = thread
+        return super().setdefault(key, default)
+
+@pytest.mark.smoke
+def test_word_ids_unique_across_threads():
+    vocabulary = RacingVocabulary()
+    word_id(vocabulary, "WORD")
+    vocabulary.thread.join()
+    assert sorted(vocabulary.values()) == [0, 1]
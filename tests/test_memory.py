@@ -0,0 +1,101 @@
+import argparse
+import pytest
+from eliza.core import Eliza
+from eliza.memory import ElizaMemoryPolicy, add_memory_arguments, memory_policy_from_args
+from eliza.model import ElizaSession
+
+eliza_script = """
+(MY = YOUR ((0 YOUR 0) (YOUR 3)))
+(MY MEMORY ((0 YOUR 0) (EARLIER YOU SAID YOUR 3)))
+(HI ((0) (HELLO)))
+(NONE ((0) (GO ON)))
+"""
+
+def talk(eliza, session, texts):
+    return [eliza.get_response(text, session) for text in texts]
+
+@pytest.mark.smoke
+def test_unbounded_by_default():
+    eliza = Eliza(script_data=eliza_script)
+    session = eliza.new_session()
+    talk(eliza, session, [f"my dog {i}" for i in range(5)])
+    assert session.memory_depth == 5
+    assert eliza.memory_stats([session])["evicted"] == 0
+
+@pytest.mark.parametrize("overflow, expected", [
+    ("drop-oldest", ["EARLIER YOU SAID YOUR CAT", "EARLIER YOU SAID YOUR FISH", "GO ON"]),
+    ("drop-newest", ["EARLIER YOU SAID YOUR DOG", "EARLIER YOU SAID YOUR CAT", "GO ON"]),
+])
+@pytest.mark.smoke
+def test_capacity(overflow, expected):
+    eliza = Eliza(script_data=eliza_script, memory_policy=ElizaMemoryPolicy(2, overflow))
+    session = eliza.new_session()
+    talk(eliza, session, ["my dog", "my cat", "my fish"])
+    assert session.memory_depth == 2
+    assert talk(eliza, session, ["xyz"] * 3) == expected
+    assert eliza.stats["memory_evicted"] == 1
+
+@pytest.mark.smoke
+def test_ttl():
+    eliza = Eliza(script_data=eliza_script, memory_policy=ElizaMemoryPolicy(ttl=2))
+    session = eliza.new_session()
+    # Stored at turn 1, kept through turn 3
+    talk(eliza, session, ["my dog", "hi", "hi"])
+    assert talk(eliza, session, ["xyz"]) == ["GO ON"]
+    assert eliza.stats["memory_expired"] == 1
+    talk(eliza, session, ["my cat", "hi"])
+    assert talk(eliza, session, ["xyz"]) == ["EARLIER YOU SAID YOUR CAT"]
+    assert session.memory_depth == 0
+
+@pytest.mark.smoke
+def test_restored_memories_expire_from_restore():
+    eliza = Eliza(script_data=eliza_script, memory_policy=ElizaMemoryPolicy(ttl=1))
+    session = eliza.new_session()
+    talk(eliza, session, ["my dog", "xyz", "my cat", "my fish"])
+    restored = eliza.restore_session(eliza.save_session(session))
+    assert restored.memory_depth == 2
+    assert talk(eliza, restored, ["xyz", "xyz", "xyz"]) == [
+        "EARLIER YOU SAID YOUR CAT", "EARLIER YOU SAID YOUR FISH", "GO ON"]
+    talk(eliza, restored, ["my bird", "hi", "hi"])
+    assert restored.memory_depth == 0
+
+@pytest.mark.smoke
+def test_session_primitives():
+    session = ElizaSession()
+    assert session.remember("A", capacity=0) == 1
+    assert session.remember("B", capacity=0, drop_newest=True) == 1
+    assert session.memory_depth == 0
+    session.remember("C")
+    session.turn = 3
+    session.remember("D", track_turns=True)
+    assert list(session.memory_turns()) == [3, 3]  # Untracked ones count as now
+    session.turn = 5
+    assert session.expire(1) == 2
+    assert session.recall() is None
+
+@pytest.mark.smoke
+def test_memory_stats_across_sessions():
+    eliza = Eliza(script_data=eliza_script, memory_policy=ElizaMemoryPolicy(capacity=3))
+    sessions = [eliza.new_session() for _ in range(3)]
+    for n, session in enumerate(sessions):
+        talk(eliza, session, [f"my dog {i}" for i in range(n * 2)])
+    stats = eliza.memory_stats(sessions)
+    assert stats == {"capacity": 3, "overflow": "drop-oldest", "ttl": None,
+                     "evicted": 1, "expired": 0, "sessions": 3, "depth": 5, "max_depth": 3}
+    assert eliza.memory_stats([])["depth"] == 0
+    assert eliza.memory_stats()["sessions"] == 1
+
+@pytest.mark.parametrize("kwargs", [{"capacity": -1}, {"ttl": -1}, {"overflow": "drop-random"}])
+@pytest.mark.smoke
+def test_bad_policy(kwargs):
+    with pytest.raises(ValueError):
+        ElizaMemoryPolicy(**kwargs)
+
+@pytest.mark.smoke
+def test_policy_from_args():
+    parser = argparse.ArgumentParser()
+    add_memory_arguments(parser)
+    assert memory_policy_from_args(parser.parse_args([])) is None
+    policy = memory_policy_from_args(parser.parse_args(
+        ["--memory-capacity", "8", "--memory-overflow", "drop-newest"]))
+    assert (policy.capacity, policy.overflow, policy.ttl) == (8, "drop-newest", None)
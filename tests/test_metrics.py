@@ -0,0 +1,96 @@
+import json
+import pytest
+from eliza.core import Eliza
+from eliza.metrics import ElizaMetrics, prometheus_escape
+
+eliza_script = """
+(HELLO
+((0 HELLO 0 WORLD 0)
+(HI WORLD))
+((0)
+(HI THERE)))
+
+(CERTAINLY
+(=HELLO))
+
+(NONE
+((0)
+(PLEASE GO ON)))
+"""
+
+@pytest.mark.smoke
+def test_metrics_counters():
+    eliza = Eliza(script_data=eliza_script)
+    with ElizaMetrics() as metrics:
+        for text in ["HELLO", "HELLO WORLD", "CERTAINLY", "XYZ"]:
+            eliza.get_response(text)
+    eliza.get_response("HELLO")  # Not counted any more
+
+    data = metrics.snapshot()
+    assert data["responses"] == 4
+    assert data["keywords"]["HELLO"]["wins"] == 2
+    assert data["keywords"]["CERTAINLY"]["wins"] == 1
+    assert data["keywords"]["NONE"]["wins"] == 1
+    rules = {(r["keyword"], r["pattern"]): r for r in data["rules"]}
+    world = rules[("HELLO", "0 HELLO 0 WORLD 0")]
+    assert (world["tried"], world["prefiltered"], world["attempts"], world["matches"]) == (3, 2, 1, 1)
+    assert rules[("HELLO", "0")]["matches"] == 2
+    assert data["redirections"] == [{"level": "rule", "target": "HELLO", "count": 1}]
+
+@pytest.mark.smoke
+def test_metrics_export(tmp_path):
+    eliza = Eliza(script_data=eliza_script)
+    with ElizaMetrics() as metrics:
+        eliza.get_response("HELLO")
+
+    path = tmp_path / "metrics.json"
+    received = []
+    text = metrics.export(str(path), callback=received.append)
+    assert received == [text] and path.read_text() == text
+    assert json.loads(text)["responses"] == 1
+
+    prometheus = metrics.export(str(tmp_path / "metrics.prom"))
+    assert "# TYPE eliza_responses_total counter" in prometheus
+    assert 'eliza_keyword_wins_total{keyword="HELLO"} 1' in prometheus
+    assert 'eliza_rule_matches_total{keyword="HELLO",memory="false",pattern="0"} 1' in prometheus
+
+    with pytest.raises(ValueError):
+        metrics.export(format="xml")
+
+@pytest.mark.parametrize("value, expected", [
+    ('A "B"', 'A \\"B\\"'),
+    ("A\\B", "A\\\\B"),
+    ("A\nB", "A\\nB"),
+])
+@pytest.mark.smoke
+def test_prometheus_escape(value, expected):
+    assert prometheus_escape(value) == expected
+
+@pytest.mark.smoke
+def test_metrics_keep_cache_and_combined_matcher():
+    eliza = Eliza(script_data=eliza_script, match_cache_size=16, combined_match=True)
+    with ElizaMetrics() as metrics:
+        for text in ["HELLO WORLD", "HELLO WORLD", "CERTAINLY", "CERTAINLY"]:
+            eliza.get_response(text)
+    assert eliza.match_cache.hits == 4  # Response and memory lookups
+    assert eliza._combined_matchers
+
+    data = metrics.snapshot()
+    rules = {(r["keyword"], r["pattern"]): r for r in data["rules"]}
+    world, anything = rules[("HELLO", "0 HELLO 0 WORLD 0")], rules[("HELLO", "0")]
+    assert (world["attempts"], world["matches"], world["reused"]) == (0, 2, 1)
+    assert (anything["matches"], anything["reused"]) == (2, 1)
+    assert data["redirections"] == [{"level": "rule", "target": "HELLO", "count": 2}]
+
+@pytest.mark.smoke
+def test_metrics_count_batch_matches():
+    eliza = Eliza(script_data=eliza_script)
+    with ElizaMetrics() as metrics:
+        eliza.get_responses([(None, "HELLO WORLD"), (None, "HELLO"), (None, "CERTAINLY")])
+    data = metrics.snapshot()
+    assert data["responses"] == 3
+    rules = {(r["keyword"], r["pattern"]): r for r in data["rules"]}
+    assert rules[("HELLO", "0 HELLO 0 WORLD 0")]["matches"] == 1
+    # CERTAINLY redirects: matched in its request, to trace it there
+    assert (rules[("HELLO", "0")]["matches"], rules[("HELLO", "0")]["reused"]) == (2, 1)
+    assert data["redirections"] == [{"level": "rule", "target": "HELLO", "count": 1}]
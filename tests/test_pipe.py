@@ -0,0 +1,88 @@
+import io
+import json
+import pytest
+from eliza.core import Eliza
+from eliza.pipe import ElizaPipe
+from eliza.utils import clean_response
+
+SCRIPT = "scripts/original.eliza"
+UTTERANCES = ["I remember my mother", "My family hates me", "xyz", "Sorry", "xyz"]
+
+def run_pipe(lines, batch_size, **kwargs):
+    output = io.StringIO()
+    ElizaPipe(Eliza(script_path=SCRIPT), **kwargs).run(
+        io.StringIO("".join(line + "\n" for line in lines)), output, batch_size)
+    return output.getvalue().splitlines()
+
+@pytest.mark.parametrize("batch_size", [1, 2, 64])
+@pytest.mark.smoke
+def test_pipe_text(batch_size):
+    eliza = Eliza(script_path=SCRIPT)
+    expected = [clean_response(eliza.get_response(text)) for text in UTTERANCES]
+    assert run_pipe(UTTERANCES, batch_size) == expected
+
+@pytest.mark.parametrize("batch_size", [1, 3, 64])
+@pytest.mark.smoke
+def test_pipe_jsonl_sessions(batch_size):
+    records = []
+    for text in UTTERANCES:
+        for session in ("a", "b"):
+            records.append(json.dumps({"session": session, "text": text}))
+    records += ['{"session": "a", "end": true}', "not json", '{"id": 1}',
+                '{"id": 2, "session": "a", "text": "xyz"}']
+    replies = [json.loads(line) for line in run_pipe(records, batch_size, jsonl=True)]
+
+    eliza = Eliza(script_path=SCRIPT)
+    expected = [clean_response(eliza.get_response(text)) for text in UTTERANCES]
+    assert [r["response"] for r in replies[0:10:2]] == expected
+    assert [r["response"] for r in replies[1:10:2]] == expected
+    assert replies[10] == {"session": "a", "ended": True}
+    assert "error" in replies[11] and "error" in replies[12]
+    # The ended session starts over
+    fresh = Eliza(script_path=SCRIPT)
+    assert replies[13] == {"id": 2, "session": "a", "response": clean_response(fresh.get_response("xyz"))}
+
+# HELLO redirects to an entry that does not exist
+BROKEN_SCRIPT = """
+(COUNT ((0) (ONE) (TWO) (THREE)))
+(HELLO ((0) (=MISSING)))
+(NONE ((0) (GO ON)))
+"""
+
+def run_broken_pipe(lines, batch_size, **kwargs):
+    output = io.StringIO()
+    ElizaPipe(Eliza(script_data=BROKEN_SCRIPT), **kwargs).run(
+        io.StringIO("".join(line + "\n" for line in lines)), output, batch_size)
+    return output.getvalue().splitlines()
+
+@pytest.mark.parametrize("batch_size", [1, 64])
+@pytest.mark.smoke
+def test_pipe_text_error_answers_the_rest(batch_size):
+    assert run_broken_pipe(["count", "hello", "count", "xyz"], batch_size) == [
+        "ONE", "", "TWO", "GO ON"]
+
+@pytest.mark.parametrize("batch_size", [1, 64])
+@pytest.mark.smoke
+def test_pipe_jsonl_error_answers_the_rest(batch_size):
+    records = [{"session": "a", "text": "count"}, {"session": "b", "text": "count"},
+               {"session": "a", "text": "hello"}, {"session": "a", "text": "count"}]
+    replies = [json.loads(line) for line in run_broken_pipe(
+        [json.dumps(record) for record in records], batch_size, jsonl=True)]
+    assert [r.get("response") for r in replies] == ["ONE", "ONE", None, "TWO"]
+    assert "MISSING" in replies[2]["error"]
+
+class Terminal(io.StringIO):
+    def isatty(self):
+        return True
+
+class FlushCounter(io.StringIO):
+    flushes = 0
+    def flush(self):
+        self.flushes += 1
+
+@pytest.mark.smoke
+def test_pipe_answers_a_terminal_line_by_line():
+    output = FlushCounter()
+    ElizaPipe(Eliza(script_path=SCRIPT)).run(Terminal("xyz\nxyz\nxyz\n"), output, batch_size=64)
+    assert len(output.getvalue().splitlines()) == 3
+    assert output.flushes >= 3
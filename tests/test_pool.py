@@ -0,0 +1,43 @@
+import sys
+import pytest
+from eliza.core import Eliza
+from eliza.pool import ElizaPool
+from eliza.exceptions import ElizaScriptError
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="needs fork")
+
+SCRIPT = "scripts/original.eliza"
+
+@pytest.mark.smoke
+def test_pool_matches_sequential():
+    requests = [(f"s{i % 5}", text) for i, text in enumerate(
+        ["I remember my mother", "Sorry", "Sorry", "My family hates me",
+         "xyz", "Sorry", "I remember my mother", "xyz", "Hello", "Sorry"] * 3)]
+
+    reference = Eliza(script_path=SCRIPT)
+    sessions = {}
+    expected = [reference.get_response(text, sessions.setdefault(sid, reference.new_session()))
+                for sid, text in requests]
+
+    with ElizaPool(Eliza(script_path=SCRIPT), n_workers=3) as pool:
+        result = pool.get_responses(requests[:17]) + pool.get_responses(requests[17:])
+    assert result == expected
+
+# HELLO redirects to an entry that does not exist, which loading only logs
+BROKEN_SCRIPT = """
+(COUNT ((0) (ONE) (TWO) (THREE)))
+(HELLO ((0) (=MISSING)))
+(NONE ((0) (GO ON)))
+"""
+
+@pytest.mark.smoke
+def test_pool_failed_request_keeps_the_others():
+    with ElizaPool(Eliza(script_data=BROKEN_SCRIPT), n_workers=2) as pool:
+        requests = [("a", "count"), ("b", "count"), ("a", "hello"), ("c", "count"), ("a", "count")]
+        result = pool.get_responses(requests, return_exceptions=True)
+        assert [type(r) for r in result] == [str, str, ElizaScriptError, str, str]
+        assert [result[i] for i in (0, 1, 3, 4)] == ["ONE", "ONE", "ONE", "TWO"]
+        with pytest.raises(ElizaScriptError):
+            pool.get_responses([("b", "count"), ("b", "hello")])
+        assert pool.get_response("a", "count") == "THREE"
+        assert pool.get_response("c", "count") == "TWO"
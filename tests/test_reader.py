@@ -0,0 +1,64 @@
+import random
+import pytest
+import sexpdata
+from eliza.core import Eliza
+from eliza.exceptions import ElizaScriptError
+from eliza.reader import read_forms, render, ElizaScriptSyntaxError
+
+SCRIPTS = ["scripts/minimal.eliza", "scripts/nano.eliza", "scripts/original.eliza"]
+
+@pytest.mark.parametrize("text", [
+    "(HELLO ((0)(HI)))",
+    "(SORRY ((0)(PLEASE DON'T APOLOGIZE)))",
+    "(A 'B) ('(C D) E)",
+    "(A \"B C\" D) ; comment\n(E)",
+    "(A\\ B \\(C\\) 1 -3 2.5 nil t)",
+    "[A B] (C [D])",
+    "(REALLY, 2 3) (WHAT? #X)",
+])
+@pytest.mark.smoke
+def test_read_forms_like_sexpdata(text):
+    expected = sexpdata.loads(f"({text}\n)")
+    forms = list(read_forms(text.splitlines(keepends=True)))
+    assert forms == expected
+    assert [render(form) for form in forms] == [sexpdata.dumps(form) for form in expected]
+
+@pytest.mark.parametrize("script_path", SCRIPTS)
+@pytest.mark.smoke
+def test_read_forms_any_chunks(script_path):
+    with open(script_path) as file:
+        text = file.read()
+    expected = sexpdata.loads(f"({text}\n)")
+    rnd = random.Random(0)
+    cuts = sorted(rnd.sample(range(len(text)), 50))
+    chunks = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+    assert list(read_forms(chunks)) == expected
+    assert list(read_forms([text])) == expected
+
+@pytest.mark.parametrize("text, line, column", [
+    ("(FOO", 1, 1),
+    ("(A)\n  (B (C)", 2, 3),
+    ("(A))", 1, 4),
+    ("(A]", 1, 3),
+    ('(A "B)', 1, 4),
+    ("(A ')", 1, 4),
+])
+@pytest.mark.smoke
+def test_read_forms_errors(text, line, column):
+    with pytest.raises(ElizaScriptSyntaxError) as info:
+        list(read_forms(text.splitlines(keepends=True)))
+    assert (info.value.line, info.value.column) == (line, column)
+
+@pytest.mark.smoke
+def test_parser_error_position():
+    with pytest.raises(ElizaScriptError, match="at line 3, column 1"):
+        Eliza(script_data="(HELLO ((0)(HI)))\n\n(KEYWORD ((0)(BLAH)) KING)")
+
+@pytest.mark.smoke
+def test_parser_keeps_pattern_items():
+    eliza = Eliza(script_path="scripts/original.eliza")
+    for entry in eliza.dictionary.values():
+        for rule in [*(entry.response_rules or []), *(entry.memory_rules or [])]:
+            if rule.pattern:
+                assert rule._items is not None
+                assert rule.items == rule.to_items()
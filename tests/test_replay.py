@@ -0,0 +1,91 @@
+import io
+import json
+import asyncio
+import pytest
+from eliza.core import Eliza
+from eliza.server import ElizaServer
+from eliza.replay import (ElizaLatencies, format_report, load_transcripts, plan_sessions,
+                          read_jsonl_transcript, read_text_transcript, replay_in_process,
+                          replay_server, run, selected_keyword)
+
+SCRIPT = "scripts/original.eliza"
+CONVERSATIONS = [["I remember my mother", "My family hates me", "xyz"],
+                 ["Hello", "You are a computer", "Yes"],
+                 ["I am sad"]]
+
+@pytest.mark.smoke
+def test_read_transcripts(tmp_path):
+    text = ("You: I remember my mother\nELIZA: DO YOU OFTEN THINK OF YOUR MOTHER\n"
+            "You: My family hates me\n\n\nHello\n")
+    assert read_text_transcript(io.StringIO(text)) == [
+        ["I remember my mother", "My family hates me"], ["Hello"]]
+    records = [{"session": "a", "text": "Hi"}, {"session": "b", "text": "Yes"},
+               {"session": "a", "text": "No"}, {"session": "a", "end": True}]
+    lines = "".join(json.dumps(record) + "\n" for record in records)
+    assert read_jsonl_transcript(io.StringIO(lines)) == [["Hi", "No"], ["Yes"]]
+    (tmp_path / "a.txt").write_text(text)
+    (tmp_path / "b.jsonl").write_text(lines)
+    assert len(load_transcripts([str(tmp_path / "a.txt"), str(tmp_path / "b.jsonl")])) == 4
+    with pytest.raises(ValueError, match="line 1"):
+        read_jsonl_transcript(["{"])
+
+@pytest.mark.smoke
+def test_plan_is_seeded():
+    assert plan_sessions(CONVERSATIONS, 20, seed=1) == plan_sessions(CONVERSATIONS, 20, seed=1)
+    assert plan_sessions(CONVERSATIONS, 20, seed=1) != plan_sessions(CONVERSATIONS, 20, seed=2)
+    assert sorted(plan_sessions(CONVERSATIONS, None, seed=1)) == sorted(CONVERSATIONS)
+
+@pytest.mark.smoke
+def test_selected_keyword():
+    eliza = Eliza(script_path=SCRIPT)
+    assert selected_keyword(eliza, "I remember my mother") == "REMEMBER"
+    assert selected_keyword(eliza, "xyz") == "NONE"
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+@pytest.mark.smoke
+def test_replay_in_process(concurrency):
+    eliza = Eliza(script_path=SCRIPT)
+    plan = plan_sessions(CONVERSATIONS, 10, seed=0)
+    latencies = replay_in_process(eliza, plan, concurrency)
+    assert latencies.turns == sum(map(len, plan))
+    assert latencies.errors == 0
+    report = latencies.report(top=2)
+    assert len(report["latency"]) == 3  # All turns and the top 2 keywords
+    summary = report["latency"]["(all)"]
+    assert summary["count"] == latencies.turns
+    assert 0 < summary["p50"] <= summary["p90"] <= summary["p99"] <= summary["max"]
+    assert sum(summary["histogram_us"].values()) == latencies.turns
+    assert "turns/s" in format_report(report, "test")
+
+@pytest.mark.parametrize("concurrency, no_effect", [("1", False), ("4", True)])
+@pytest.mark.smoke
+def test_run_in_process_says_concurrency_has_no_effect(tmp_path, capsys, concurrency, no_effect):
+    (tmp_path / "a.txt").write_text("\n\n".join("\n".join(c) for c in CONVERSATIONS))
+    run(["--concurrency", concurrency, "--json", SCRIPT, str(tmp_path / "a.txt")])
+    report = json.loads(capsys.readouterr().out)
+    assert report["turns"] == sum(map(len, CONVERSATIONS))
+    assert ("no effect" in report["mode"]) == no_effect
+
+@pytest.mark.smoke
+def test_percentiles():
+    summary = ElizaLatencies.summarize([i / 1000 for i in range(1, 101)])
+    assert (summary["p50"], summary["p90"], summary["p99"], summary["max"]) == (50, 90, 99, 100)
+
+@pytest.mark.smoke
+def test_replay_server():
+    eliza = Eliza(script_path=SCRIPT)
+    server = ElizaServer(eliza)
+    plan = plan_sessions(CONVERSATIONS, 6, seed=0)
+
+    async def main():
+        listener = await server.start("127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        latencies = await replay_server(eliza, plan, 3, "127.0.0.1", port)
+        listener.close()
+        await listener.wait_closed()
+        return latencies
+
+    latencies = asyncio.run(main())
+    assert latencies.turns == sum(map(len, plan))
+    assert latencies.errors == 0
+    assert not server.sessions  # Every session was ended
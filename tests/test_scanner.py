@@ -0,0 +1,42 @@
+import pytest
+from eliza.utils import SPLIT_REGEX, WORD_RE
+from eliza.scanner import scan_clauses, build_keyword_table
+from eliza.core import Eliza
+
+def reference_clauses(text):
+    return [WORD_RE.findall(part.strip().upper())
+            for part in SPLIT_REGEX.split(text) if part.strip()]
+
+@pytest.mark.parametrize("input_text", [
+    "Hello. How are you?",
+    "Well... I don't know.",
+    "I came, I saw, I left.",
+    "Wait!  What?   Really.",
+    "No way! :) You can't be serious.",
+    ".Beginning of time",
+    "What?! Are you serious?! Okay...",
+    "Hmm. ?! . Fine",
+    "",
+    "   ",
+    ". , ; ",
+    "y’all rock’n’roll, niño!\tcrème brûlée",
+])
+@pytest.mark.smoke
+def test_scan_clauses_matches_split(input_text):
+    assert list(scan_clauses(input_text.upper())) == reference_clauses(input_text)
+
+@pytest.mark.smoke
+def test_keyword_table():
+    eliza = Eliza(script_data="(YOU = I 3 ((0)(X))) (NONE ((0)(Y))) (ME = YOU)")
+    table = build_keyword_table(eliza.dictionary)
+    assert table == {"YOU": ("YOU", 3, "I"), "ME": ("ME", 0, "YOU")}
+    assert "NONE" not in eliza.keyword_table
+
+@pytest.mark.smoke
+def test_scan_clauses_fuzz():
+    import random
+    rnd = random.Random(6)
+    alphabet = "ab YOU'’.?!,:;\t\n\x1c\x85é-1 "
+    for _ in range(3000):
+        text = "".join(rnd.choice(alphabet) for _ in range(rnd.randrange(12)))
+        assert list(scan_clauses(text.upper())) == reference_clauses(text), repr(text)
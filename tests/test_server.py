@@ -0,0 +1,73 @@
+import json
+import asyncio
+import pytest
+from eliza.core import Eliza
+from eliza.server import ElizaServer
+
+eliza_script = """
+(COUNT
+((0)
+(ONE)
+(TWO)))
+"""
+
+async def exchange(payload: bytes, server: ElizaServer) -> bytes:
+    listener = await server.start("127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(payload)
+    writer.write_eof()
+    data = await reader.read()
+    writer.close()
+    listener.close()
+    await listener.wait_closed()
+    return data
+
+@pytest.mark.smoke
+def test_ndjson_pipelining():
+    server = ElizaServer(Eliza(script_data=eliza_script))
+    requests = [{"id": 1, "session": "a", "text": "COUNT"},
+                {"id": 2, "session": "b", "text": "COUNT"},
+                {"id": 3, "session": "a", "text": "COUNT"},
+                {"id": 4, "op": "metrics"}]
+    payload = b"".join(json.dumps(r).encode() + b"\n" for r in requests)
+    replies = [json.loads(line) for line in
+               asyncio.run(exchange(payload, server)).splitlines()]
+    assert [r["id"] for r in replies] == [1, 2, 3, 4]
+    assert [r.get("response") for r in replies[:3]] == ["ONE", "ONE", "TWO"]
+    assert replies[3]["sessions"] == 2
+    assert replies[3]["memory"]["sessions"] == 2
+
+@pytest.mark.smoke
+def test_http_routes():
+    server = ElizaServer(Eliza(script_data=eliza_script))
+    body = json.dumps({"session": "x", "text": "COUNT"}).encode()
+    payload = (b"POST /respond HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body)
+               + body + b"GET /health HTTP/1.1\r\nConnection: close\r\n\r\n")
+    data = asyncio.run(exchange(payload, server))
+    assert data.count(b"HTTP/1.1 200 OK") == 2
+    assert b'"response": "ONE"' in data
+    assert b'"status": "ok"' in data
+
+@pytest.mark.parametrize("length", [b"abc", b"-1"])
+@pytest.mark.smoke
+def test_http_bad_content_length(length):
+    server = ElizaServer(Eliza(script_data=eliza_script))
+    payload = b"POST /respond HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}"
+    data = asyncio.run(exchange(payload, server))
+    assert data.startswith(b"HTTP/1.1 400 Bad Request")
+    assert b'"error": "bad Content-Length"' in data
+    assert b"Connection: close" in data
+
+
+@pytest.mark.smoke
+def test_http_chunked_body_closes():
+    server = ElizaServer(Eliza(script_data=eliza_script))
+    payload = (b"POST /respond HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+               b"5\r\nhello\r\n0\r\n\r\n"
+               b"GET /health HTTP/1.1\r\n\r\n")
+    data = asyncio.run(exchange(payload, server))
+    assert data.startswith(b"HTTP/1.1 411 Length Required")
+    assert b"Connection: close" in data
+    # The chunks are not taken for requests, nor is anything after them
+    assert data.count(b"HTTP/1.1 ") == 1
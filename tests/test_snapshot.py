@@ -0,0 +1,69 @@
+import pytest
+from eliza.core import Eliza
+from eliza.exceptions import ElizaSnapshotError
+from eliza.server import ElizaServer
+
+SCRIPT = "scripts/original.eliza"
+UTTERANCES = ["My mother hates me", "I remember my dog", "xyz", "You are like my father",
+              "Sorry", "xyz", "I remember nothing"]
+
+@pytest.mark.parametrize("format", ["binary", "json"])
+@pytest.mark.smoke
+def test_snapshot_round_trip(format):
+    eliza = Eliza(script_path=SCRIPT)
+    session = eliza.new_session()
+    for text in UTTERANCES:
+        eliza.get_response(text, session)
+    assert session.memory_queue
+
+    data = eliza.save_session(session, format=format)
+    assert isinstance(data, bytes if format == "binary" else str)
+    restored = Eliza(script_path=SCRIPT).restore_session(data)
+    assert list(restored.memory_queue) == list(session.memory_queue)
+    assert restored.cycles == session.cycles
+    assert ([eliza.get_response(text, restored) for text in UTTERANCES]
+            == [eliza.get_response(text, session) for text in UTTERANCES])
+
+@pytest.mark.smoke
+def test_snapshot_other_script():
+    data = Eliza(script_path=SCRIPT).save_session()
+    with pytest.raises(ElizaSnapshotError, match="different script"):
+        Eliza(script_path="scripts/nano.eliza").restore_session(data)
+
+    eliza = Eliza(script_path=SCRIPT)
+    json_data = eliza.save_session(format="json")
+    key = next(iter(eliza.dictionary))
+    rules = eliza.dictionary[key].response_rules
+    eliza.update_entry(key, response_rules=rules)  # Same script, cached fingerprint reset
+    assert eliza.restore_session(json_data).cycles == eliza.session.cycles
+
+@pytest.mark.parametrize("data", [b"", b"ELZS", b"XXXX" + bytes(30), "{}", "[1]", "not json"])
+@pytest.mark.smoke
+def test_snapshot_malformed(data):
+    eliza = Eliza(script_path=SCRIPT)
+    with pytest.raises(ElizaSnapshotError):
+        eliza.restore_session(data)
+
+@pytest.mark.smoke
+def test_snapshot_truncated():
+    eliza = Eliza(script_path=SCRIPT)
+    eliza.get_response("I remember my dog")
+    eliza.get_response("My mother hates me")
+    data = eliza.save_session()
+    for size in range(len(data)):
+        with pytest.raises(ElizaSnapshotError):
+            eliza.restore_session(data[:size])
+    with pytest.raises(ElizaSnapshotError):
+        eliza.restore_session(data + b"\0")
+
+@pytest.mark.smoke
+def test_server_snapshot_migration():
+    old, new = ElizaServer(Eliza(script_path=SCRIPT)), ElizaServer(Eliza(script_path=SCRIPT))
+    for text in UTTERANCES:
+        old.handle_request({"session": "a", "text": text})
+    snapshot = old.handle_request({"op": "snapshot", "session": "a"})["snapshot"]
+    assert new.handle_request({"op": "restore", "session": "a", "snapshot": snapshot})["restored"]
+    assert "error" in new.handle_request({"op": "restore", "session": "b", "snapshot": "!"})
+    for text in UTTERANCES:
+        assert (new.handle_request({"session": "a", "text": text})
+                == old.handle_request({"session": "a", "text": text}))
@@ -0,0 +1,65 @@
+import pytest
+from eliza.core import Eliza
+from eliza.logger import setup_logger
+from eliza.trace import Tracer, tracer, log_event, format_event
+
+eliza_script = """
+(HELLO
+((0)
+(HI THERE)))
+
+(CERTAINLY
+(=HELLO))
+
+(NONE
+((0)
+(PLEASE GO ON)))
+"""
+
+@pytest.fixture
+def events():
+    recorded = []
+    def listener(event, fields):
+        recorded.append((event, fields))
+    tracer.subscribe(listener)
+    yield recorded
+    tracer.unsubscribe(listener)
+
+@pytest.mark.smoke
+def test_trace_events(events):
+    Eliza(script_data=eliza_script).get_response("CERTAINLY")
+    assert [event for event, _ in events] == [
+        "input", "keyword", "rule_redirection", "rule_tried", "rule_matched",
+        "reassembly", "response",
+    ]
+    assert events[0][1] == {"reflected_input": "CERTAINLY", "keystack": [("CERTAINLY", 0)]}
+    assert events[2][1] == {"key": "CERTAINLY", "target": "HELLO"}
+    assert events[-1][1] == {"text": "HI THERE"}
+
+@pytest.mark.smoke
+def test_trace_disabled(monkeypatch):
+    setup_logger(0)
+    assert not tracer.enabled
+    def fail(*args, **kwargs):
+        raise AssertionError("event emitted while tracing is disabled")
+    monkeypatch.setattr(Tracer, "emit", fail)
+    assert Eliza(script_data=eliza_script).get_response("HELLO") == "HI THERE"
+
+@pytest.mark.smoke
+def test_trace_setup_logger():
+    setup_logger(1)
+    assert tracer.enabled and log_event in tracer.listeners
+    setup_logger(0)
+    assert not tracer.enabled
+
+@pytest.mark.parametrize("event, fields, expected_lines", [
+    ("input", {"reflected_input": "I AM", "keystack": [("AM", 0), ("I", 0)]},
+     ["reflected_input: I AM", "keystack: AM (0), I (0)"]),
+    ("keyword", {"key": "NONE"}, [" key: NONE"]),
+    ("rule_tried", {"pattern": "0 YOU 0"}, ["  rule.pattern: 0 YOU 0"]),
+    ("rule_matched", {"pattern": "0", "groups": ("X",)}, []),
+    ("reassembly_redirection", {"target": "WHAT"}, ["   reassembly.redirection: WHAT"]),
+])
+@pytest.mark.smoke
+def test_format_event(event, fields, expected_lines):
+    assert format_event(event, fields) == expected_lines